@@ -0,0 +1,302 @@
+"""Pre-aggregated analytics rollups (`analytics_hourly`, `analytics_daily`).
+
+Every game and package is folded into one row per (hour, manager subtree,
+city, region) and one per (day, ...). The folding runs off the request
+path as the `analytics` projection of app.core.outbox: `project()` reads
+the transactions named by `game.ended`, `package.sent` and
+`credit_request.approved` events and adds them to the rollups in the
+projection's own transaction, so a money write never locks a shared bucket
+row. A `package.reverted` event takes its package back out of the bucket it
+was added to. Games are bucketed by `played_at` (else `created_at`),
+packages by `created_at`. The dimensions come from the jester (games) or the receiver
+(packages):
+
+  manager_id  nearest MANAGER up the superior_id/created_by chain (0 if none)
+  city/region the user's own city/region ("" if unset)
+
+`/api/management/analytics` only reads the rollups: hour buckets from the
+hourly table, day/week buckets from the daily one, so a year of daily
+buckets reads ~366 rows per dimension value instead of every transaction.
+Buckets are UTC.
+
+Rows written without an outbox event are not folded; `rebuild()`
+(scripts/rebuild_analytics.py) recomputes whole days from scratch. It reads
+the raw rows and the events the projection has not applied yet from one
+snapshot and leaves those transactions to the projection, so the two never
+count a row twice: reverted packages are left out, unless the projection
+has yet to take their revert out itself.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import OperationalError
+
+from app.core.archive import as_utc
+
+GAME_METRICS = ("game_count", "bet_total", "pot_total", "cut_total", "payout_total")
+PACKAGE_METRICS = ("package_count", "package_total")
+METRICS = GAME_METRICS + PACKAGE_METRICS
+DIMENSIONS = ("manager_id", "city", "region")
+# superior chains are at most OWNER > MANAGER > SUPERAGENT > JESTER
+_MAX_HOPS = 5
+PROJECTION = "analytics"
+# outbox topics whose transaction_id names a new game / package row
+GAME_TOPICS = ("game.ended",)
+PACKAGE_TOPICS = ("package.sent", "credit_request.approved")
+# ... and whose package is taken back out
+REVERT_TOPICS = ("package.reverted",)
+# SQLSTATE serialization_failure
+SERIALIZATION_FAILURE = "40001"
+
+Key = Tuple[datetime, int, str, str]
+
+
+def hour_bucket(ts: Optional[datetime]) -> datetime:
+    ts = as_utc(ts) or datetime.now(timezone.utc)
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(ts: Optional[datetime]) -> datetime:
+    return hour_bucket(ts).replace(hour=0)
+
+
+def _rollups():
+    from app import models
+
+    return ((models.AnalyticsHourly.__table__, hour_bucket), (models.AnalyticsDaily.__table__, day_bucket))
+
+
+class DimensionResolver:
+    """Caches user -> (manager_id, city, region) lookups for one batch."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._users: dict = {}
+
+    def _user(self, user_id):
+        if user_id not in self._users:
+            from app import models
+
+            u = models.User
+            self._users[user_id] = self.conn.execute(
+                select(u.id, u.role, u.superior_id, u.created_by, u.city, u.region).where(u.id == user_id)
+            ).first()
+        return self._users[user_id]
+
+    def __call__(self, user_id: Optional[int]) -> Tuple[int, str, str]:
+        user = self._user(user_id) if user_id is not None else None
+        if user is None:
+            return 0, "", ""
+        manager_id, current = 0, user
+        for _ in range(_MAX_HOPS):
+            if current is None:
+                break
+            role = getattr(current.role, "value", current.role)
+            if role == "MANAGER":
+                manager_id = current.id
+                break
+            parent = current.superior_id or current.created_by
+            current = self._user(parent) if parent else None
+        return manager_id, user.city or "", user.region or ""
+
+
+def _empty() -> dict:
+    return {m: 0 for m in METRICS}
+
+
+def add_game(totals: Dict[Key, dict], dims, jester_id, played_at, bet, pot, cut, payout) -> None:
+    row = totals.setdefault((hour_bucket(played_at), *dims(jester_id)), _empty())
+    row["game_count"] += 1
+    row["bet_total"] += bet or 0
+    row["pot_total"] += pot or 0
+    row["cut_total"] += cut or 0
+    row["payout_total"] += payout or 0
+
+
+def add_package(totals: Dict[Key, dict], dims, receiver_id, created_at, amount, sign: int = 1) -> None:
+    row = totals.setdefault((hour_bucket(created_at), *dims(receiver_id)), _empty())
+    row["package_count"] += sign
+    row["package_total"] += sign * (amount or 0)
+
+
+def _upsert(conn, table, totals: Dict[Key, dict]) -> None:
+    # sorted keys keep concurrent writers locking buckets in the same order
+    rows = [dict(zip(("bucket",) + DIMENSIONS, key), **totals[key]) for key in sorted(totals)]
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        if conn.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket", *DIMENSIONS],
+            set_={m: table.c[m] + stmt.excluded[m] for m in METRICS},
+        )
+        conn.execute(stmt, rows)
+        return
+    for row in rows:
+        match = [table.c.bucket == row["bucket"]] + [table.c[d] == row[d] for d in DIMENSIONS]
+        updated = conn.execute(
+            table.update().where(*match).values({m: table.c[m] + row[m] for m in METRICS})
+        ).rowcount
+        if not updated:
+            conn.execute(table.insert().values(row))
+
+
+def apply(conn, totals: Dict[Key, dict]) -> None:
+    """Add hourly `totals` onto both rollups (insert-or-increment)."""
+    if not totals:
+        return
+    for table, grain in _rollups():
+        rolled: Dict[Key, dict] = {}
+        for (bucket, *dims), values in totals.items():
+            row = rolled.setdefault((grain(bucket), *dims), _empty())
+            for m in METRICS:
+                row[m] += values[m]
+        _upsert(conn, table, rolled)
+
+
+def _transaction_ids(events) -> Tuple[Set[int], Set[int], Set[int]]:
+    """Games, packages and reverted packages named by `events`."""
+    games, packages, reverts = set(), set(), set()
+    for event in events:
+        tx_id = (event.payload or {}).get("transaction_id")
+        if tx_id is None:
+            continue
+        if event.topic in GAME_TOPICS:
+            games.add(tx_id)
+        elif event.topic in PACKAGE_TOPICS:
+            packages.add(tx_id)
+        elif event.topic in REVERT_TOPICS:
+            reverts.add(tx_id)
+    return games, packages, reverts
+
+
+def _fold(conn, totals: Dict[Key, dict], dims, game_where, package_where, skip=(set(), set(), set()),
+          batch_size=5000) -> int:
+    """Add the games and the packages not reverted (or whose revert is in `skip[2]`) to `totals`."""
+    from app import models
+
+    gt, pt = models.GameTransaction, models.PackageTransaction
+    folded = 0
+    games = conn.execution_options(yield_per=batch_size).execute(
+        select(gt.id, gt.jester_id, func.coalesce(gt.played_at, gt.created_at), gt.bet_amount, gt.total_pot,
+               gt.cut_amount, gt.winner_payout).where(*game_where)
+    )
+    for row in games:
+        if row[0] not in skip[0]:
+            add_game(totals, dims, *row[1:])
+            folded += 1
+    packages = conn.execution_options(yield_per=batch_size).execute(
+        select(pt.id, pt.receiver_id, pt.created_at, pt.package_amount, pt.status).where(*package_where)
+    )
+    for row in packages:
+        if row[0] not in skip[1] and (row[4] != "REVERTED" or row[0] in skip[2]):
+            add_package(totals, dims, *row[1:4])
+            folded += 1
+    return folded
+
+
+def project(conn, events: list) -> None:
+    """Outbox projection: add the games and packages written by `events`, take reverted packages out."""
+    from app import models
+
+    pt = models.PackageTransaction
+    games, packages, reverts = _transaction_ids(events)
+    if not games and not packages and not reverts:
+        return
+    totals: Dict[Key, dict] = {}
+    dims = DimensionResolver(conn)
+    # a sent package counts even if it is reverted by now: its own revert event takes it out
+    _fold(conn, totals, dims, [models.GameTransaction.id.in_(sorted(games))], [pt.id.in_(sorted(packages))],
+          skip=(set(), set(), packages))
+    for row in conn.execute(select(pt.receiver_id, pt.created_at, pt.package_amount).where(pt.id.in_(sorted(reverts)))):
+        add_package(totals, dims, *row, sign=-1)
+    apply(conn, totals)
+
+
+def _pending(conn) -> Tuple[Set[int], Set[int], Set[int]]:
+    """Transactions of events the projection has not applied yet."""
+    from app import models
+
+    ob, cp = models.OutboxEvent, models.ProjectionCheckpoint
+    applied = conn.execute(select(cp.last_event_id).where(cp.name == PROJECTION)).scalar() or 0
+    return _transaction_ids(conn.execute(select(ob.topic, ob.payload).where(ob.id > applied)).all())
+
+
+def rebuild(engine, start: Optional[datetime] = None, end: Optional[datetime] = None, batch_size: int = 5000,
+            retries: int = 3) -> int:
+    """Recompute the days overlapping [start, end) from the raw tables; returns rows folded.
+
+    The range is widened to whole UTC days so both rollups are rebuilt
+    from the same rows.
+    """
+    from app import models
+
+    gt, pt = models.GameTransaction, models.PackageTransaction
+    start = day_bucket(start) if start is not None else None
+    if end is not None:
+        # round up to the next midnight unless already on one
+        end = day_bucket(as_utc(end) - timedelta(microseconds=1)) + timedelta(days=1)
+
+    def in_range(col):
+        clauses = []
+        if start is not None:
+            clauses.append(col >= start)
+        if end is not None:
+            clauses.append(col < end)
+        return clauses
+
+    for attempt in range(retries):
+        try:
+            with engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    # raw rows and unapplied events from the same snapshot
+                    conn = conn.execution_options(isolation_level="REPEATABLE READ")
+                with conn.begin():
+                    pending = _pending(conn)
+                    for table, _ in _rollups():
+                        conn.execute(delete(table).where(*in_range(table.c.bucket)))
+                    totals: Dict[Key, dict] = {}
+                    folded = _fold(conn, totals, DimensionResolver(conn),
+                                   in_range(func.coalesce(gt.played_at, gt.created_at)), in_range(pt.created_at),
+                                   skip=pending, batch_size=batch_size)
+                    apply(conn, totals)
+            return folded
+        except OperationalError as e:
+            # the projection updated a bucket after the snapshot was taken
+            if getattr(e.orig, "pgcode", None) != SERIALIZATION_FAILURE or attempt == retries - 1:
+                raise
+    return 0
+
+
+def _week_start(column, dialect: str):
+    if dialect == "postgresql":
+        return func.date_trunc("week", func.timezone("UTC", column))
+    # SQLite: back to Monday, like date_trunc('week')
+    return func.strftime("%Y-%m-%d 00:00:00", column, "weekday 0", "-6 days")
+
+
+def report_query(bucket: str, group_by: Optional[str], start: datetime, end: datetime,
+                 manager_id: Optional[int] = None, dialect: str = "postgresql"):
+    """Totals per `bucket` (hour/day/week) and optional dimension over [start, end).
+
+    Day and week buckets cover whole days: `start` is rounded down to its day.
+    """
+    from app import models
+
+    if bucket == "hour":
+        table, lower = models.AnalyticsHourly, hour_bucket(start)
+    else:
+        table, lower = models.AnalyticsDaily, day_bucket(start)
+    period = (_week_start(table.bucket, dialect) if bucket == "week" else table.bucket).label("period")
+    columns = [period]
+    if group_by:
+        columns.append(getattr(table, DIMENSIONS[("manager", "city", "region").index(group_by)]).label("grp"))
+    columns += [func.sum(getattr(table, m)).label(m) for m in METRICS]
+    stmt = select(*columns).where(table.bucket >= lower, table.bucket < end)
+    if manager_id is not None:
+        stmt = stmt.where(table.manager_id == manager_id)
+    keys = columns[: 2 if group_by else 1]
+    return stmt.group_by(*keys).order_by(*keys)
@@ -0,0 +1,254 @@
+"""Cold archive of old transaction rows as gzip NDJSON files.
+
+`archive_table()` moves rows older than a cutoff out of the hot table in
+batches. Each batch is written to date-partitioned files
+
+    ARCHIVE_DIR/<table>/<YYYY>/<MM>/<DD>/<batch>.ndjson.gz
+
+and recorded in ARCHIVE_DIR/manifest.json before the rows are deleted in
+the same transaction. The manifest also tracks `archived_through`, the
+newest `created_at` moved so far. Every row at or before it is in the
+archive, and every row after it is still in the database.
+
+`read_archived()` serves archived rows of a date range from the files the
+manifest lists for those days. Readers of a range that may reach back into
+the archive read `archived_through()` once and split at it: `read_range()`
+returns the archived part and `hot_range_filter()` selects the rest from
+the database, so the two never overlap.
+`read_archived_reverts()` finds archived packages by the time they were
+reverted instead; each manifest entry records the newest `reverted_at` in
+its file, so only files that can hold a revert in the range are opened.
+
+Run a single archiver at a time (scripts/archive_transactions.py).
+"""
+import gzip
+import json
+import os
+import threading
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Iterator, List, Optional
+
+from sqlalchemy import and_, select, true
+
+from app.core.config import settings
+
+MANIFEST = "manifest.json"
+_manifest_lock = threading.Lock()
+
+
+def _tables() -> dict:
+    from app import models
+
+    return {
+        "game_transactions": models.GameTransaction.__table__,
+        "package_transactions": models.PackageTransaction.__table__,
+    }
+
+
+def as_utc(value) -> Optional[datetime]:
+    """Parse/normalize a timestamp; naive values are taken as UTC."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# --- manifest -----------------------------------------------------------------------
+
+def _manifest_path() -> str:
+    return os.path.join(settings.ARCHIVE_DIR, MANIFEST)
+
+
+def load_manifest() -> dict:
+    try:
+        with open(_manifest_path(), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {"tables": {}}
+
+
+def _save_manifest(manifest: dict) -> None:
+    os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+    tmp = _manifest_path() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, _manifest_path())
+
+
+def archived_through(table: str) -> Optional[datetime]:
+    """Newest `created_at` already moved to the archive for `table`, if any."""
+    return as_utc(load_manifest()["tables"].get(table, {}).get("archived_through"))
+
+
+# --- writing --------------------------------------------------------------------------
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # amounts are archived in major units, like rows archived before Money
+        return float(value)
+    return value
+
+
+def encode_row(row) -> dict:
+    return {k: _encode_value(v) for k, v in row.items()}
+
+
+def _write_batch(table: str, rows: list) -> List[dict]:
+    by_day: dict = {}
+    for row in rows:
+        by_day.setdefault(as_utc(row["created_at"]).date(), []).append(row)
+    batch_id = uuid.uuid4().hex[:12]
+    entries = []
+    for day, day_rows in sorted(by_day.items()):
+        rel = os.path.join(table, f"{day:%Y}", f"{day:%m}", f"{day:%d}", f"{batch_id}.ndjson.gz")
+        path = os.path.join(settings.ARCHIVE_DIR, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = "".join(json.dumps(encode_row(r), separators=(",", ":")) + "\n" for r in day_rows)
+        with open(path, "wb") as fh:
+            fh.write(gzip.compress(payload.encode("utf-8")))
+            fh.flush()
+            os.fsync(fh.fileno())
+        entry = {
+            "day": day.isoformat(),
+            "path": rel,
+            "rows": len(day_rows),
+            "min_id": min(r["id"] for r in day_rows),
+            "max_id": max(r["id"] for r in day_rows),
+        }
+        reverted = [as_utc(r["reverted_at"]) for r in day_rows if r.get("reverted_at") is not None]
+        if reverted:
+            entry["max_reverted_at"] = max(reverted).isoformat()
+        entries.append(entry)
+    return entries
+
+
+def archive_table(engine, table: str, cutoff: datetime, batch_size: Optional[int] = None) -> int:
+    """Move rows of `table` with `created_at < cutoff` to the archive; returns rows moved."""
+    t = _tables()[table]
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    moved = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(t).where(t.c.created_at < cutoff).order_by(t.c.created_at, t.c.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                return moved
+            rows = list(rows)
+            # take every row sharing the last timestamp so `archived_through` is exact
+            last = rows[-1]
+            rows += conn.execute(
+                select(t).where(t.c.created_at == last["created_at"], t.c.id > last["id"]).order_by(t.c.id)
+            ).mappings().all()
+
+            with _manifest_lock:
+                previous = load_manifest()
+                manifest = json.loads(json.dumps(previous))
+                entries = _write_batch(table, rows)
+                info = manifest["tables"].setdefault(table, {"files": []})
+                info["files"].extend(entries)
+                info["archived_through"] = as_utc(rows[-1]["created_at"]).isoformat()
+                info["rows"] = info.get("rows", 0) + len(rows)
+                _save_manifest(manifest)
+                try:
+                    ids = [r["id"] for r in rows]
+                    for i in range(0, len(ids), 1000):
+                        conn.execute(t.delete().where(t.c.id.in_(ids[i:i + 1000])))
+                except Exception:
+                    _save_manifest(previous)
+                    for entry in entries:
+                        os.remove(os.path.join(settings.ARCHIVE_DIR, entry["path"]))
+                    raise
+        moved += len(rows)
+
+
+# --- reading ----------------------------------------------------------------------------
+
+def read_archived(table: str, start: Optional[datetime] = None, end: Optional[datetime] = None, **equals) -> Iterator[dict]:
+    """Archived rows of `table` with start <= created_at <= end, oldest day first.
+
+    `equals` filters on column values (e.g. jester_id=5). Values come back as
+    stored in the NDJSON (timestamps as ISO strings).
+    """
+    start, end = as_utc(start), as_utc(end)
+    files = load_manifest()["tables"].get(table, {}).get("files", [])
+    days: dict = {}
+    for entry in files:
+        day = date.fromisoformat(entry["day"])
+        if start is not None and day < start.date():
+            continue
+        if end is not None and day > end.date():
+            continue
+        days.setdefault(day, []).append(entry["path"])
+
+    for day in sorted(days):
+        rows = [
+            row for row in _day_rows(days[day])
+            if (start is None or as_utc(row["created_at"]) >= start)
+            and (end is None or as_utc(row["created_at"]) <= end)
+            and all(row.get(k) == v for k, v in equals.items())
+        ]
+        rows.sort(key=lambda r: (as_utc(r["created_at"]), r["id"]))
+        yield from rows
+
+
+def read_archived_reverts(table: str, after: datetime, through: datetime) -> Iterator[dict]:
+    """Archived rows of `table` with after < reverted_at <= through."""
+    after, through = as_utc(after), as_utc(through)
+    files = load_manifest()["tables"].get(table, {}).get("files", [])
+    days: dict = {}
+    for entry in files:
+        newest = as_utc(entry.get("max_reverted_at"))
+        # a row is reverted after it was created
+        if newest is None or newest <= after or date.fromisoformat(entry["day"]) > through.date():
+            continue
+        days.setdefault(entry["day"], []).append(entry["path"])
+    for day in sorted(days):
+        for row in _day_rows(days[day]):
+            ts = as_utc(row.get("reverted_at"))
+            if ts is not None and after < ts <= through:
+                yield row
+
+
+def _day_rows(paths: List[str]) -> Iterator[dict]:
+    seen = set()
+    for rel in paths:
+        with gzip.open(os.path.join(settings.ARCHIVE_DIR, rel), "rt", encoding="utf-8") as fh:
+            for line in fh:
+                row = json.loads(line)
+                # a batch re-archived after a crash shows up twice within its day
+                if row["id"] in seen:
+                    continue
+                seen.add(row["id"])
+                yield row
+
+
+def read_range(table: str, start: Optional[datetime], end: Optional[datetime], through: Optional[datetime],
+               **equals) -> Iterator[dict]:
+    """The archived part of [start, end] given the archive boundary `through`, oldest day first."""
+    start, end, through = as_utc(start), as_utc(end), as_utc(through)
+    if through is None or (start is not None and start > through):
+        return
+    yield from read_archived(table, start, through if end is None else min(end, through), **equals)
+
+
+def hot_range_filter(column, start: Optional[datetime], end: Optional[datetime], through: Optional[datetime]):
+    """SQL filter for the part of [start, end] still in the database, given the archive boundary `through`."""
+    start, end, through = as_utc(start), as_utc(end), as_utc(through)
+    clauses = [true()]
+    if start is not None:
+        clauses.append(column >= start)
+    if through is not None:
+        clauses.append(column > through)
+    if end is not None:
+        clauses.append(column <= end)
+    return and_(*clauses)
@@ -0,0 +1,159 @@
+"""Structured audit trail for money and credential changes.
+
+`emit()` only appends to an in-memory ring buffer, so requests never wait
+on audit I/O. A background thread drains the buffer every
+AUDIT_FLUSH_INTERVAL seconds (or sooner once AUDIT_BATCH_SIZE events are
+waiting) and writes the batch to AUDIT_SINK:
+
+  file  one gzip member per flush appended to `audit.<pid>.log.gz` in
+        AUDIT_LOG_DIR (JSON lines); rotated to `audit.<pid>.<stamp>.log.gz`
+        past AUDIT_LOG_MAX_BYTES. `gzip.open(...)` reads all members.
+  db    one multi-row INSERT into `audit_events` per batch; a failed insert
+        falls back to the file sink so the batch is not lost.
+  off   events are discarded.
+
+A crash loses at most one flush interval. If the buffer fills up the
+oldest events are dropped and counted in `audit_events_dropped_total`.
+"""
+import gzip
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from app.core import metrics, slow_queries
+from app.core.config import settings
+
+_emitted = metrics.counter("audit_events_total", "Audit events accepted into the buffer")
+_dropped = metrics.counter("audit_events_dropped_total", "Audit events dropped because the buffer was full")
+_written = metrics.counter("audit_events_written_total", "Audit events flushed to the sink")
+_flush_errors = metrics.counter("audit_flush_errors_total", "Audit batches that failed to reach their sink")
+_buffered = metrics.gauge("audit_buffer_depth", "Audit events waiting to be flushed")
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_buffer: deque = deque(maxlen=max(settings.AUDIT_BUFFER_SIZE, 1))
+_wake = threading.Event()
+_stopping = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+_buffered.set_function(lambda: len(_buffer))
+
+
+def emit(action: str, actor_id: Optional[int] = None, target_id: Optional[int] = None, **data) -> None:
+    """Queue an audit event; `data` must be JSON-serializable (amounts, ids)."""
+    if settings.AUDIT_SINK == "off":
+        return
+    # Decimal amounts are recorded as plain numbers in both sinks
+    data = {k: float(v) if isinstance(v, Decimal) else v for k, v in data.items()}
+    event = {
+        "ts": datetime.now(timezone.utc),
+        "action": action,
+        "actor_id": actor_id,
+        "target_id": target_id,
+        "endpoint": slow_queries.current_endpoint(),
+        "data": data or None,
+    }
+    with _lock:
+        if len(_buffer) == _buffer.maxlen:
+            _dropped.inc()
+        _buffer.append(event)
+        full_batch = len(_buffer) >= settings.AUDIT_BATCH_SIZE
+    _emitted.inc(action=action)
+    if full_batch:
+        _wake.set()
+
+
+def _drain(limit: int) -> list:
+    with _lock:
+        n = min(limit, len(_buffer))
+        return [_buffer.popleft() for _ in range(n)]
+
+
+# --- sinks ----------------------------------------------------------------------
+
+def _log_path() -> str:
+    return os.path.join(settings.AUDIT_LOG_DIR, f"audit.{os.getpid()}.log.gz")
+
+
+def _write_file(batch: list) -> None:
+    os.makedirs(settings.AUDIT_LOG_DIR, exist_ok=True)
+    path = _log_path()
+    if os.path.exists(path) and os.path.getsize(path) >= settings.AUDIT_LOG_MAX_BYTES:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        os.replace(path, os.path.join(settings.AUDIT_LOG_DIR, f"audit.{os.getpid()}.{stamp}.log.gz"))
+    payload = "".join(json.dumps(e, default=str, separators=(",", ":")) + "\n" for e in batch)
+    with open(path, "ab") as fh:
+        fh.write(gzip.compress(payload.encode("utf-8")))
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def _write_db(batch: list) -> None:
+    from app import models
+    from app.core import database as core_db
+
+    # executemany lets the dialect batch rows into multi-VALUES inserts
+    with core_db.engine.begin() as conn:
+        conn.execute(models.AuditEvent.__table__.insert(), batch)
+
+
+def flush() -> int:
+    """Write everything currently buffered; returns the number of events written."""
+    written = 0
+    with _flush_lock:
+        while True:
+            batch = _drain(settings.AUDIT_BATCH_SIZE)
+            if not batch:
+                return written
+            try:
+                if settings.AUDIT_SINK == "db":
+                    try:
+                        _write_db(batch)
+                    except Exception as e:
+                        print(f"[WARN] audit db flush failed, writing to file instead: {e}")
+                        _flush_errors.inc(sink="db")
+                        _write_file(batch)
+                elif settings.AUDIT_SINK == "file":
+                    _write_file(batch)
+            except Exception as e:
+                print(f"[WARN] audit flush failed, {len(batch)} events lost: {e}")
+                _flush_errors.inc(sink="file")
+                continue
+            written += len(batch)
+            _written.inc(len(batch))
+
+
+# --- background writer --------------------------------------------------------------
+
+def _run() -> None:
+    while not _stopping.is_set():
+        _wake.wait(settings.AUDIT_FLUSH_INTERVAL)
+        _wake.clear()
+        flush()
+    flush()
+
+
+def start() -> None:
+    """Start the writer thread for this worker (called from the app lifespan)."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stopping.clear()
+    _thread = threading.Thread(target=_run, name="audit-writer", daemon=True)
+    _thread.start()
+
+
+def stop(timeout: float = 10.0) -> None:
+    """Stop the writer after a final flush."""
+    global _thread
+    if _thread is None:
+        flush()
+        return
+    _stopping.set()
+    _wake.set()
+    _thread.join(timeout)
+    _thread = None
@@ -0,0 +1,99 @@
+"""Per-route-group concurrency limits (bulkheads) and load shedding.
+
+Every route is a sync `def`, so all of them share one anyio threadpool per
+worker. A bulkhead caps how many requests of a group may be in flight and
+how many may wait behind them; anything beyond that gets a 503 straight
+from the event loop without taking a threadpool token.
+
+Low-priority groups also shed while the threadpool has fewer than
+THREADPOOL_CRITICAL_RESERVE free tokens, so money-moving writes keep
+headroom when reports or sign-ins pile up.
+
+Usage on a route:
+    @router.get("/dashboard", dependencies=[Depends(bulkhead.REPORTS)])
+"""
+import asyncio
+
+import anyio.to_thread
+from fastapi import HTTPException, status
+
+from app.core import metrics
+from app.core.config import settings
+
+_queue_depth = metrics.gauge("bulkhead_queue_depth", "Requests waiting for a bulkhead slot")
+_in_flight = metrics.gauge("bulkhead_in_flight", "Requests currently holding a bulkhead slot")
+_rejected = metrics.counter("bulkhead_rejected_total", "Requests shed with 503 by a bulkhead")
+_threadpool_busy = metrics.gauge("threadpool_tokens_in_use", "anyio worker threads currently borrowed")
+_threadpool_size = metrics.gauge("threadpool_tokens_total", "Configured anyio threadpool size")
+
+
+def configure_threadpool(size: int) -> None:
+    """Resize the default anyio threadpool; must run inside the event loop."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = size
+    _threadpool_busy.set_function(lambda: limiter.borrowed_tokens)
+    _threadpool_size.set_function(lambda: limiter.total_tokens)
+
+
+def threadpool_saturated() -> bool:
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return limiter.total_tokens - limiter.borrowed_tokens <= settings.THREADPOOL_CRITICAL_RESERVE
+
+
+class Bulkhead:
+    def __init__(self, name: str, limit: int, max_queue: int, low_priority: bool = False):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.low_priority = low_priority
+        self.waiting = 0
+        self.active = 0
+        self._loop = None
+        self._sem = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sem = asyncio.Semaphore(self.limit)
+        return self._sem
+
+    def _reject(self, reason: str):
+        _rejected.inc(bulkhead=self.name, reason=reason)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    async def __call__(self):
+        sem = self._semaphore()
+        if self.low_priority and threadpool_saturated():
+            self._reject("threadpool")
+        if sem.locked() and self.waiting >= self.max_queue:
+            self._reject("queue")
+
+        self.waiting += 1
+        _queue_depth.set(self.waiting, bulkhead=self.name)
+        try:
+            await sem.acquire()
+        finally:
+            self.waiting -= 1
+            _queue_depth.set(self.waiting, bulkhead=self.name)
+
+        self.active += 1
+        _in_flight.set(self.active, bulkhead=self.name)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            _in_flight.set(self.active, bulkhead=self.name)
+            sem.release()
+
+
+# bcrypt-bound paths: sign-in, password change, account creation
+AUTH = Bulkhead("auth", settings.BULKHEAD_AUTH_LIMIT, settings.BULKHEAD_AUTH_QUEUE, low_priority=True)
+# history scans, dashboards and list endpoints
+REPORTS = Bulkhead("reports", settings.BULKHEAD_REPORTS_LIMIT, settings.BULKHEAD_REPORTS_QUEUE, low_priority=True)
+# wallet writes: send-package, revert, credit actions, game end
+MONEY = Bulkhead("money", settings.BULKHEAD_MONEY_LIMIT, settings.BULKHEAD_MONEY_QUEUE)
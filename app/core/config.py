@@ -3,12 +3,126 @@ import os
 
 load_dotenv()
 
+# repository root; default locations of files the app writes live under it
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _env_bool(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
 
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # Optional read replica used by GET endpoints via `get_read_db`
+    READ_DATABASE_URL: str = os.getenv("READ_DATABASE_URL", "")
+    # Seconds a user's reads stay on the primary after they commit a write
+    READ_PIN_SECONDS: float = float(os.getenv("READ_PIN_SECONDS", "5"))
+    # Connection pool, per worker process. Total connections to the server are
+    # roughly gunicorn workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    # DB_POOL_MODE=pgbouncer disables client-side pooling (NullPool) for use
+    # behind PgBouncer/Supavisor in transaction mode.
+    DB_POOL_MODE: str = os.getenv("DB_POOL_MODE", "queue").strip().lower()
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = _env_bool("DB_POOL_PRE_PING", "true")
+    # anyio threadpool shared by all sync routes, per worker
+    THREADPOOL_SIZE: int = int(os.getenv("THREADPOOL_SIZE", "40"))
+    # free threadpool tokens kept for money-moving writes; low-priority
+    # bulkheads start shedding with 503 once fewer than this are free
+    THREADPOOL_CRITICAL_RESERVE: int = int(os.getenv("THREADPOOL_CRITICAL_RESERVE", "8"))
+    BULKHEAD_AUTH_LIMIT: int = int(os.getenv("BULKHEAD_AUTH_LIMIT", "8"))
+    BULKHEAD_AUTH_QUEUE: int = int(os.getenv("BULKHEAD_AUTH_QUEUE", "32"))
+    BULKHEAD_REPORTS_LIMIT: int = int(os.getenv("BULKHEAD_REPORTS_LIMIT", "12"))
+    BULKHEAD_REPORTS_QUEUE: int = int(os.getenv("BULKHEAD_REPORTS_QUEUE", "24"))
+    BULKHEAD_MONEY_LIMIT: int = int(os.getenv("BULKHEAD_MONEY_LIMIT", "24"))
+    BULKHEAD_MONEY_QUEUE: int = int(os.getenv("BULKHEAD_MONEY_QUEUE", "256"))
+    # where owner-requested per-request profiles (X-Profile: 1) are written
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    # directory the audit and slow-query logs default to, whatever the working directory
+    LOG_DIR: str = os.getenv("LOG_DIR", os.path.join(BASE_DIR, "logs"))
+    # slow-query log (see app/core/slow_queries.py); SLOW_QUERY_MS=0 disables it
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+    SLOW_QUERY_LOG_DIR: str = os.getenv("SLOW_QUERY_LOG_DIR", LOG_DIR)
+    SLOW_QUERY_LOG_MAX_BYTES: int = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    SLOW_QUERY_LOG_BACKUPS: int = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+    # fraction of slow SELECTs re-run under EXPLAIN (ANALYZE, BUFFERS) on PostgreSQL
+    SLOW_QUERY_EXPLAIN_SAMPLE: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.05"))
+    # statement_timeout of that re-run
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+    # audit trail (see app/core/audit.py): "file" (gzip log), "db" (audit_events) or "off"
+    AUDIT_SINK: str = os.getenv("AUDIT_SINK", "file").strip().lower()
+    AUDIT_LOG_DIR: str = os.getenv("AUDIT_LOG_DIR", LOG_DIR)
+    AUDIT_LOG_MAX_BYTES: int = int(os.getenv("AUDIT_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+    # events held in memory per worker; the oldest are dropped (and counted) when full
+    AUDIT_BUFFER_SIZE: int = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    # upper bound on what a crash can lose
+    AUDIT_FLUSH_INTERVAL: float = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+    # processes used to bcrypt passwords for bulk imports; 0 means one per CPU
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    USER_IMPORT_MAX_ROWS: int = int(os.getenv("USER_IMPORT_MAX_ROWS", "10000"))
+    # keyset-paginated list endpoints (app/core/pagination.py)
+    PAGE_DEFAULT_LIMIT: int = int(os.getenv("PAGE_DEFAULT_LIMIT", "50"))
+    PAGE_MAX_LIMIT: int = int(os.getenv("PAGE_MAX_LIMIT", "200"))
+    # game_transactions monthly partitioning (PostgreSQL, see app/core/partitions.py)
+    GAME_TX_PARTITION_MONTHS_AHEAD: int = int(os.getenv("GAME_TX_PARTITION_MONTHS_AHEAD", "3"))
+    # months kept attached by scripts/maintain_game_partitions.py; 0 keeps everything
+    GAME_TX_RETENTION_MONTHS: int = int(os.getenv("GAME_TX_RETENTION_MONTHS", "0"))
+    # reads of game_transactions only look this far back, so old partitions are pruned
+    GAME_TX_QUERY_WINDOW_DAYS: int = int(os.getenv("GAME_TX_QUERY_WINDOW_DAYS", "400"))
+    # cold archive of old transactions (see app/core/archive.py)
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "archive")
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+    # timezone of the legacy tx_date/tx_time strings sent by the game client
+    PLAYED_AT_TIMEZONE: str = os.getenv("PLAYED_AT_TIMEZONE", "UTC")
+    # /api/management/analytics: default range and the widest range per bucket size
+    ANALYTICS_DEFAULT_DAYS: int = int(os.getenv("ANALYTICS_DEFAULT_DAYS", "30"))
+    ANALYTICS_MAX_HOURLY_DAYS: int = int(os.getenv("ANALYTICS_MAX_HOURLY_DAYS", "31"))
+    ANALYTICS_MAX_DAYS: int = int(os.getenv("ANALYTICS_MAX_DAYS", "1100"))
+    # Online migrations (app/core/online_migrations.py): how long DDL may wait
+    # for a lock before giving up and retrying, and how backfills are throttled
+    MIGRATION_LOCK_TIMEOUT_MS: int = int(os.getenv("MIGRATION_LOCK_TIMEOUT_MS", "2000"))
+    MIGRATION_LOCK_RETRIES: int = int(os.getenv("MIGRATION_LOCK_RETRIES", "10"))
+    MIGRATION_RETRY_BACKOFF: float = float(os.getenv("MIGRATION_RETRY_BACKOFF", "0.5"))
+    MIGRATION_BATCH_SIZE: int = int(os.getenv("MIGRATION_BATCH_SIZE", "5000"))
+    MIGRATION_BATCH_SLEEP: float = float(os.getenv("MIGRATION_BATCH_SLEEP", "0.05"))
+    # Ledger reconciliation (scripts/reconcile_wallets.py): pool size (-1 =
+    # one per CPU, 0 = in-process), ids per unit and rows per cursor fetch
+    RECONCILE_WORKERS: int = int(os.getenv("RECONCILE_WORKERS", "-1"))
+    RECONCILE_UNIT_ROWS: int = int(os.getenv("RECONCILE_UNIT_ROWS", "1000000"))
+    RECONCILE_FETCH_SIZE: int = int(os.getenv("RECONCILE_FETCH_SIZE", "20000"))
+    # /api/management/users/search: default and largest result count, and how
+    # long the in-process index (non-PostgreSQL) may miss other workers' renames
+    USER_SEARCH_LIMIT: int = int(os.getenv("USER_SEARCH_LIMIT", "10"))
+    USER_SEARCH_MAX_LIMIT: int = int(os.getenv("USER_SEARCH_MAX_LIMIT", "50"))
+    USER_SEARCH_INDEX_TTL: float = float(os.getenv("USER_SEARCH_INDEX_TTL", "60"))
+    # Transactional outbox (app/core/outbox.py): projection task in the app
+    # lifespan, its polling period and batch size, how long a missing event id
+    # may be waited for, and how long applied events are kept
+    OUTBOX_WORKER: bool = _env_bool("OUTBOX_WORKER", "true")
+    OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "0.25"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+    OUTBOX_GAP_TIMEOUT: float = float(os.getenv("OUTBOX_GAP_TIMEOUT", "5"))
+    OUTBOX_RETENTION_HOURS: int = int(os.getenv("OUTBOX_RETENTION_HOURS", "72"))
+    # GET /events push (app/core/push.py): "local" (one worker) or "postgres"
+    # (LISTEN/NOTIFY across workers), messages a slow client may fall behind
+    # by before it is told to resync, and seconds between keepalive comments
+    PUSH_BACKEND: str = os.getenv("PUSH_BACKEND", "local")
+    PUSH_CHANNEL: str = os.getenv("PUSH_CHANNEL", "push_events")
+    PUSH_QUEUE_SIZE: int = int(os.getenv("PUSH_QUEUE_SIZE", "100"))
+    PUSH_KEEPALIVE: float = float(os.getenv("PUSH_KEEPALIVE", "15"))
     SECRET_KEY: str = os.getenv("SECRET_KEY", "")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+    # Run `Base.metadata.create_all` in the app lifespan (local dev only).
+    # Real databases are migrated with Alembic: `alembic upgrade head`.
+    CREATE_SCHEMA_ON_STARTUP: bool = _env_bool("CREATE_SCHEMA_ON_STARTUP")
+    # Optional path to an OpenAPI document prebuilt with scripts/export_openapi.py
+    OPENAPI_SCHEMA_PATH: str = os.getenv("OPENAPI_SCHEMA_PATH", "")
+
 
 settings = Settings()
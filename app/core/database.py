@@ -1,12 +1,103 @@
-from sqlalchemy import create_engine
+import time
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from app.core import metrics, slow_queries
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+_checkout_wait = metrics.histogram("db_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool")
+_exhausted = metrics.counter("db_pool_exhausted_total", "Checkouts that found no idle connection and no overflow left")
+_timeouts = metrics.counter("db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT")
+_checked_out = metrics.gauge("db_pool_checked_out", "Connections currently checked out of the pool")
+_pool_size = metrics.gauge("db_pool_size", "Configured persistent pool size")
+_pool_overflow = metrics.gauge("db_pool_overflow", "Overflow connections currently open")
+
+
+class _InstrumentedPool:
+    """Pool mixin timing checkouts; `metrics_name` labels the series."""
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        exhausted = (
+            isinstance(self, QueuePool)
+            and self.checkedin() == 0
+            and self._max_overflow > -1
+            and self.overflow() >= self._max_overflow
+        )
+        if exhausted:
+            _exhausted.inc(pool=self.metrics_name)
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            _timeouts.inc(pool=self.metrics_name)
+            raise
+        finally:
+            _checkout_wait.observe(time.perf_counter() - t0, pool=self.metrics_name)
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_InstrumentedPool, NullPool):
+    pass
+
+
+def make_engine(url: str, name: str = "primary", **overrides):
+    """Create an engine with pool settings from `Settings` and checkout metrics.
+
+    Each worker holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so the
+    server-side budget is workers * (size + overflow). DB_POOL_MODE=pgbouncer
+    keeps no pool of its own (NullPool) and leaves pooling to PgBouncer in
+    transaction mode.
+    """
+    kwargs = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if settings.DB_POOL_MODE == "pgbouncer":
+        pool_base = InstrumentedNullPool
+    elif ":memory:" not in (url or "") and (url or "") != "sqlite://":
+        pool_base = InstrumentedQueuePool
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    else:
+        pool_base = None
+    if pool_base is not None:
+        # subclass per engine so the label survives pool.recreate() on dispose
+        kwargs["poolclass"] = type(pool_base.__name__, (pool_base,), {"metrics_name": name})
+    kwargs.update(overrides)
+
+    eng = create_engine(url, **kwargs)
+    if isinstance(eng.pool, _InstrumentedPool):
+        _checked_out.set_function(lambda: eng.pool.checkedout(), pool=name)
+        if isinstance(eng.pool, QueuePool):
+            _pool_size.set_function(lambda: eng.pool.size(), pool=name)
+            _pool_overflow.set_function(lambda: max(eng.pool.overflow(), 0), pool=name)
+    return eng
+
+
+engine = make_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Optional read replica. When READ_DATABASE_URL is unset, reads use the primary.
+read_engine = make_engine(settings.READ_DATABASE_URL, name="replica") if settings.READ_DATABASE_URL else None
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine is not None else None
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -14,3 +105,148 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --- read-your-writes pinning ---------------------------------------------
+# After a user commits a write, their reads go to the primary for
+# READ_PIN_SECONDS so replica lag never hides their own changes. The pin
+# travels with the client, not the worker: the write response carries a
+# short-lived signed token (READ_PIN_COOKIE cookie and READ_PIN_HEADER
+# header), and whichever worker serves the next read honours it. Clients
+# that drop cookies can echo the header back instead.
+
+READ_PIN_COOKIE = "read_pin"
+READ_PIN_HEADER = "x-read-pin"
+
+# user ids that committed a write in the current request, filled in by the
+# session hook below (possibly from a threadpool thread: the list is shared)
+_request_writers: ContextVar[Optional[list]] = ContextVar("request_writers", default=None)
+
+
+def issue_read_pin(user_id: int, seconds: Optional[float] = None) -> str:
+    """Signed token pinning `user_id`'s reads to the primary for `seconds`."""
+    ttl = settings.READ_PIN_SECONDS if seconds is None else seconds
+    expires = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+    return jwt.encode({"pin": user_id, "exp": expires}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def read_pin_user(token: Optional[str]) -> Optional[int]:
+    """The user a still valid pin token was issued to, else None."""
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return int(payload["pin"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        return None
+
+
+def is_pinned_to_primary(request: Request, user_id: Optional[int]) -> bool:
+    if user_id is None:
+        return False
+    token = request.headers.get(READ_PIN_HEADER) or request.cookies.get(READ_PIN_COOKIE)
+    return read_pin_user(token) == user_id
+
+
+class ReadPinMiddleware:
+    """Pure ASGI middleware adding a read pin to responses of requests that wrote."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or ReadSessionLocal is None:
+            return await self.app(scope, receive, send)
+        writers: list = []
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and writers:
+                ttl = settings.READ_PIN_SECONDS
+                token = issue_read_pin(writers[-1], ttl)
+                cookie = f"{READ_PIN_COOKIE}={token}; Max-Age={int(ttl) or 1}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (READ_PIN_HEADER.encode(), token.encode()),
+                    (b"set-cookie", cookie.encode()),
+                ]
+            await send(message)
+
+        token = _request_writers.set(writers)
+        try:
+            await self.app(scope, receive, send_with_pin)
+        finally:
+            _request_writers.reset(token)
+
+
+# --- slow-query log -----------------------------------------------------------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_t0", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _log_slow_statement(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_query_t0")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if settings.SLOW_QUERY_MS <= 0 or elapsed * 1000 < settings.SLOW_QUERY_MS or conn.info.get("skip_slow_log"):
+        return
+    try:
+        slow_queries.record(conn.engine, statement, parameters, executemany, elapsed, getattr(cursor, "rowcount", None))
+    except Exception as e:
+        print(f"[WARN] slow-query log failed: {e}")
+
+
+@event.listens_for(Engine, "handle_error")
+def _drop_statement_timer(context):
+    # after_cursor_execute never fires for a failed statement
+    if context.connection is not None and context.connection.info.get("_query_t0"):
+        context.connection.info["_query_t0"].pop()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session):
+    # `user_id` is attached by get_current_user on the request's primary session
+    writers = _request_writers.get()
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None and writers is not None:
+        writers.append(session.info["user_id"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_write_mark(session):
+    session.info.pop("wrote", None)
+
+
+def _request_user_id(request: Request) -> Optional[int]:
+    auth = request.headers.get("authorization") or ""
+    if not auth.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(auth.split(" ", 1)[1].strip(), settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return int(payload.get("user_id"))
+    except (JWTError, TypeError, ValueError):
+        return None
+
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: the replica unless the caller is pinned."""
+    if ReadSessionLocal is None or is_pinned_to_primary(request, _request_user_id(request)):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
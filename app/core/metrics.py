@@ -0,0 +1,151 @@
+"""Minimal in-process metrics registry rendered in Prometheus text format.
+
+Metrics are per worker process; scrape every worker (or sum in the
+collector) when running under gunicorn with several workers.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+_lock = threading.Lock()
+_registry: Dict[str, "_Metric"] = {}
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: dict = {}
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_fmt_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._callbacks: Dict[tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with _lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels) -> None:
+        """Compute the value at scrape time (e.g. connections checked out)."""
+        self._callbacks[_label_key(labels)] = fn
+
+    def value(self, **labels) -> float:
+        key = _label_key(labels)
+        if key in self._callbacks:
+            return self._callbacks[key]()
+        return self._values.get(key, 0)
+
+    def samples(self) -> List[str]:
+        out = super().samples()
+        for key, fn in self._callbacks.items():
+            try:
+                out.append(f"{self.name}{_fmt_labels(key)} {fn()}")
+            except Exception:
+                pass
+        return out
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(_label_key(labels))
+        return state["count"] if state else 0
+
+    def samples(self) -> List[str]:
+        out = []
+        for key, state in self._values.items():
+            for bound, n in zip(self.buckets, state["counts"]):
+                out.append(f"{self.name}_bucket{_fmt_labels(key, [('le', str(bound))])} {n}")
+            out.append(f"{self.name}_bucket{_fmt_labels(key, [('le', '+Inf')])} {state['count']}")
+            out.append(f"{self.name}_sum{_fmt_labels(key)} {state['sum']}")
+            out.append(f"{self.name}_count{_fmt_labels(key)} {state['count']}")
+        return out
+
+
+def _get_or_create(cls, name: str, help_text: str, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help_text, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"metric {name} already registered as {metric.kind}")
+        return metric
+
+
+def counter(name: str, help_text: str) -> Counter:
+    return _get_or_create(Counter, name, help_text)
+
+
+def gauge(name: str, help_text: str) -> Gauge:
+    return _get_or_create(Gauge, name, help_text)
+
+
+def histogram(name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, help_text, buckets=buckets)
+
+
+def render() -> str:
+    lines = []
+    for metric in list(_registry.values()):
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
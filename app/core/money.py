@@ -0,0 +1,89 @@
+"""Money as exact integer minor units.
+
+Amounts are stored as BIGINT counts of the currency's minor unit (cents)
+through the `Money` column type and handled in Python as two-place
+`Decimal`s, so balances never pick up binary rounding and SQL `SUM`s are
+exact integer sums. Request bodies declare amounts as `Amount`, which
+accepts JSON numbers or strings and rounds half-up to the cent; responses
+still carry plain JSON numbers.
+
+    wallet_balance = Column(Money, nullable=False, default=0)
+    amount: Amount
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Annotated, Optional
+
+from pydantic import BeforeValidator, PlainSerializer, WithJsonSchema
+from sqlalchemy.types import BigInteger, TypeDecorator
+
+MINOR_PER_MAJOR = 100
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def to_decimal(value) -> Decimal:
+    """Round an amount (int, float, str or Decimal) half-up to the cent."""
+    if isinstance(value, Decimal):
+        amount = value
+    elif isinstance(value, bool):
+        raise ValueError("not an amount")
+    elif isinstance(value, (int, float, str)):
+        try:
+            # str() of a float is its shortest repr, so 0.1 stays 0.1
+            amount = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f"not an amount: {value!r}")
+    else:
+        raise ValueError(f"not an amount: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"not an amount: {value!r}")
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_minor(value) -> int:
+    return int(to_decimal(value).scaleb(2))
+
+
+def from_minor(value) -> Decimal:
+    # SUM() comes back as NUMERIC on PostgreSQL, hence the round()
+    return Decimal(round(value)).scaleb(-2).quantize(CENT)
+
+
+def as_float(value: Optional[Decimal]) -> float:
+    """JSON-friendly number for responses (0.0 for None)."""
+    return float(value) if value is not None else 0.0
+
+
+def json_default(obj):
+    """`default=` hook for orjson/json so Decimal amounts encode as numbers."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class Money(TypeDecorator):
+    """BIGINT minor units in the database, two-place Decimal in Python."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    @property
+    def python_type(self):
+        return Decimal
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_minor(value)
+
+    def process_literal_param(self, value, dialect):
+        return "NULL" if value is None else str(to_minor(value))
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_minor(value)
+
+
+Amount = Annotated[
+    Decimal,
+    BeforeValidator(to_decimal),
+    PlainSerializer(float, return_type=float, when_used="json"),
+    WithJsonSchema({"type": "number", "multipleOf": 0.01}),
+]
@@ -0,0 +1,236 @@
+"""Online schema-change helpers for Alembic revisions (migrations/versions).
+
+Most ALTER TABLE forms take an ACCESS EXCLUSIVE lock on PostgreSQL. The
+change itself is instant; the outage comes from the ALTER queueing behind a
+long transaction while every later `game/end` write queues behind the ALTER.
+These helpers avoid that:
+
+  - DDL runs with `lock_timeout` = MIGRATION_LOCK_TIMEOUT_MS and is retried
+    with exponential backoff (MIGRATION_LOCK_RETRIES) instead of queueing
+  - indexes are built/dropped CONCURRENTLY
+  - columns are added nullable (or with a constant default), filled by
+    `backfill()` in primary-key-range batches of one short transaction
+    each, then tightened with `set_not_null()` without a full-table lock
+  - backfill progress is kept in `migration_progress`, so a run that is
+    interrupted resumes at the last finished batch
+
+Every helper expects an autocommit connection, so each statement is its own
+transaction. Inside a revision:
+
+    with online.autocommit() as conn:
+        online.add_column(conn, "game_transactions", sa.Column("x", sa.Integer))
+        online.backfill(conn, "fill_x", "game_transactions", {"x": sa.column("y") * 100})
+
+Helpers check before acting (IF NOT EXISTS and friends), so a revision
+that failed half-way can be re-run. On SQLite they fall back to plain DDL.
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateColumn
+
+from app.core.config import settings
+
+PROGRESS_TABLE = "migration_progress"
+# SQLSTATE lock_not_available, raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def is_postgres(conn) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+@contextmanager
+def autocommit():
+    """Alembic connection outside the revision's transaction (needed for CONCURRENTLY)."""
+    from alembic import op
+
+    with op.get_context().autocommit_block():
+        yield op.get_bind()
+
+
+def set_lock_timeout(conn, ms: Optional[int] = None) -> None:
+    if is_postgres(conn):
+        ms = settings.MIGRATION_LOCK_TIMEOUT_MS if ms is None else ms
+        conn.execute(sa.text(f"SET lock_timeout = {int(ms)}"))
+
+
+def is_lock_timeout(error: Exception) -> bool:
+    return getattr(getattr(error, "orig", None), "pgcode", None) == LOCK_NOT_AVAILABLE
+
+
+def execute(conn, statement, retries: Optional[int] = None):
+    """Execute one statement under lock_timeout, retrying when the lock is not granted."""
+    retries = settings.MIGRATION_LOCK_RETRIES if retries is None else retries
+    if isinstance(statement, str):
+        statement = sa.text(statement)
+    set_lock_timeout(conn)
+    for attempt in range(retries + 1):
+        try:
+            return conn.execute(statement)
+        except OperationalError as e:
+            if not is_lock_timeout(e) or attempt == retries:
+                raise
+            wait = settings.MIGRATION_RETRY_BACKOFF * (2 ** attempt)
+            print(f"[WARN] lock timeout ({attempt + 1}/{retries}), retrying in {wait:.1f}s: {statement}")
+            time.sleep(wait)
+
+
+# --- introspection -------------------------------------------------------------------
+
+def column_exists(conn, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(conn).get_columns(table))
+
+
+def index_exists(conn, table: str, name: str) -> bool:
+    return any(ix["name"] == name for ix in sa.inspect(conn).get_indexes(table))
+
+
+def _is_partitioned(conn, table: str) -> bool:
+    from app.core import partitions
+
+    return partitions.is_partitioned(conn, table)
+
+
+# --- DDL -------------------------------------------------------------------------------
+
+def add_column(conn, table: str, column: sa.Column) -> bool:
+    """ADD COLUMN without rewriting the table; returns False if it already exists.
+
+    NOT NULL columns need a constant `server_default` (a metadata-only change
+    on PostgreSQL 11+); otherwise add the column nullable, `backfill()` it
+    and finish with `set_not_null()`.
+    """
+    if not column.nullable and column.server_default is None:
+        raise ValueError(f"{table}.{column.name}: add it nullable, backfill, then set_not_null()")
+    if column_exists(conn, table, column.name):
+        return False
+    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+    execute(conn, f"ALTER TABLE {table} ADD COLUMN {ddl}")
+    return True
+
+
+def create_index(conn, name: str, table: str, columns: Sequence[str], unique: bool = False,
+                 where: Optional[str] = None, using: Optional[str] = None) -> bool:
+    """CREATE INDEX CONCURRENTLY; returns False if a valid index already exists.
+
+    A failed concurrent build leaves an INVALID index behind; it is dropped
+    and rebuilt. Partitioned parents do not support CONCURRENTLY, so the
+    build there takes the plain lock (build per partition first to avoid it).
+    """
+    if is_postgres(conn):
+        valid = conn.execute(
+            sa.text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :n"),
+            {"n": name},
+        ).scalar()
+        if valid:
+            return False
+        if valid is not None:
+            print(f"[WARN] dropping invalid index {name} left by an earlier build")
+            drop_index(conn, name)
+        concurrently = "" if _is_partitioned(conn, table) else "CONCURRENTLY "
+    else:
+        if index_exists(conn, table, name):
+            return False
+        concurrently = ""
+    sql = (
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX {concurrently}IF NOT EXISTS {name} "
+        f"ON {table} {f'USING {using} ' if using else ''}({', '.join(columns)})"
+    )
+    if where:
+        sql += f" WHERE {where}"
+    execute(conn, sql)
+    return True
+
+
+def drop_index(conn, name: str) -> None:
+    concurrently = "CONCURRENTLY " if is_postgres(conn) else ""
+    execute(conn, f"DROP INDEX {concurrently}IF EXISTS {name}")
+
+
+def set_not_null(conn, table: str, column: str) -> None:
+    """SET NOT NULL without holding ACCESS EXCLUSIVE for a full-table scan.
+
+    A NOT VALID check constraint is validated under SHARE UPDATE EXCLUSIVE
+    (writes keep flowing); PostgreSQL 12+ then uses it to skip the scan of
+    SET NOT NULL. SQLite cannot alter nullability; it is left as is.
+    """
+    if not is_postgres(conn):
+        return
+    check = f"{table}_{column}_not_null"
+    execute(conn, f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check}")
+    execute(conn, f"ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({column} IS NOT NULL) NOT VALID")
+    execute(conn, f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}")
+    execute(conn, f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+    execute(conn, f"ALTER TABLE {table} DROP CONSTRAINT {check}")
+
+
+# --- batched backfill ----------------------------------------------------------------------
+
+_progress = sa.Table(
+    PROGRESS_TABLE,
+    sa.MetaData(),
+    sa.Column("name", sa.String, primary_key=True),
+    sa.Column("last_pk", sa.BigInteger, nullable=False),
+    sa.Column("rows", sa.BigInteger, nullable=False),
+    sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+)
+
+
+def _save_progress(conn, name: str, last_pk: int, rows: int) -> None:
+    values = {"last_pk": last_pk, "rows": rows, "updated_at": datetime.now(timezone.utc)}
+    if not conn.execute(_progress.update().where(_progress.c.name == name).values(values)).rowcount:
+        conn.execute(_progress.insert().values(name=name, **values))
+
+
+def backfill(conn, name: str, table: str, values: Dict[str, sa.ColumnElement],
+             where: Optional[sa.ColumnElement] = None, pk: str = "id",
+             batch_size: Optional[int] = None, sleep: Optional[float] = None,
+             max_batches: Optional[int] = None) -> int:
+    """UPDATE `table` SET `values` in ranges of `pk`; returns rows updated by this call.
+
+    `values`/`where` are SQL expressions over `sa.column(...)` of the table,
+    so each batch is one `UPDATE ... WHERE pk > :lo AND pk <= :hi` that only
+    locks the rows in its range. Rows inserted after the backfill starts are
+    past its upper bound: the application must already write the new column.
+    The statement must be idempotent, since a crash between a batch and its
+    progress update repeats that batch. `name` keys the resume point;
+    `max_batches` stops early (the next call resumes).
+    """
+    batch_size = batch_size or settings.MIGRATION_BATCH_SIZE
+    sleep = settings.MIGRATION_BATCH_SLEEP if sleep is None else sleep
+    _progress.create(conn, checkfirst=True)
+    t = sa.table(table, sa.column(pk), *(sa.column(c) for c in values if c != pk))
+    key = t.c[pk]
+    lo_hi = conn.execute(sa.select(sa.func.min(key), sa.func.max(key))).one()
+    if lo_hi[0] is None:
+        return 0
+    saved = conn.execute(sa.select(_progress.c.last_pk, _progress.c.rows).where(_progress.c.name == name)).first()
+    last_pk, total = (saved.last_pk, saved.rows) if saved else (lo_hi[0] - 1, 0)
+    upper = lo_hi[1]
+    updated = batches = 0
+    while last_pk < upper and (max_batches is None or batches < max_batches):
+        hi = min(last_pk + batch_size, upper)
+        stmt = sa.update(t).where(key > last_pk, key <= hi).values(values)
+        if where is not None:
+            stmt = stmt.where(where)
+        count = execute(conn, stmt).rowcount or 0
+        updated += count
+        total += count
+        last_pk = hi
+        batches += 1
+        _save_progress(conn, name, last_pk, total)
+        print(f"{name}: {table}.{pk} through {last_pk}/{upper} ({total} rows)")
+        if sleep:
+            time.sleep(sleep)
+    return updated
+
+
+def reset_progress(conn, name: str) -> None:
+    """Forget the resume point of backfill `name` (to run it again from the start)."""
+    _progress.create(conn, checkfirst=True)
+    conn.execute(_progress.delete().where(_progress.c.name == name))
@@ -0,0 +1,241 @@
+"""Transactional outbox and the projections fed from it.
+
+Money-moving endpoints call `append()` before they commit, so the event row
+in `outbox_events` is written and rolled back together with the wallets and
+transactions it describes. Derived data is then built off the request path.
+A background task started in the app lifespan (`start()`) polls every
+OUTBOX_POLL_INTERVAL seconds, and each projection in PROJECTIONS applies the
+new events in batches of OUTBOX_BATCH_SIZE.
+
+Each projection keeps its position in `projection_checkpoints`, and advances
+it in the same transaction as its own writes, so an event is applied exactly
+once even if the process dies mid-batch. The checkpoint row is locked while
+a batch runs, so several app workers can run the task side by side.
+
+Ids come from a sequence and are handed out before commit, so id 11 can
+become visible while id 10 is still in flight. A consumer therefore stops at
+a missing id and only skips it after OUTBOX_GAP_TIMEOUT seconds: the write
+either committed by then or was rolled back and left a permanent hole.
+
+Topics and payloads (amounts are integer minor units):
+
+  package.sent             transaction_id, sender_id, receiver_id, amount
+  package.reverted         transaction_id, sender_id, receiver_id, refund_to, amount
+  credit_request.approved  request_id, transaction_id, sender_id, receiver_id, amount
+  credit_request.rejected  request_id, user_id, superior_id
+  game.ended               transaction_id, jester_id, bet_amount, total_pot, win_amount
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core import analytics, metrics, money
+from app.core.config import settings
+
+_applied = metrics.counter("outbox_events_applied_total", "Outbox events applied by a projection")
+_errors = metrics.counter("outbox_projection_errors_total", "Projection batches that failed and will be retried")
+_lag = metrics.gauge("outbox_projection_lag", "Outbox events not yet applied by a projection")
+
+# first time each projection saw a gap at a given id: {(projection, id): monotonic}
+_gaps: Dict[tuple, float] = {}
+_task: Optional[asyncio.Task] = None
+
+
+def _tables():
+    from app import models
+
+    return (
+        models.OutboxEvent.__table__,
+        models.ProjectionCheckpoint.__table__,
+        models.UserStats.__table__,
+    )
+
+
+def append(db: Session, topic: str, **payload) -> None:
+    """Add an event to the session's transaction; Decimal values are stored as minor units."""
+    from app import models
+
+    payload = {k: money.to_minor(v) if isinstance(v, Decimal) else v for k, v in payload.items()}
+    db.add(models.OutboxEvent(topic=topic, payload=payload, created_at=datetime.now(timezone.utc)))
+
+
+def _insert(conn):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _checkpoint(conn, name: str) -> int:
+    """Lock the checkpoint row of `name` (creating it at 0) and return its position."""
+    _, cp, _ = _tables()
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        conn.execute(_insert(conn)(cp).values(name=name, last_event_id=0).on_conflict_do_nothing())
+    elif conn.execute(select(cp.c.name).where(cp.c.name == name)).first() is None:
+        conn.execute(cp.insert().values(name=name, last_event_id=0))
+    return conn.execute(select(cp.c.last_event_id).where(cp.c.name == name).with_for_update()).scalar_one()
+
+
+def _contiguous(name: str, last_id: int, events: list) -> list:
+    """The leading events without an unexplained hole before them."""
+    out, expected = [], last_id + 1
+    for event in events:
+        if event.id != expected:
+            first_seen = _gaps.setdefault((name, expected), time.monotonic())
+            if time.monotonic() - first_seen < settings.OUTBOX_GAP_TIMEOUT:
+                break
+            print(f"[WARN] outbox: {name} skipping missing events {expected}..{event.id - 1}")
+            _gaps.pop((name, expected), None)
+        out.append(event)
+        expected = event.id + 1
+    for key in [k for k in _gaps if k[0] == name and k[1] < expected]:
+        # filled in by a late commit
+        del _gaps[key]
+    return out
+
+
+def process(engine, name: str, batch_size: Optional[int] = None) -> int:
+    """Apply the next batch of events to projection `name`; returns events applied."""
+    ob, cp, _ = _tables()
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    with engine.begin() as conn:
+        last_id = _checkpoint(conn, name)
+        events = conn.execute(
+            select(ob.c.id, ob.c.topic, ob.c.payload, ob.c.created_at)
+            .where(ob.c.id > last_id).order_by(ob.c.id).limit(batch_size)
+        ).all()
+        events = _contiguous(name, last_id, events)
+        if events:
+            PROJECTIONS[name](conn, events)
+            conn.execute(
+                update(cp).where(cp.c.name == name)
+                .values(last_event_id=events[-1].id, updated_at=datetime.now(timezone.utc))
+            )
+        head = conn.execute(select(func.max(ob.c.id))).scalar() or 0
+    _lag.set(head - (events[-1].id if events else last_id), projection=name)
+    _applied.inc(len(events), projection=name)
+    return len(events)
+
+
+def process_all(engine) -> int:
+    """One batch for every projection; returns events applied in total."""
+    applied = 0
+    for name in PROJECTIONS:
+        try:
+            applied += process(engine, name)
+        except Exception as e:
+            print(f"[WARN] outbox: projection {name} failed, will retry: {e}")
+            _errors.inc(projection=name)
+    return applied
+
+
+def prune(engine, older_than: timedelta) -> int:
+    """Delete events every projection has applied and that are older than `older_than`."""
+    ob, cp, _ = _tables()
+    cutoff = datetime.now(timezone.utc) - older_than
+    with engine.begin() as conn:
+        positions = [_checkpoint(conn, name) for name in PROJECTIONS]
+        done = min(positions) if positions else 0
+        return conn.execute(delete(ob).where(ob.c.id <= done, ob.c.created_at < cutoff)).rowcount
+
+
+# --- projections ----------------------------------------------------------------------
+
+_STAT_COLUMNS = ("games_played", "payout_total", "packages_received", "received_total", "packages_sent", "sent_total")
+
+
+def _user_stats(conn, events: list) -> None:
+    from app import models
+
+    _, _, us = _tables()
+    deltas: Dict[int, dict] = {}
+
+    def add(user_id, ts, **values):
+        row = deltas.setdefault(user_id, dict.fromkeys(_STAT_COLUMNS, 0) | {"last_event_at": ts})
+        for k, v in values.items():
+            row[k] += v
+        row["last_event_at"] = ts
+
+    for event in events:
+        p, ts = event.payload, event.created_at
+        if event.topic in ("package.sent", "credit_request.approved", "package.reverted"):
+            sign = -1 if event.topic == "package.reverted" else 1
+            amount = sign * money.from_minor(p["amount"])
+            add(p["sender_id"], ts, packages_sent=sign, sent_total=amount)
+            add(p["receiver_id"], ts, packages_received=sign, received_total=amount)
+        elif event.topic == "game.ended":
+            add(p["jester_id"], ts, games_played=1, payout_total=money.from_minor(p["win_amount"]))
+
+    # users deleted since the event have no row to update
+    existing = set(conn.execute(select(models.User.id).where(models.User.id.in_(deltas))).scalars()) if deltas else set()
+    rows = [{"user_id": uid, **deltas[uid]} for uid in sorted(existing)]
+    if not rows:
+        return
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        stmt = _insert(conn)(us)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={
+                **{c: us.c[c] + stmt.excluded[c] for c in _STAT_COLUMNS},
+                # events are applied in id order, so the batch's stamp is the newest
+                "last_event_at": stmt.excluded.last_event_at,
+            },
+        )
+        conn.execute(stmt, rows)
+        return
+    for row in rows:
+        updated = conn.execute(
+            update(us).where(us.c.user_id == row["user_id"])
+            .values({c: us.c[c] + row[c] for c in _STAT_COLUMNS}, last_event_at=row["last_event_at"])
+        ).rowcount
+        if not updated:
+            conn.execute(us.insert().values(row))
+
+
+PROJECTIONS: Dict[str, Callable[[object, List], None]] = {
+    "user_stats": _user_stats,
+    analytics.PROJECTION: analytics.project,
+}
+
+
+# --- background worker ----------------------------------------------------------------
+
+async def _run(engine) -> None:
+    last_prune = time.monotonic()
+    while True:
+        # a thread of its own, so projections never take request threads
+        applied = await asyncio.to_thread(process_all, engine)
+        if time.monotonic() - last_prune >= 3600:
+            last_prune = time.monotonic()
+            try:
+                await asyncio.to_thread(prune, engine, timedelta(hours=settings.OUTBOX_RETENTION_HOURS))
+            except Exception as e:
+                print(f"[WARN] outbox: prune failed: {e}")
+        if applied < settings.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+
+def start(engine) -> None:
+    """Start the projection task on the running event loop (called from the app lifespan)."""
+    global _task
+    if not settings.OUTBOX_WORKER or (_task is not None and not _task.done()):
+        return
+    _task = asyncio.get_running_loop().create_task(_run(engine), name="outbox-projections")
+
+
+async def stop() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
@@ -0,0 +1,116 @@
+"""Keyset (seek) pagination with opaque cursors.
+
+A page is selected with `WHERE (k1, k2, ...) < (:v1, :v2, ...)` on the sort
+key of the last row already returned, so page 1,000 costs the same index
+seek as page 1. The cursor is the base64url-encoded key of that row; it is
+opaque to clients, who just pass `next_cursor` back as `?cursor=`.
+
+    keys = Keyset(gt.created_at, gt.id)          # ORDER BY both DESC
+    page = Page.from_request(request, cursor, limit)
+    rows = db.execute(keys.apply(stmt, page)).all()
+    rows, next_cursor = keys.trim(rows, page)
+    response.headers.update(page.link_headers(next_cursor))
+"""
+import base64
+import binascii
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, Query, Request, status
+from sqlalchemy import literal, tuple_
+
+from app.core.config import settings
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = orjson.dumps([v.isoformat() if isinstance(v, (datetime, date)) else v for v in values])
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """Decode a cursor into values of `types`; 400 if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = orjson.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong arity")
+        out = []
+        for value, typ in zip(values, types):
+            if value is not None and typ in (datetime, date):
+                value = typ.fromisoformat(value)
+            elif value is not None and typ in (int, float, str) and not isinstance(value, typ):
+                value = typ(value)
+            out.append(value)
+        return out
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+class Page:
+    """Validated `cursor`/`limit` of one request, plus the URL to build links from."""
+
+    def __init__(self, cursor: Optional[str], limit: int, url=None):
+        self.cursor = cursor or None
+        self.limit = limit
+        self.url = url
+
+    @classmethod
+    def from_request(cls, request: Request, cursor: Optional[str], limit: Optional[int]) -> "Page":
+        limit = settings.PAGE_DEFAULT_LIMIT if limit is None else limit
+        return cls(cursor, max(1, min(limit, settings.PAGE_MAX_LIMIT)), request.url)
+
+    def next_url(self, next_cursor: str) -> Optional[str]:
+        if self.url is None:
+            return None
+        return str(self.url.include_query_params(cursor=next_cursor, limit=self.limit))
+
+    def link_headers(self, next_cursor: Optional[str]) -> dict:
+        if not next_cursor or self.url is None:
+            return {}
+        return {"Link": f'<{self.next_url(next_cursor)}>; rel="next"'}
+
+
+def page_params(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size, capped at PAGE_MAX_LIMIT"),
+) -> Page:
+    """FastAPI dependency: `page: Page = Depends(page_params)`."""
+    return Page.from_request(request, cursor, limit)
+
+
+class Keyset:
+    """Descending keyset over `columns`; the last one must make the order unique."""
+
+    def __init__(self, *columns):
+        self.columns = columns
+        self.types = [self._python_type(c) for c in columns]
+
+    @staticmethod
+    def _python_type(column) -> type:
+        try:
+            return column.type.python_type
+        except NotImplementedError:
+            return str
+
+    def apply(self, stmt, page: Page):
+        """Order `stmt` by the key, seek past the cursor and fetch one extra row."""
+        if page.cursor:
+            values = decode_cursor(page.cursor, self.types)
+            bound = [literal(v, type_=c.type) for c, v in zip(self.columns, values)]
+            stmt = stmt.where(tuple_(*self.columns) < tuple_(*bound))
+        return stmt.order_by(None).order_by(*(c.desc() for c in self.columns)).limit(page.limit + 1)
+
+    def trim(self, rows: list, page: Page, key=None) -> Tuple[list, Optional[str]]:
+        """Drop the look-ahead row and return `(rows, next_cursor)`.
+
+        `key(row)` returns the cursor values of a row; by default the row's
+        attributes named after the key columns.
+        """
+        if len(rows) <= page.limit:
+            return rows, None
+        rows = rows[: page.limit]
+        last = rows[-1]
+        values = key(last) if key else [getattr(last, c.key) for c in self.columns]
+        return rows, encode_cursor(values)
@@ -0,0 +1,123 @@
+"""Monthly range partitions of `game_transactions` on PostgreSQL.
+
+After `scripts/partition_game_transactions.py` has converted the table, it
+is `PARTITION BY RANGE (created_at)` with one child per month named
+`game_transactions_yYYYYmMM`. The app keeps GAME_TX_PARTITION_MONTHS_AHEAD
+future months created on startup, and `scripts/maintain_game_partitions.py`
+(daily cron) does the same and detaches months older than
+GAME_TX_RETENTION_MONTHS. Detaching is a catalog change, not a DELETE.
+
+The per-jester list reads of game_transactions carry
+`created_at >= game_tx_since(from)` so the planner prunes partitions outside
+the query window, or outside the range asked for when it has a lower bound. The dashboard aggregates are all-time and read
+every attached partition.
+
+All helpers are no-ops on other dialects or while the table is not
+partitioned.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+
+TABLE = "game_transactions"
+# serializes partition DDL between workers starting at the same time
+_ADVISORY_LOCK_KEY = 748_213_001
+
+
+def month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + (month.month - 1) + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def game_tx_window_start(now: Optional[datetime] = None) -> datetime:
+    """Lower `created_at` bound for game_transactions reads."""
+    now = now or datetime.now(timezone.utc)
+    return now - timedelta(days=settings.GAME_TX_QUERY_WINDOW_DAYS)
+
+
+def game_tx_since(played_from: Optional[datetime] = None) -> datetime:
+    """Lower `created_at` bound for a read whose played_at range starts at `played_from`.
+
+    The query window only applies when the caller gave no lower bound; an
+    explicit one is honoured however old it is (a game is recorded after it
+    is played, so it bounds `created_at` too and pruning still works).
+    """
+    return played_from if played_from is not None else game_tx_window_start()
+
+
+def is_partitioned(conn, table: str = TABLE) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :t"),
+        {"t": table},
+    ).scalar())
+
+
+def list_partitions(conn, table: str = TABLE) -> List[str]:
+    return list(conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :t ORDER BY c.relname"
+        ),
+        {"t": table},
+    ).scalars())
+
+
+def create_partition_sql(month: datetime, parent: str = TABLE) -> str:
+    upper = add_months(month, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+    )
+
+
+def ensure_partitions(engine, months_ahead: Optional[int] = None, start: Optional[datetime] = None) -> List[str]:
+    """Create missing monthly partitions from `start` (default: this month) through `months_ahead`."""
+    ahead = settings.GAME_TX_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    first = month_start(start or datetime.now(timezone.utc))
+    last = add_months(month_start(datetime.now(timezone.utc)), ahead)
+    created = []
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return created
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+        existing = set(list_partitions(conn))
+        month = first
+        while month <= last:
+            if partition_name(month) not in existing:
+                conn.execute(text(create_partition_sql(month)))
+                created.append(partition_name(month))
+            month = add_months(month, 1)
+    return created
+
+
+def detach_partitions_before(engine, cutoff: datetime) -> List[str]:
+    """Detach every monthly partition that ends on or before `cutoff`.
+
+    Detached tables keep their rows; archive or DROP them afterwards.
+    """
+    cutoff_month = month_start(cutoff)
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            return []
+        names = [n for n in list_partitions(conn) if n < partition_name(cutoff_month)]
+    detached = []
+    # DETACH ... CONCURRENTLY (PostgreSQL 14+) cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name in names:
+            conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name} CONCURRENTLY"))
+            detached.append(name)
+    return detached
@@ -0,0 +1,192 @@
+"""Owner-only, on-demand profiling of a single request.
+
+Send `X-Profile: 1` (or `?profile=1`) with an OWNER token and the request
+runs under a sampling profiler (pyinstrument, when installed) or cProfile.
+From anyone else the flag is ignored and the request is served as usual.
+The profile is written to PROFILE_DIR and the response carries:
+
+  X-Profile-Id   file id inside PROFILE_DIR
+  Server-Timing  total, python, sql and serialize durations in ms
+
+Requests without the flag only pay a header/query lookup in the middleware
+and a ContextVar lookup in the endpoint wrapper.
+"""
+import cProfile
+import functools
+import inspect
+import os
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from fastapi.responses import Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+try:  # optional sampling profiler
+    from pyinstrument import Profiler as _SamplingProfiler
+except ImportError:  # pragma: no cover - depends on the environment
+    _SamplingProfiler = None
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.sql_seconds = 0.0
+        self.sql_count = 0
+        self.endpoint_done_at: Optional[float] = None
+        self._profiler = None
+
+    def start(self):
+        if _SamplingProfiler is not None:
+            self._profiler = _SamplingProfiler(async_mode="disabled")
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        if self._profiler is None:
+            return
+        if _SamplingProfiler is not None:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def dump(self) -> Optional[str]:
+        if self._profiler is None:
+            return None
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        if _SamplingProfiler is not None:
+            name = f"{self.id}.html"
+            with open(os.path.join(settings.PROFILE_DIR, name), "w", encoding="utf-8") as fh:
+                fh.write(self._profiler.output_html())
+        else:
+            name = f"{self.id}.prof"
+            self._profiler.dump_stats(os.path.join(settings.PROFILE_DIR, name))
+        return name
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _active.get()
+
+
+# --- SQL timing -------------------------------------------------------------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _sql_start(conn, cursor, statement, parameters, context, executemany):
+    if _active.get() is not None:
+        conn.info.setdefault("_profile_t0", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _sql_end(conn, cursor, statement, parameters, context, executemany):
+    prof = _active.get()
+    if prof is not None and conn.info.get("_profile_t0"):
+        prof.sql_seconds += time.perf_counter() - conn.info["_profile_t0"].pop()
+        prof.sql_count += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _sql_error(context):
+    if context.connection is not None and context.connection.info.get("_profile_t0"):
+        context.connection.info["_profile_t0"].pop()
+
+
+# --- endpoint wrapper -------------------------------------------------------
+
+def _wrap_endpoint(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        prof = _active.get()
+        if prof is None:
+            return fn(*args, **kwargs)
+        prof.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            prof.stop()
+            prof.endpoint_done_at = time.perf_counter()
+
+    return wrapper
+
+
+def instrument_routes(app) -> None:
+    """Wrap sync endpoints so a flagged request is profiled in its worker thread."""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not inspect.iscoroutinefunction(route.dependant.call):
+            if not getattr(route.dependant.call, "_profiling_wrapped", False):
+                route.dependant.call = _wrap_endpoint(route.dependant.call)
+                route.dependant.call._profiling_wrapped = True
+
+
+# --- middleware ---------------------------------------------------------------
+
+def _flagged(request) -> bool:
+    flag = request.headers.get("x-profile") or request.query_params.get("profile")
+    return flag is not None and flag.lower() in ("1", "true", "yes")
+
+
+def _is_owner(authorization: Optional[str]) -> bool:
+    # Resolve the caller the same way the routes do and gate through RoleChecker
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from app.core import database as core_db
+    from app.core import security
+
+    scheme, _, token = (authorization or "").partition(" ")
+    creds = HTTPAuthorizationCredentials(scheme=scheme or "Bearer", credentials=token.strip()) if token else None
+    db = core_db.SessionLocal()
+    try:
+        user = security.resolve_user(creds, db)
+        security.RoleChecker(["OWNER"])(current_user=user)
+        return True
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+async def profile_middleware(request, call_next):
+    # the flag is ignored for anyone but an owner; the route does its own auth
+    if not _flagged(request) or not await run_in_threadpool(_is_owner, request.headers.get("authorization")):
+        return await call_next(request)
+
+    prof = RequestProfile()
+    token = _active.set(prof)
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+        t_headers = time.perf_counter()
+        body = b"".join([chunk async for chunk in response.body_iterator])
+    finally:
+        _active.reset(token)
+    t_end = time.perf_counter()
+
+    total = t_end - t0
+    endpoint_done = prof.endpoint_done_at or t_headers
+    serialize = (t_headers - endpoint_done) + (t_end - t_headers)
+    python = max(total - prof.sql_seconds - serialize, 0.0)
+    file_id = await run_in_threadpool(prof.dump)
+
+    timing = (
+        f"total;dur={total * 1000:.1f}, python;dur={python * 1000:.1f}, "
+        f"sql;dur={prof.sql_seconds * 1000:.1f};desc=\"{prof.sql_count} statements\", "
+        f"serialize;dur={serialize * 1000:.1f}"
+    )
+    profiled = Response(content=body, status_code=response.status_code)
+    # raw pairs, so repeated headers such as Set-Cookie survive
+    profiled.raw_headers = [(k, v) for k, v in response.raw_headers if k != b"content-length"] + [
+        *profiled.raw_headers,
+        (b"server-timing", timing.encode("latin-1")),
+        *([(b"x-profile-id", file_id.encode("latin-1"))] if file_id else []),
+    ]
+    return profiled
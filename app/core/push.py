@@ -0,0 +1,221 @@
+"""Push of balance and credit-request changes to connected clients (GET /events).
+
+Write paths call `notify(db, user_id, kind, **data)` before they commit. The
+message is held on the session and only published once the transaction
+commits; a rollback drops it. Each worker keeps an in-process hub of the
+open `/events` streams per user id, and the PUSH_BACKEND setting decides how
+a published message reaches the hubs:
+
+  local     straight into this worker's hub (single worker, tests)
+  postgres  `pg_notify` on the committing connection, so PostgreSQL itself
+            delivers it only on commit; every worker LISTENs on
+            PUSH_CHANNEL from a thread and feeds its own hub
+
+Other transports (Redis, ...) plug in as a `Backend` subclass registered in
+BACKENDS. Delivery is best effort. A stream whose queue overflows gets a
+`resync` event and is closed, and a client that reconnects should reload
+`/users/me` once, since missed messages are not replayed.
+
+Message types:
+
+  balance_changed         balance
+  package_received        transaction_id, sender_id, sender_name, amount
+  credit_request_created  request_id, requester_id, amount
+"""
+import asyncio
+import json
+import select
+import threading
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+
+_published = metrics.counter("push_messages_total", "Push messages published after commit")
+_dropped = metrics.counter("push_streams_overflowed_total", "Push streams closed because the client fell behind")
+_streams = metrics.gauge("push_streams", "Open /events streams in this worker")
+
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    """One open stream: a bounded queue fed from any thread."""
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PUSH_QUEUE_SIZE + 1)
+
+    def _put(self, message: dict) -> None:
+        if self.queue.full():
+            return
+        if self.queue.qsize() == settings.PUSH_QUEUE_SIZE:
+            # the last slot is kept for the resync marker
+            _dropped.inc()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+    def deliver(self, message: dict) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # loop already closed; the stream is going away
+            pass
+
+
+class Hub:
+    """Open streams of this worker by user id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: Dict[int, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        sub = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subs[user_id].add(sub)
+        _streams.inc()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs is not None and sub in subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.user_id]
+                _streams.dec()
+
+    def deliver(self, messages: List[dict]) -> None:
+        for message in messages:
+            with self._lock:
+                subs = list(self._subs.get(message["user_id"], ()))
+            for sub in subs:
+                sub.deliver(message)
+
+
+hub = Hub()
+
+
+# --- backends -------------------------------------------------------------------------
+
+class Backend:
+    """How committed messages reach the hub of every worker."""
+
+    def before_commit(self, session: Session, messages: List[dict]) -> None:
+        pass
+
+    def after_commit(self, messages: List[dict]) -> None:
+        pass
+
+    def start(self, engine) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class LocalBackend(Backend):
+    def after_commit(self, messages: List[dict]) -> None:
+        hub.deliver(messages)
+
+
+class PostgresBackend(Backend):
+    """LISTEN/NOTIFY: notifications are transactional and reach every worker."""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def before_commit(self, session: Session, messages: List[dict]) -> None:
+        session.connection().execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            [{"channel": settings.PUSH_CHANNEL, "payload": json.dumps(m, separators=(",", ":"))} for m in messages],
+        )
+
+    def start(self, engine) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, args=(engine,), name="push-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _listen(self, engine) -> None:
+        while not self._stopping.is_set():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {settings.PUSH_CHANNEL}")
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    batch = []
+                    while conn.notifies:
+                        batch.append(json.loads(conn.notifies.pop(0).payload))
+                    hub.deliver(batch)
+            except Exception as e:
+                print(f"[WARN] push: LISTEN connection lost, reconnecting: {e}")
+                self._stopping.wait(1.0)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.invalidate()
+                    except Exception:
+                        pass
+
+
+BACKENDS = {"local": LocalBackend, "postgres": PostgresBackend}
+backend: Backend = BACKENDS[settings.PUSH_BACKEND]()
+
+
+# --- publishing -----------------------------------------------------------------------
+
+def notify(db: Session, user_id: Optional[int], kind: str, **data) -> None:
+    """Publish a `kind` message to `user_id` once `db`'s transaction commits."""
+    if user_id is None:
+        return
+    data = {k: float(v) if isinstance(v, Decimal) else v for k, v in data.items()}
+    db.info.setdefault("push", []).append({"user_id": user_id, "type": kind, **data})
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    messages = session.info.get("push")
+    if messages:
+        backend.before_commit(session, messages)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    messages = session.info.pop("push", None)
+    if messages:
+        backend.after_commit(messages)
+        _published.inc(len(messages))
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("push", None)
+
+
+def start(engine) -> None:
+    backend.start(engine)
+
+
+def stop() -> None:
+    backend.stop()
@@ -0,0 +1,251 @@
+"""Ledger reconciliation: wallet balances against the transaction history.
+
+Every wallet should hold exactly what its ledger says:
+
+  + package_amount   received (package_transactions.receiver_id)
+  - package_amount   sent (sender_id)
+  - dedacted_amount  per game (game_transactions.jester_id; wins are negative)
+
+A package with status REVERTED nets to zero for the receiver, and its
+amount went back to `refund_to`: the sender, or the OWNER who reverted it
+(NULL, on rows reverted before that column existed, means the sender).
+OWNER wallets are not checked, since owners send without being debited.
+
+`reconcile()` cuts the history into units: RECONCILE_UNIT_ROWS-wide
+primary-key ranges of each table, plus each archived day. A process pool
+folds the units. Each one streams its rows through a server-side cursor,
+RECONCILE_FETCH_SIZE at a time, and returns only {user_id: delta}, so
+memory grows with the number of users, not rows. Units are cut by key
+range rather than by hierarchy subtree because a transfer between two
+subtrees is a single row; the report groups discrepancies by subtree.
+
+On PostgreSQL every worker reads the same exported snapshot, so balances
+and ledger are compared at one instant while traffic continues. Elsewhere
+(SQLite in dev) the result is only exact on a quiet database. Do not run it
+while scripts/archive_transactions.py is moving rows.
+"""
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import BigInteger, create_engine, func, select, text, type_coerce
+from sqlalchemy.pool import NullPool
+
+from app.core import archive, money
+from app.core.config import settings
+
+Unit = Tuple[str, ...]
+
+# per-process state, set by _init_worker
+_engine = None
+_snapshot: Optional[str] = None
+_ignored: frozenset = frozenset()
+_through: Dict[str, Optional[str]] = {}
+
+
+def _tables():
+    from app import models
+
+    return models.GameTransaction.__table__, models.PackageTransaction.__table__
+
+
+def _init_worker(url, snapshot, ignored, through):
+    global _engine, _snapshot, _ignored, _through
+    _engine = create_engine(url, poolclass=NullPool)
+    _snapshot, _ignored, _through = snapshot, frozenset(ignored), through
+
+
+def _add(deltas: Dict[int, int], user_id, amount: int) -> None:
+    if user_id is not None and user_id not in _ignored and amount:
+        deltas[user_id] = deltas.get(user_id, 0) + amount
+
+
+def _fold_package(deltas, sender_id, receiver_id, amount, status, refund_to) -> None:
+    _add(deltas, receiver_id, amount)
+    _add(deltas, sender_id, -amount)
+    if status == "REVERTED":
+        _add(deltas, receiver_id, -amount)
+        _add(deltas, refund_to or sender_id, amount)
+
+
+def _hot_rows(conn, table, lo, hi):
+    gt, pt = _tables()
+    t = gt if table == gt.name else pt
+    # raw minor units: skipping the Money -> Decimal conversion per row
+    if t is gt:
+        cols = (t.c.id, t.c.jester_id, type_coerce(t.c.dedacted_amount, BigInteger))
+    else:
+        cols = (t.c.id, t.c.sender_id, t.c.receiver_id, type_coerce(t.c.package_amount, BigInteger), t.c.status,
+                t.c.refund_to)
+    stmt = select(*cols).where(t.c.id >= lo, t.c.id < hi,
+                               archive.hot_range_filter(t.c.created_at, None, None, _through.get(table)))
+    return conn.execution_options(stream_results=True, yield_per=settings.RECONCILE_FETCH_SIZE).execute(stmt)
+
+
+def fold_unit(unit: Unit) -> Tuple[Dict[int, int], int]:
+    """Fold one unit into {user_id: delta in minor units}; also returns the rows read."""
+    gt, pt = _tables()
+    deltas: Dict[int, int] = {}
+    rows = 0
+    if unit[0] == "archive":
+        _, table, day, through = unit
+        start = archive.as_utc(day)
+        end = start + timedelta(days=1) - timedelta(microseconds=1)
+        for row in archive.read_range(table, start, end, through):
+            rows += 1
+            if table == gt.name:
+                _add(deltas, row.get("jester_id"), -money.to_minor(row.get("dedacted_amount") or 0))
+            else:
+                _fold_package(deltas, row.get("sender_id"), row.get("receiver_id"),
+                              money.to_minor(row.get("package_amount") or 0), row.get("status"), row.get("refund_to"))
+        return deltas, rows
+
+    _, table, lo, hi = unit
+    with _engine.connect() as conn:
+        if _snapshot:
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+            conn.exec_driver_sql(f"SET TRANSACTION SNAPSHOT '{_snapshot}'")
+        for row in _hot_rows(conn, table, lo, hi):
+            rows += 1
+            if table == gt.name:
+                _add(deltas, row[1], -(row[2] or 0))
+            else:
+                _fold_package(deltas, row[1], row[2], row[3] or 0, row[4], row[5])
+    return deltas, rows
+
+
+class Report:
+    """Outcome of one reconciliation run."""
+
+    def __init__(self):
+        self.discrepancies: List[dict] = []
+        self.users_checked = 0
+        self.rows = 0
+        self.units = 0
+        self.seconds = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.discrepancies
+
+
+def _subtree_roots(users: Dict[int, tuple]) -> Dict[int, Optional[int]]:
+    """user id -> top-most non-OWNER ancestor (itself for managers under the owner)."""
+    roots: Dict[int, Optional[int]] = {}
+    for uid in users:
+        chain = []
+        cur = uid
+        while cur is not None and cur not in roots:
+            role, parent = users.get(cur, (None, None))
+            if role is None or role == "OWNER":
+                break
+            chain.append(cur)
+            if parent is None or parent in chain or users.get(parent, ("OWNER",))[0] == "OWNER":
+                roots[cur] = cur
+                chain.pop()
+                break
+            cur = parent
+        root = roots.get(cur)
+        for member in chain:
+            roots[member] = root
+    return roots
+
+
+def _units(conn, manifest, through, unit_rows) -> List[Unit]:
+    units: List[Unit] = []
+    for t in _tables():
+        if through[t.name] is not None:
+            days = sorted({entry["day"] for entry in manifest["tables"].get(t.name, {}).get("files", [])})
+            units += [("archive", t.name, day, through[t.name].isoformat()) for day in days]
+        stmt = select(func.min(t.c.id), func.max(t.c.id))
+        if through[t.name] is not None:
+            stmt = stmt.where(t.c.created_at > through[t.name])
+        lo, hi = conn.execute(stmt).one()
+        if lo is not None:
+            units += [("hot", t.name, start, start + unit_rows) for start in range(lo, hi + 1, unit_rows)]
+    return units
+
+
+def reconcile(engine, workers: Optional[int] = None, unit_rows: Optional[int] = None) -> Report:
+    """Compare every non-OWNER wallet with its ledger; `workers=0` folds in-process."""
+    from app import models
+
+    t0 = time.perf_counter()
+    workers = settings.RECONCILE_WORKERS if workers is None else workers
+    if workers < 0:
+        workers = os.cpu_count() or 1
+    unit_rows = unit_rows or settings.RECONCILE_UNIT_ROWS
+    report = Report()
+    u, w = models.User.__table__, models.Wallet.__table__
+
+    # the archive boundary is read before the snapshot is taken: rows moved
+    # after this are still in the snapshot and are read from the database
+    through = {t.name: archive.archived_through(t.name) for t in _tables()}
+    manifest = archive.load_manifest()
+
+    with engine.connect() as conn:
+        snapshot = None
+        if engine.dialect.name == "postgresql":
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+            snapshot = conn.execute(text("SELECT pg_export_snapshot()")).scalar()
+            if not re.fullmatch(r"[0-9A-F-]+", snapshot or ""):
+                raise RuntimeError(f"unexpected snapshot id {snapshot!r}")
+
+        users = {r.id: (r.role.value, r.superior_id or r.created_by) for r in conn.execute(
+            select(u.c.id, u.c.role, u.c.superior_id, u.c.created_by))}
+        owners = [uid for uid, (role, _) in users.items() if role == "OWNER"]
+        balances = {uid: money.to_minor(b) for uid, b in conn.execute(select(w.c.user_id, w.c.balance))}
+        units = _units(conn, manifest, through, unit_rows)
+        report.units = len(units)
+
+        init = (
+            engine.url.render_as_string(hide_password=False), snapshot, owners,
+            {k: v.isoformat() if v else None for k, v in through.items()},
+        )
+        ledger: Dict[int, int] = {}
+
+        def merge(result):
+            deltas, rows = result
+            report.rows += rows
+            for uid, delta in deltas.items():
+                ledger[uid] = ledger.get(uid, 0) + delta
+
+        if workers == 0:
+            _init_worker(*init)
+            try:
+                for unit in units:
+                    merge(fold_unit(unit))
+            finally:
+                _engine.dispose()
+        else:
+            # spawn, not fork: a forked child would share the parent's pooled connections
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=init) as pool:
+                for result in pool.map(fold_unit, units, chunksize=1):
+                    merge(result)
+        # the exporting transaction has to stay open until every worker has attached
+        conn.rollback()
+
+    roots = _subtree_roots(users)
+    for uid, (role, _) in sorted(users.items()):
+        if role == "OWNER":
+            continue
+        report.users_checked += 1
+        balance, expected = balances.get(uid, 0), ledger.get(uid, 0)
+        if balance != expected:
+            report.discrepancies.append({
+                "user_id": uid,
+                "role": role,
+                "subtree_id": roots.get(uid),
+                "balance": money.from_minor(balance),
+                "expected": money.from_minor(expected),
+                "difference": money.from_minor(balance - expected),
+            })
+    report.discrepancies.sort(key=lambda d: (d["subtree_id"] or 0, d["user_id"]))
+    report.seconds = time.perf_counter() - t0
+    return report
+
@@ -0,0 +1,53 @@
+from typing import Any, Iterable, Iterator, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from starlette.responses import StreamingResponse
+
+# flush the encoded buffer to the client once it grows past this many bytes
+STREAM_CHUNK_BYTES = 64 * 1024
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _encode_stream(items: Iterable[Any], head: bytes, tail: bytes, chunk_bytes: int) -> Iterator[bytes]:
+    buf = bytearray(head)
+    first = True
+    for item in items:
+        if not first:
+            buf += b","
+        buf += orjson.dumps(item, option=_OPTIONS)
+        first = False
+        if len(buf) >= chunk_bytes:
+            yield bytes(buf)
+            buf.clear()
+    buf += tail
+    yield bytes(buf)
+
+
+class StreamingJSONResponse(StreamingResponse):
+    """Stream `{**envelope, key: [item, ...]}` encoding items one at a time.
+
+    `items` is consumed lazily, so list endpoints can pass a generator that
+    serializes rows as they are read instead of building the whole list
+    (and the whole JSON string) up front.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        items: Iterable[Any],
+        key: str = "data",
+        envelope: Optional[dict] = None,
+        chunk_bytes: int = STREAM_CHUNK_BYTES,
+        **kwargs,
+    ):
+        prefix = orjson.dumps(envelope or {}, option=_OPTIONS)[:-1]
+        if envelope:
+            prefix += b","
+        head = prefix + orjson.dumps(key) + b":["
+        super().__init__(_encode_stream(items, head, b"]}", chunk_bytes), **kwargs)
+
+
+__all__ = ["ORJSONResponse", "StreamingJSONResponse", "STREAM_CHUNK_BYTES"]
@@ -1,13 +1,13 @@
 from datetime import timedelta
-from fastapi import Depends, status, HTTPException
-from typing import List, Callable
+from fastapi import Depends, Request, status, HTTPException
+from typing import List, Callable, Optional
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app import schemas, models
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 
 oauth2_scheme = HTTPBearer(auto_error=False)
 SECRET_KEY = settings.SECRET_KEY
@@ -33,14 +33,21 @@ def verify_token(token: str, credentials_exception):
     return token_data
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+# methods that never write: the caller is resolved on the read session
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail=f"Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def resolve_user(credentials: Optional[HTTPAuthorizationCredentials], db: Session) -> models.User:
+    """The user a bearer token belongs to, loaded through `db`; 401 otherwise."""
+    credentials_exception = _credentials_exception()
     if not credentials or not credentials.credentials:
         raise credentials_exception
 
@@ -49,7 +56,34 @@ def get_current_user(
     user = db.query(models.User).filter(models.User.id == token_data.id).first()
     if user is None:
         raise credentials_exception
+    return user
+
+
+def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+):
+    user = None
+    if request.method in SAFE_METHODS:
+        # reads look the caller up where they read (the replica unless pinned),
+        # so a replica-routed request makes no primary round trip
+        try:
+            user = resolve_user(credentials, read_db)
+        except HTTPException:
+            # e.g. an account created moments ago that the replica has not seen yet
+            if not credentials or not credentials.credentials:
+                raise
+        else:
+            # hand the connection back: the endpoint may be using the primary
+            # session, and only the loaded columns of the user are needed
+            read_db.close()
+    if user is None:
+        user = resolve_user(credentials, db)
 
+    # lets the session's commit hook pin this user's reads to the primary
+    db.info["user_id"] = user.id
     return user
 
 
@@ -0,0 +1,273 @@
+"""Slow-query log: JSON lines per worker, rotated by size.
+
+Statements slower than SLOW_QUERY_MS are written with their fingerprint,
+bound-parameter shapes (types only, never values), the endpoint that
+issued them and the row count. On PostgreSQL a sampled subset of slow
+read-only SELECTs is re-run under `EXPLAIN (ANALYZE, BUFFERS)` on a
+background thread and the plan is logged under the same fingerprint. The
+re-run uses a connection of its own (never one from the request pool), in a
+READ ONLY transaction with short statement and lock timeouts; locking reads
+(`FOR UPDATE`, ...) only get a plain `EXPLAIN`, which does not execute them.
+
+Each worker writes `slow_queries.<pid>.log` in SLOW_QUERY_LOG_DIR so
+rotation never races between processes; `summarize()` reads them all.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core import metrics
+from app.core.config import settings
+
+_slow_total = metrics.counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS")
+
+# ASGI scope of the request being served; the route is read lazily because
+# routing fills it in after the middleware has run
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+_logger: Optional[logging.Logger] = None
+_logger_lock = threading.Lock()
+_explain_queue: "queue.Queue" = queue.Queue(maxsize=100)
+_explain_thread: Optional[threading.Thread] = None
+# NullPool engines for the re-runs, by primary engine URL
+_explain_engines: Dict[str, object] = {}
+
+
+class RequestScopeMiddleware:
+    """Pure ASGI middleware remembering the current request for the logs."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+
+def current_endpoint() -> Optional[str]:
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope.get('method')} {getattr(route, 'path', None) or scope.get('path')}"
+
+
+# --- fingerprinting -----------------------------------------------------------
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?|:\w+|\$\d+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+# row-locking clauses: running these for real would block money writes
+_LOCKING = re.compile(r"\bfor\s+(?:no\s+key\s+)?(?:update|share|key\s+share)\b|\bnowait\b|\bskip\s+locked\b", re.I)
+# anything that could write even inside a SELECT
+_WRITES = re.compile(r"\b(?:insert|update|delete|merge|into|nextval|setval|pg_advisory\w*)\b", re.I)
+
+
+def normalize(statement: str) -> str:
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?+)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def explain_mode(statement: str) -> Optional[str]:
+    """How a slow statement may be explained: "analyze", "plain" or None (not at all)."""
+    sql = _STRING.sub("?", statement).lstrip()
+    if sql[:6].lower() != "select":
+        return None
+    if _LOCKING.search(sql):
+        return "plain"
+    if _WRITES.search(sql):
+        return None
+    return "analyze"
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize(statement).encode("utf-8")).hexdigest()[:12]
+
+
+def param_shape(parameters, executemany: bool = False):
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {"batch": len(parameters), "row": param_shape(parameters[0]) if parameters else None}
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(v).__name__ for v in parameters]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+# --- log output -----------------------------------------------------------------
+
+def _get_logger() -> logging.Logger:
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            os.makedirs(settings.SLOW_QUERY_LOG_DIR, exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(settings.SLOW_QUERY_LOG_DIR, f"slow_queries.{os.getpid()}.log"),
+                maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger(f"app.slow_queries.{os.getpid()}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _logger = logger
+        return _logger
+
+
+def reset_logger() -> None:
+    """Close the current log file (tests, or after changing SLOW_QUERY_LOG_DIR)."""
+    global _logger
+    with _logger_lock:
+        if _logger is not None:
+            for handler in list(_logger.handlers):
+                handler.close()
+                _logger.removeHandler(handler)
+        _logger = None
+
+
+def _write(record: dict) -> None:
+    _get_logger().info(json.dumps(record, default=str, separators=(",", ":")))
+
+
+def record(engine, statement, parameters, executemany, duration, rowcount) -> None:
+    fp = fingerprint(statement)
+    _slow_total.inc()
+    _write({
+        "type": "query",
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "fingerprint": fp,
+        "statement": normalize(statement),
+        "duration_ms": round(duration * 1000, 3),
+        "params": param_shape(parameters, executemany),
+        "endpoint": current_endpoint(),
+        "rowcount": rowcount,
+    })
+
+    if engine.dialect.name != "postgresql" or executemany:
+        return
+    mode = explain_mode(statement)
+    if mode is not None and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE:
+        _queue_explain(engine, fp, mode, statement, parameters)
+
+
+# --- sampled EXPLAIN (PostgreSQL) -------------------------------------------------
+
+def _queue_explain(engine, fp, mode, statement, parameters) -> None:
+    global _explain_thread
+    try:
+        _explain_queue.put_nowait((engine, fp, mode, statement, parameters))
+    except queue.Full:
+        return
+    if _explain_thread is None or not _explain_thread.is_alive():
+        _explain_thread = threading.Thread(target=_explain_worker, name="slow-query-explain", daemon=True)
+        _explain_thread.start()
+
+
+def _explain_engine(engine):
+    key = engine.url.render_as_string(hide_password=False)
+    if key not in _explain_engines:
+        # a connection of its own per re-run: the request pool is never drained by EXPLAIN
+        _explain_engines[key] = create_engine(engine.url, poolclass=NullPool)
+    return _explain_engines[key]
+
+
+def _explain_worker() -> None:
+    while True:
+        engine, fp, mode, statement, parameters = _explain_queue.get()
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if mode == "analyze" else "FORMAT JSON"
+        try:
+            with _explain_engine(engine).connect() as conn:
+                conn.info["skip_slow_log"] = True
+                trans = conn.begin()
+                try:
+                    conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}")
+                    # give up at once rather than queue behind a money write's row locks
+                    conn.exec_driver_sql("SET LOCAL lock_timeout = 100")
+                    plan = conn.exec_driver_sql(f"EXPLAIN ({options}) " + statement, parameters).scalar()
+                finally:
+                    # never keep side effects of the re-run
+                    trans.rollback()
+            _write({"type": "explain", "ts": datetime.now(timezone.utc).isoformat(), "fingerprint": fp, "plan": plan})
+        except Exception as e:
+            _write({"type": "explain_error", "fingerprint": fp, "error": str(e)})
+
+
+# --- summary ------------------------------------------------------------------------
+
+def summarize(limit: int = 50) -> list:
+    groups: dict = {}
+    pattern = os.path.join(settings.SLOW_QUERY_LOG_DIR, "slow_queries.*.log*")
+    for path in glob.glob(pattern):
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    g = groups.setdefault(rec.get("fingerprint"), {
+                        "fingerprint": rec.get("fingerprint"),
+                        "statement": None,
+                        "count": 0,
+                        "total_ms": 0.0,
+                        "max_ms": 0.0,
+                        "endpoints": set(),
+                        "max_rowcount": None,
+                        "last_seen": None,
+                        "plan": None,
+                    })
+                    if rec.get("type") == "explain":
+                        g["plan"] = rec.get("plan")
+                        continue
+                    if rec.get("type") != "query":
+                        continue
+                    g["statement"] = rec.get("statement")
+                    g["count"] += 1
+                    g["total_ms"] += rec.get("duration_ms") or 0.0
+                    g["max_ms"] = max(g["max_ms"], rec.get("duration_ms") or 0.0)
+                    if rec.get("endpoint"):
+                        g["endpoints"].add(rec["endpoint"])
+                    if isinstance(rec.get("rowcount"), int) and rec["rowcount"] >= 0:
+                        g["max_rowcount"] = max(g["max_rowcount"] or 0, rec["rowcount"])
+                    if not g["last_seen"] or (rec.get("ts") or "") > g["last_seen"]:
+                        g["last_seen"] = rec.get("ts")
+        except OSError:
+            continue
+
+    out = []
+    for g in groups.values():
+        if not g["count"]:
+            continue
+        g["avg_ms"] = round(g["total_ms"] / g["count"], 3)
+        g["total_ms"] = round(g["total_ms"], 3)
+        g["endpoints"] = sorted(g["endpoints"])
+        out.append(g)
+    out.sort(key=lambda g: g["total_ms"], reverse=True)
+    return out[:limit]
+
@@ -0,0 +1,142 @@
+"""Daily wallet snapshots and balances as of any past moment.
+
+`take()` copies every wallet into `wallet_snapshots` with one
+`INSERT ... SELECT`, labelled with the UTC day that just closed
+(scripts/snapshot_wallets.py, run from cron shortly after midnight).
+
+`balance_as_of()` starts from whichever known balance is closest in time to
+`as_of`: the last snapshot before it, the first snapshot after it, or the
+live wallet. It then adds or subtracts the ledger between that point and
+`as_of`. Each snapshot lookup is one descent of the (user_id, day) key, and
+the ledger part is a range scan of the user's rows over at most about a
+day on the (user, created_at) and (user, reverted_at) indexes, so the cost
+does not grow with history. Archived rows in that range are read from the
+archive.
+
+The ledger follows app.core.reconcile, with each event at its own time: a
+package moves its amount at `created_at`, and a revert takes it back from
+the receiver and pays `refund_to` at `reverted_at`.
+"""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Date, TIMESTAMP, and_, delete, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.core import archive, money, wallets
+
+
+def _tables():
+    from app import models
+
+    return (
+        models.WalletSnapshot.__table__,
+        models.Wallet.__table__,
+        models.GameTransaction.__table__,
+        models.PackageTransaction.__table__,
+    )
+
+
+def take(engine, day: Optional[date] = None, taken_at: Optional[datetime] = None) -> int:
+    """Snapshot every wallet as the close of `day` (default: yesterday, UTC); returns rows written.
+
+    Re-running for the same day replaces that day's snapshot.
+    """
+    s, w, _, _ = _tables()
+    taken_at = taken_at or datetime.now(timezone.utc)
+    day = day or (taken_at - timedelta(days=1)).date()
+    with engine.begin() as conn:
+        conn.execute(delete(s).where(s.c.day == day))
+        result = conn.execute(insert(s).from_select(
+            ["user_id", "day", "balance", "taken_at"],
+            select(w.c.user_id, literal(day, Date), w.c.balance, literal(taken_at, TIMESTAMP(timezone=True))),
+        ))
+    return result.rowcount
+
+
+def ledger_delta(db: Session, user_id: int, after: datetime, through: datetime) -> Decimal:
+    """Net wallet change of `user_id` from ledger events in (after, through]."""
+    _, _, gt, pt = _tables()
+    total = money.ZERO
+    for t in (gt, pt):
+        boundary = archive.archived_through(t.name)
+        hot = [archive.hot_range_filter(t.c.created_at, None, None, boundary)]
+        if boundary is not None:
+            total += _archived_delta(t.name, user_id, after, through, boundary)
+        window = [t.c.created_at > after, t.c.created_at <= through, *hot]
+        if t is gt:
+            games = db.execute(
+                select(func.coalesce(func.sum(gt.c.dedacted_amount), 0)).where(gt.c.jester_id == user_id, *window)
+            ).scalar()
+            total -= games or money.ZERO
+            continue
+
+        def amount(*where):
+            return db.execute(select(func.coalesce(func.sum(pt.c.package_amount), 0)).where(*where)).scalar() or money.ZERO
+
+        # reverted before reverted_at was recorded: nets to zero at created_at
+        counted = or_(func.coalesce(pt.c.status, "") != "REVERTED", pt.c.reverted_at.is_not(None))
+        total += amount(pt.c.receiver_id == user_id, counted, *window)
+        total -= amount(pt.c.sender_id == user_id, counted, *window)
+        reverted = [pt.c.status == "REVERTED", pt.c.reverted_at > after, pt.c.reverted_at <= through, *hot]
+        total -= amount(pt.c.receiver_id == user_id, *reverted)
+        total += amount(
+            or_(pt.c.refund_to == user_id, and_(pt.c.refund_to.is_(None), pt.c.sender_id == user_id)), *reverted
+        )
+    return money.to_decimal(total)
+
+
+def _archived_delta(table: str, user_id: int, after: datetime, through: datetime, boundary: datetime) -> Decimal:
+    total = money.ZERO
+    if table == "game_transactions":
+        for row in archive.read_range(table, after, through, boundary, jester_id=user_id):
+            if archive.as_utc(row["created_at"]) > after:
+                total -= money.to_decimal(row.get("dedacted_amount") or 0)
+        return total
+    for side, sign in (("receiver_id", 1), ("sender_id", -1)):
+        for row in archive.read_range(table, after, through, boundary, **{side: user_id}):
+            legacy_revert = row.get("status") == "REVERTED" and row.get("reverted_at") is None
+            if archive.as_utc(row["created_at"]) > after and not legacy_revert:
+                total += sign * money.to_decimal(row.get("package_amount") or 0)
+    # an archived package may have been reverted after the boundary
+    for row in archive.read_archived_reverts(table, after, through):
+        amount = money.to_decimal(row.get("package_amount") or 0)
+        if row.get("receiver_id") == user_id:
+            total -= amount
+        if (row.get("refund_to") or row.get("sender_id")) == user_id:
+            total += amount
+    return total
+
+
+def balance_as_of(db: Session, user_id: int, as_of: datetime) -> dict:
+    """Balance of `user_id` at `as_of` plus where it was computed from."""
+    s, _, _, _ = _tables()
+    as_of = archive.as_utc(as_of)
+    cols = (s.c.day, s.c.balance, s.c.taken_at)
+    before = db.execute(
+        select(*cols).where(s.c.user_id == user_id, s.c.day <= as_of.date(), s.c.taken_at <= as_of)
+        .order_by(s.c.day.desc()).limit(1)
+    ).first()
+    later = db.execute(
+        select(*cols).where(s.c.user_id == user_id, s.c.day >= as_of.date() - timedelta(days=1), s.c.taken_at > as_of)
+        .order_by(s.c.day).limit(1)
+    ).first()
+    if later is not None:
+        later = {"source": "snapshot", "day": later.day, "balance": later.balance, "taken_at": archive.as_utc(later.taken_at)}
+    else:
+        now = datetime.now(timezone.utc)
+        later = {"source": "live", "day": None, "balance": wallets.balance(db, user_id), "taken_at": now}
+
+    if before is not None and as_of - archive.as_utc(before.taken_at) <= later["taken_at"] - as_of:
+        start = {"source": "snapshot", "day": before.day, "balance": before.balance, "taken_at": archive.as_utc(before.taken_at)}
+        balance = start["balance"] + ledger_delta(db, user_id, start["taken_at"], as_of)
+    else:
+        start = later
+        balance = start["balance"] - ledger_delta(db, user_id, as_of, start["taken_at"])
+    return {
+        "balance": balance,
+        "source": start["source"],
+        "snapshot_day": start["day"].isoformat() if start["day"] else None,
+        "from_time": start["taken_at"].isoformat(),
+    }
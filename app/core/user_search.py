@@ -0,0 +1,221 @@
+"""Typeahead search over users by phone and name prefix.
+
+Matches are ranked:
+
+  0  the phone or the full name equals the query
+  1  the phone starts with it
+  2  the full name ("first last") starts with it
+  3  another word of the name starts with it (e.g. the last name)
+
+Within a rank, results are ordered by phone (rank 1) or by name, and the
+list is capped at `limit`.
+
+On PostgreSQL the query is plain SQL. It is served by a `text_pattern_ops`
+btree on `phone` and a pg_trgm GIN index on the lower-cased full name; both
+are listed in PG_INDEXES. Other databases have no such indexes, so a
+search over every user goes to an in-process `PrefixIndex`: sorted keys
+that are bisected to find the matching range. A search limited to one
+manager's direct reports is a small set behind the `superior_id` index and
+always runs as SQL.
+
+The in-process index is rebuilt lazily:
+  - after a session in this process flushes a User, and after `invalidate()`
+    (needed for Core inserts and bulk updates);
+  - when `max(id)` of users changes, which covers users created by other workers;
+  - after USER_SEARCH_INDEX_TTL seconds, which covers renames and deletes by
+    other workers.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, event, func, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+NAME_SQL = "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))"
+
+# created by migration 0006 and by create_all (models_old), PostgreSQL only
+PG_INDEXES = {
+    "ix_users_search_phone": "CREATE INDEX IF NOT EXISTS ix_users_search_phone ON users (phone text_pattern_ops)",
+    "ix_users_search_name": f"CREATE INDEX IF NOT EXISTS ix_users_search_name ON users USING gin (({NAME_SQL}) gin_trgm_ops)",
+}
+
+_PHONE_NOISE = re.compile(r"[\s\-()]")
+
+
+def _user():
+    from app import models
+
+    return models.User
+
+
+def normalize(q: str) -> Tuple[str, str]:
+    """(name query, phone query) for raw input."""
+    name = " ".join(q.lower().split())
+    return name, _PHONE_NOISE.sub("", name)
+
+
+def _full_name(first: Optional[str], last: Optional[str]) -> str:
+    return f"{first or ''} {last or ''}".lower()
+
+
+def _row(r) -> dict:
+    return {
+        "id": r.id,
+        "name": f"{r.first_name or ''} {r.last_name or ''}".strip(),
+        "phone": r.phone,
+        "role": r.role.value.title(),
+        "superior_id": r.superior_id,
+    }
+
+
+def _escape(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_sql(db: Session, q: str, limit: int, superior_id: Optional[int] = None) -> List[dict]:
+    """Ranked search in SQL; uses the PG_INDEXES on PostgreSQL."""
+    u = _user()
+    name_q, phone_q = normalize(q)
+    name = literal_column(NAME_SQL)
+    phone_prefix = u.phone.like(_escape(phone_q) + "%", escape="\\")
+    name_prefix = name.like(_escape(name_q) + "%", escape="\\")
+    word_prefix = name.like("% " + _escape(name_q) + "%", escape="\\")
+    rank = case(
+        (or_(u.phone == phone_q, func.trim(name) == name_q), 0),
+        (phone_prefix, 1),
+        (name_prefix, 2),
+        else_=3,
+    )
+    stmt = (
+        select(u.id, u.first_name, u.last_name, u.phone, u.role, u.superior_id)
+        .where(or_(phone_prefix, name_prefix, word_prefix) if phone_q else or_(name_prefix, word_prefix))
+        .order_by(rank, case((rank == 1, u.phone), else_=name), u.id)
+        .limit(limit)
+    )
+    if superior_id is not None:
+        stmt = stmt.where(u.superior_id == superior_id)
+    return [_row(r) for r in db.execute(stmt)]
+
+
+class PrefixIndex:
+    """Sorted (key, user id) arrays for phones, full names and name words."""
+
+    def __init__(self, rows):
+        self.rows: Dict[int, dict] = {}
+        phones, names, words = [], [], []
+        for r in rows:
+            self.rows[r.id] = _row(r)
+            phones.append((r.phone or "", r.id))
+            full = _full_name(r.first_name, r.last_name)
+            names.append((full.strip(), r.id))
+            # every later word start, so "kebede" and "kebede a" both match "abebe kebede a"
+            for i, ch in enumerate(full):
+                if ch == " " and full[i + 1:].strip():
+                    words.append((full[i + 1:].strip(), r.id))
+        self._phones = self._split(phones)
+        self._names = self._split(names)
+        self._words = self._split(words)
+
+    @staticmethod
+    def _split(pairs):
+        pairs.sort()
+        return [k for k, _ in pairs], [i for _, i in pairs]
+
+    @staticmethod
+    def _range(arrays, q: str):
+        keys, ids = arrays
+        i = bisect_left(keys, q)
+        while i < len(keys) and keys[i].startswith(q):
+            yield keys[i], ids[i]
+            i += 1
+
+    def search(self, q: str, limit: int) -> List[dict]:
+        name_q, phone_q = normalize(q)
+        if not name_q:
+            return []
+        found: List[int] = []
+        seen = set()
+
+        def take(matches, exact=False, query=""):
+            for key, uid in matches:
+                if exact and key != query:
+                    break
+                if uid not in seen:
+                    seen.add(uid)
+                    found.append(uid)
+                    if len(found) >= limit:
+                        return True
+            return False
+
+        steps = [
+            (self._names, name_q, True),
+            (self._phones, phone_q, False),
+            (self._names, name_q, False),
+            (self._words, name_q, False),
+        ]
+        if phone_q:
+            steps.insert(0, (self._phones, phone_q, True))
+        else:
+            steps.remove((self._phones, phone_q, False))
+        for arrays, query, exact in steps:
+            if take(self._range(arrays, query), exact, query):
+                break
+        return [self.rows[uid] for uid in found]
+
+
+_lock = threading.Lock()
+_index: Optional[PrefixIndex] = None
+_signature = None
+_built_at = 0.0
+_stale = True
+
+
+def invalidate() -> None:
+    """Rebuild the in-process index on the next search."""
+    global _stale
+    _stale = True
+
+
+@event.listens_for(Session, "after_flush")
+def _users_flushed(session, flush_context):
+    User = _user()
+    if any(isinstance(o, User) for o in (*session.new, *session.dirty, *session.deleted)):
+        invalidate()
+
+
+def _fresh(signature) -> bool:
+    return (
+        _index is not None and not _stale and signature == _signature
+        and time.monotonic() - _built_at < settings.USER_SEARCH_INDEX_TTL
+    )
+
+
+def _current(db: Session) -> PrefixIndex:
+    global _index, _signature, _built_at, _stale
+    u = _user()
+    # one descent of the primary key; a count(*) would scan the table
+    signature = db.execute(select(func.max(u.id))).scalar()
+    if _fresh(signature):
+        return _index
+    with _lock:
+        if not _fresh(signature):
+            _stale = False
+            rows = db.execute(select(u.id, u.first_name, u.last_name, u.phone, u.role, u.superior_id))
+            _index = PrefixIndex(rows)
+            _signature = signature
+            _built_at = time.monotonic()
+        return _index
+
+
+def search(db: Session, q: str, limit: int, superior_id: Optional[int] = None) -> List[dict]:
+    """Ranked typeahead matches for `q`, optionally only direct reports of `superior_id`."""
+    if not normalize(q)[0]:
+        return []
+    if superior_id is not None or db.get_bind().dialect.name == "postgresql":
+        return search_sql(db, q, limit, superior_id)
+    return _current(db).search(q, limit)
@@ -0,0 +1,113 @@
+"""Wallet balances, kept in the narrow `wallets` table.
+
+`users` is a wide row with an index on most columns; when the balance lived
+there every balance change wrote a new version of the whole tuple plus an
+entry in every one of those indexes. `wallets(user_id, balance, version)`
+has no secondary index and a lowered fillfactor, so on PostgreSQL a balance
+change is a HOT update: a new tuple on the same page and no index writes.
+
+Balances change through single statements (`SET balance = balance + :delta`)
+instead of read-modify-write on a loaded row, so concurrent transfers cannot
+lose an update, and a debit only applies when the balance covers it.
+`version` is bumped on every change.
+
+A user without a wallet row (created by Core inserts or by the previous
+release) has a balance of 0; `credit()` creates the row.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core import money
+
+
+def _wallets():
+    from app import models
+
+    return models.Wallet.__table__
+
+
+def balance(db: Session, user_id: int) -> Decimal:
+    w = _wallets()
+    value = db.execute(select(w.c.balance).where(w.c.user_id == user_id)).scalar()
+    return money.ZERO if value is None else value
+
+
+def balances(db: Session, user_ids: Iterable[int]) -> Dict[int, Decimal]:
+    """Balances of `user_ids` in one query (users without a wallet get 0)."""
+    ids = list(user_ids)
+    w = _wallets()
+    found = dict(db.execute(select(w.c.user_id, w.c.balance).where(w.c.user_id.in_(ids))).all()) if ids else {}
+    return {uid: found.get(uid, money.ZERO) for uid in ids}
+
+
+def create(db: Session, user_ids: Iterable[int], amount=0) -> None:
+    """Open wallets for newly created users."""
+    rows = [{"user_id": uid, "balance": amount, "version": 1} for uid in user_ids]
+    if rows:
+        db.execute(_wallets().insert(), rows)
+
+
+def credit(db: Session, user_id: int, amount) -> Decimal:
+    """Add `amount` to the balance (creating the wallet if needed); returns the new balance."""
+    w = _wallets()
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(w).values(user_id=user_id, balance=amount, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={"balance": w.c.balance + stmt.excluded.balance, "version": w.c.version + 1},
+        ).returning(w.c.balance)
+        return db.execute(stmt).scalar_one()
+    new = db.execute(
+        update(w).where(w.c.user_id == user_id)
+        .values(balance=w.c.balance + amount, version=w.c.version + 1)
+        .returning(w.c.balance)
+    ).scalar()
+    if new is None:
+        db.execute(w.insert().values(user_id=user_id, balance=amount, version=1))
+        new = money.to_decimal(amount)
+    return new
+
+
+def credit_many(db: Session, amounts: Dict[int, object]) -> Dict[int, Decimal]:
+    """`credit()` for several users in one statement; returns the new balances."""
+    if not amounts:
+        return {}
+    w = _wallets()
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        return {uid: credit(db, uid, amount) for uid, amount in amounts.items()}
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    # sorted, so concurrent batches lock shared wallets in the same order
+    stmt = insert(w).values([
+        {"user_id": uid, "balance": amounts[uid], "version": 1} for uid in sorted(amounts)
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"balance": w.c.balance + stmt.excluded.balance, "version": w.c.version + 1},
+    ).returning(w.c.user_id, w.c.balance)
+    return dict(db.execute(stmt).all())
+
+
+def debit(db: Session, user_id: int, amount) -> Optional[Decimal]:
+    """Subtract `amount` if the balance covers it; returns the new balance, or None (unchanged)."""
+    w = _wallets()
+    new = db.execute(
+        update(w).where(w.c.user_id == user_id, w.c.balance >= amount)
+        .values(balance=w.c.balance - amount, version=w.c.version + 1)
+        .returning(w.c.balance)
+    ).scalar()
+    if new is None and amount <= 0:
+        # no wallet yet; nothing to take
+        return credit(db, user_id, -amount)
+    return new
@@ -1,3 +1,3 @@
-from app.core.database import engine, SessionLocal, Base, get_db
+from app.core.database import engine, SessionLocal, Base, get_db, get_read_db
 
-__all__ = ["engine", "SessionLocal", "Base", "get_db"]
+__all__ = ["engine", "SessionLocal", "Base", "get_db", "get_read_db"]
@@ -1,6 +1,10 @@
 import secrets
 import string
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
 from app import models
+from app.core.config import settings
 
 CHARSET = string.digits + string.ascii_lowercase
 
@@ -16,3 +20,47 @@ def generate_unique_code(db):
         new = db.query(models.BingoCard).filter(models.BingoCard.id == code).first()
         if not new:
             return code
+
+
+# Formats the frontend has sent in GameTransaction.tx_date / tx_time
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y")
+_TIME_FORMATS = ("%H:%M:%S", "%H:%M", "%I:%M:%S %p", "%I:%M %p", "%I:%M%p", "%H:%M:%S.%f")
+
+
+def _parse_first(value, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_played_at(tx_date, tx_time, tz_name=None):
+    """Build an aware UTC datetime from the legacy date/time strings, or None.
+
+    Strings without an offset are read in PLAYED_AT_TIMEZONE. A full ISO
+    timestamp in `tx_date` is accepted as is.
+    """
+    tx_date = (tx_date or "").strip()
+    tx_time = (tx_time or "").strip()
+    if not tx_date:
+        return None
+    tz = ZoneInfo(tz_name or settings.PLAYED_AT_TIMEZONE)
+
+    if "T" in tx_date or " " in tx_date:
+        try:
+            stamp = datetime.fromisoformat(tx_date.replace("Z", "+00:00"))
+            return (stamp if stamp.tzinfo else stamp.replace(tzinfo=tz)).astimezone(timezone.utc)
+        except ValueError:
+            pass
+
+    day = _parse_first(tx_date, _DATE_FORMATS)
+    if day is None:
+        return None
+    clock = _parse_first(tx_time.upper(), _TIME_FORMATS) if tx_time else None
+    if tx_time and clock is None:
+        return None
+    if clock is not None:
+        day = day.replace(hour=clock.hour, minute=clock.minute, second=clock.second, microsecond=clock.microsecond)
+    return day.replace(tzinfo=tz).astimezone(timezone.utc)
@@ -1,53 +1,49 @@
+import json
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
-
-from app.database import Base, engine
-from app.api import auth, management
-
-
-app = FastAPI()
-
-
-@app.middleware("http")
-async def _log_auth_header(request, call_next):
-    # Debug helper: print Authorization header so we can see what Swagger sends
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core import database as core_db
+from app.core import audit, bulkhead, metrics, outbox, partitions, profiling, push, slow_queries
+from app import utils
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
+from app.api import auth, management, transactions, game_end
+from app.router import debug, events, game, users
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    bulkhead.configure_threadpool(settings.THREADPOOL_SIZE)
+    # Schema creation is opt-in; production schema is managed by Alembic (migrations/)
+    if settings.CREATE_SCHEMA_ON_STARTUP:
+        core_db.Base.metadata.create_all(bind=core_db.engine)
+    if core_db.engine.dialect.name == "postgresql":
+        # keep future game_transactions partitions in place (no-op if not partitioned)
+        try:
+            await run_in_threadpool(partitions.ensure_partitions, core_db.engine)
+        except Exception as e:
+            print(f"[WARN] Could not create game_transactions partitions: {e}")
+    audit.start()
+    # derived data (user_stats, ...) follows the outbox off the request path
+    outbox.start(core_db.engine)
+    push.start(core_db.engine)
     try:
-        auth = request.headers.get("authorization")
-        print(f"[DEBUG] Authorization header: {auth}")
-    except Exception:
-        pass
-    response = await call_next(request)
-    return response
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
+        yield
+    finally:
+        push.stop()
+        await outbox.stop()
+        # drain buffered audit events before the worker exits
+        audit.stop()
+        utils.shutdown_hash_pool()
 
-# create tables (safe no-op if already created)
-Base.metadata.create_all(bind=engine)
 
-# Include grouped API routers
-app.include_router(auth.router)
-app.include_router(management.router)
-app.include_router(__import__('app.api.transactions', fromlist=['']).router)
-app.include_router(__import__('app.api.game_end', fromlist=['']).router)
-app.include_router(__import__('app.router.game', fromlist=['']).router)
-app.include_router(__import__('app.router.users', fromlist=['']).router)
-
-
-@app.get("/")
-def root():
-    return {"message": "LikeBingo API"}
-
-
-def custom_openapi():    
-    app.openapi_schema = None  # force regeneration each time for dev
+def build_openapi(app: FastAPI) -> dict:
     openapi_schema = get_openapi(
         title=app.title,
         version="0.1.0",
@@ -63,9 +59,78 @@ def custom_openapi():
     }
     # Optionally require BearerAuth globally in the docs (this only affects docs UI, not runtime)
     openapi_schema.setdefault("security", [{"BearerAuth": []}])
+    return openapi_schema
 
-    app.openapi_schema = openapi_schema
-    return app.openapi_schema
 
-
-app.openapi = custom_openapi
+def _load_prebuilt_openapi(path: str):
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Ignoring prebuilt OpenAPI schema at {path}: {e}")
+        return None
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+    @app.middleware("http")
+    async def _log_auth_header(request, call_next):
+        # Debug helper: print Authorization header so we can see what Swagger sends
+        try:
+            auth = request.headers.get("authorization")
+            print(f"[DEBUG] Authorization header: {auth}")
+        except Exception:
+            pass
+        response = await call_next(request)
+        return response
+
+    app.middleware("http")(profiling.profile_middleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Read-Pin"],
+    )
+    # hands writers a read-your-writes pin for whichever worker serves their next read
+    app.add_middleware(core_db.ReadPinMiddleware)
+    # outermost: lets the slow-query log attribute statements to endpoints
+    app.add_middleware(slow_queries.RequestScopeMiddleware)
+
+    # Include grouped API routers
+    app.include_router(auth.router)
+    app.include_router(management.router)
+    app.include_router(transactions.router)
+    app.include_router(game_end.router)
+    app.include_router(game.router)
+    app.include_router(users.router)
+    app.include_router(debug.router)
+    app.include_router(events.router)
+
+    @app.get("/")
+    def root():
+        return {"message": "LikeBingo API"}
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        # Prometheus text exposition for this worker
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    profiling.instrument_routes(app)
+
+    def custom_openapi():
+        # Built once per process (or loaded from a prebuilt file) and served from memory
+        if app.openapi_schema is None:
+            app.openapi_schema = _load_prebuilt_openapi(settings.OPENAPI_SCHEMA_PATH) or build_openapi(app)
+        return app.openapi_schema
+
+    app.openapi = custom_openapi
+    return app
+
+
+app = create_app()
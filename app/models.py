@@ -11,10 +11,18 @@ from app.models_old import *
 __all__ = [
     "Role",
     "User",
+    "Wallet",
+    "WalletSnapshot",
     "GameTransaction",
     "PackageTransaction",
     "BingoCard",
     "StoredData",
     "GameSession",
     "CreditRequest",
+    "AuditEvent",
+    "AnalyticsHourly",
+    "AnalyticsDaily",
+    "OutboxEvent",
+    "ProjectionCheckpoint",
+    "UserStats",
 ]
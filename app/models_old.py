@@ -7,7 +7,9 @@ from sqlalchemy import JSON
 from sqlalchemy.sql.expression import text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 import enum
-from sqlalchemy import Float
+from app.core import user_search
+from app.core.money import Money
+from sqlalchemy import DDL, Date, Index, event
 
 
 class Role(enum.Enum):
@@ -33,20 +35,21 @@ class User(Base):
     region = Column(String, index=True, nullable=True)
     # Role now uses the explicit Role enum values
     role = Column(SAEnum(Role), index=True, nullable=False)
-    # Wallet balance (current available for gameplay)
-    wallet_balance = Column(Float, index=True, nullable=False, default=0.0)
-    # NOTE: `remaining_balance` and `total_balance` removed in favor of `wallet_balance`
+    # NOTE: the balance lives in `wallets` (see Wallet); `remaining_balance`,
+    # `total_balance` and `wallet_balance` were removed from this table
     profile_picture = Column(String, nullable=True)
     # Superior id - who manages/created this user
     superior_id = Column(
         Integer,
         ForeignKey("users.id", ondelete="SET NULL"),
+        index=True,
         nullable=True,
     )
     # legacy created_by / parent id kept for compatibility
     created_by = Column(
         Integer,
         ForeignKey("users.id", ondelete="SET NULL"),
+        index=True,
         nullable=True,
     )
     parent_id = Column(
@@ -62,32 +65,86 @@ class User(Base):
     )
 
 
+# prefix/trigram indexes behind /api/management/users/search (see
+# app.core.user_search); operator classes and GIN are PostgreSQL-only
+event.listen(User.__table__, "after_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+for _ddl in user_search.PG_INDEXES.values():
+    event.listen(User.__table__, "after_create", DDL(_ddl).execute_if(dialect="postgresql"))
+
+
+class Wallet(Base):
+    """Balance of one user, split out of the wide `users` row (see app.core.wallets).
+
+    Deliberately without secondary indexes so balance updates stay HOT.
+    """
+
+    __tablename__ = "wallets"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    balance = Column(Money, nullable=False, default=0)
+    # bumped on every balance change
+    version = Column(Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+# leave free space in each page so the new version of a wallet row fits next
+# to the old one (HOT); CREATE TABLE has no portable spelling for this
+event.listen(
+    Wallet.__table__,
+    "after_create",
+    DDL("ALTER TABLE wallets SET (fillfactor = 70)").execute_if(dialect="postgresql"),
+)
+
+
+class WalletSnapshot(Base):
+    """Close-of-day copy of every wallet balance (see app.core.snapshots)."""
+
+    __tablename__ = "wallet_snapshots"
+
+    # (user_id, day) also serves the nearest-snapshot lookups of one user
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # UTC day whose close the balance reflects
+    day = Column(Date, primary_key=True)
+    balance = Column(Money, nullable=False)
+    # when the copy was actually taken (shortly after the day closed)
+    taken_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
+
 class GameTransaction(Base):
     __tablename__ = "game_transactions"
+    __table_args__ = (
+        # jester history / scoped listings, newest first
+        Index("ix_game_transactions_jester_created", "jester_id", "created_at"),
+        # range reports on when the game was played
+        Index("ix_game_transactions_jester_played", "jester_id", "played_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    bet_amount = Column(Float, index=True)
+    bet_amount = Column(Money, index=True)
     # replaced `game_type` with `winning_pattern` to record how the game was won
     winning_pattern = Column(String, index=True, nullable=True)
     number_of_cards = Column(Integer, index=True)
-    cut_amount = Column(Float, index=True)
-    winner_payout = Column(Float, index=True)
+    cut_amount = Column(Money, index=True)
+    winner_payout = Column(Money, index=True)
     # total pot for this game (snapshot)
-    total_pot = Column(Float, index=True, nullable=True)
+    total_pot = Column(Money, index=True, nullable=True)
     # amount deducted or added for this transaction (wins as negative values)
-    dedacted_amount = Column(Float, index=True, nullable=True)
+    dedacted_amount = Column(Money, index=True, nullable=True)
     # jester/actor who caused this transaction (the player)
     # `owner_id`/`owner_name` removed in favor of `jester_id`/`jester_name`
     # jester specific fields
     jester_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
     jester_name = Column(String, index=True, nullable=True)
     # store the user's remaining balance after the transaction
-    jester_remaining_balance = Column(Float, index=True, nullable=True)
+    jester_remaining_balance = Column(Money, index=True, nullable=True)
     # optional date/time fields provided by frontend
     tx_date = Column(String, index=True, nullable=True)
     tx_time = Column(String, index=True, nullable=True)
+    # typed play time parsed from tx_date/tx_time (UTC); see helper.parse_played_at
+    played_at = Column(TIMESTAMP(timezone=True), nullable=True)
     # optional snapshot of total/wallet balance after transaction
-    total_balance = Column(Float, index=True, nullable=True)
+    total_balance = Column(Money, index=True, nullable=True)
     created_at = Column(
         TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
     )
@@ -95,6 +152,14 @@ class GameTransaction(Base):
 
 class PackageTransaction(Base):
     __tablename__ = "package_transactions"
+    __table_args__ = (
+        # scoped listings filter on either side of the transfer
+        Index("ix_package_transactions_sender_created", "sender_id", "created_at"),
+        Index("ix_package_transactions_receiver_created", "receiver_id", "created_at"),
+        # reverts by the time they happened (app.core.snapshots)
+        Index("ix_package_transactions_receiver_reverted", "receiver_id", "reverted_at"),
+        Index("ix_package_transactions_refund_reverted", "refund_to", "reverted_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(
@@ -105,8 +170,13 @@ class PackageTransaction(Base):
     )
     receiver_name = Column(String, index=True)
     sender_name = Column(String, index=True)
-    package_amount = Column(Float, index=True)
+    package_amount = Column(Money, index=True)
     status = Column(String, index=True, nullable=True)
+    # set when status becomes REVERTED: who got the amount back (the sender,
+    # or the OWNER who reverted it) and when, so ledgers can fold the revert.
+    # No foreign key: the ledger keeps the id after that user is deleted.
+    refund_to = Column(Integer, nullable=True)
+    reverted_at = Column(TIMESTAMP(timezone=True), nullable=True)
     created_at = Column(
         TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
     )
@@ -135,12 +205,12 @@ class GameSession(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    bet_amount_per_card = Column(Float, nullable=False)
-    total_bet = Column(Float, nullable=False)
+    bet_amount_per_card = Column(Money, nullable=False)
+    total_bet = Column(Money, nullable=False)
     selected_cards = Column(JSON, nullable=False)
     status = Column(String, index=True, nullable=False)
-    total_pot = Column(Float, nullable=True)
-    house_cut = Column(Float, nullable=True)
+    total_pot = Column(Money, nullable=True)
+    house_cut = Column(Money, nullable=True)
     created_at = Column(
         TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
     )
@@ -148,12 +218,99 @@ class GameSession(Base):
 
 class CreditRequest(Base):
     __tablename__ = "credit_requests"
+    __table_args__ = (
+        # a superior's inbox: /api/management/credit-requests?status=PENDING
+        Index("ix_credit_requests_superior_status_created", "superior_id", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     superior_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     status = Column(String, index=True, nullable=False)
     created_at = Column(
         TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
     )
+
+
+class AuditEvent(Base):
+    """Append-only audit trail written in batches by app.core.audit."""
+
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ts = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    action = Column(String, nullable=False, index=True)
+    actor_id = Column(Integer, nullable=True, index=True)
+    target_id = Column(Integer, nullable=True)
+    endpoint = Column(String, nullable=True)
+    data = Column(JSON, nullable=True)
+
+
+class AnalyticsBucketColumns:
+    """Key and totals shared by the analytics rollups (see app.core.analytics).
+
+    Missing dimensions are stored as 0 / "" so the composite key stays unique.
+    """
+
+    bucket = Column(TIMESTAMP(timezone=True), primary_key=True)
+    manager_id = Column(Integer, primary_key=True, default=0)
+    city = Column(String, primary_key=True, default="")
+    region = Column(String, primary_key=True, default="")
+    game_count = Column(Integer, nullable=False, default=0)
+    bet_total = Column(Money, nullable=False, default=0)
+    pot_total = Column(Money, nullable=False, default=0)
+    cut_total = Column(Money, nullable=False, default=0)
+    payout_total = Column(Money, nullable=False, default=0)
+    package_count = Column(Integer, nullable=False, default=0)
+    package_total = Column(Money, nullable=False, default=0)
+
+
+class AnalyticsHourly(AnalyticsBucketColumns, Base):
+    __tablename__ = "analytics_hourly"
+
+
+class AnalyticsDaily(AnalyticsBucketColumns, Base):
+    __tablename__ = "analytics_daily"
+
+
+class OutboxEvent(Base):
+    """Change event appended in the transaction of the write (see app.core.outbox)."""
+
+    __tablename__ = "outbox_events"
+    # never hand out an id again after the newest rows are pruned; consumers
+    # keep their position as the last id they saw
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)
+    # amounts in payloads are integer minor units
+    payload = Column(JSON, nullable=False)
+    created_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
+    )
+
+
+class ProjectionCheckpoint(Base):
+    """Last outbox event each projection has applied."""
+
+    __tablename__ = "projection_checkpoints"
+
+    name = Column(String, primary_key=True)
+    last_event_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+
+class UserStats(Base):
+    """Per-user activity totals projected from the outbox (reverted packages excluded)."""
+
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    games_played = Column(Integer, nullable=False, default=0)
+    payout_total = Column(Money, nullable=False, default=0)
+    packages_received = Column(Integer, nullable=False, default=0)
+    received_total = Column(Money, nullable=False, default=0)
+    packages_sent = Column(Integer, nullable=False, default=0)
+    sent_total = Column(Money, nullable=False, default=0)
+    last_event_at = Column(TIMESTAMP(timezone=True), nullable=True)
@@ -1,18 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from typing import List
 
 from app import models, oauth2
-from app.database import get_db
+from app.database import get_read_db
 from app import schemas
+from app.core import bulkhead, wallets
+from app.core.pagination import Keyset, Page, page_params
+from app.core.partitions import game_tx_window_start
 
 router = APIRouter(prefix="/api/user", tags=["API User"])
 
 
-@router.get("/profile", response_model=schemas.UserProfileResponse)
+@router.get("/profile", response_model=schemas.UserProfileResponse, dependencies=[Depends(bulkhead.REPORTS)])
 def get_profile(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(oauth2.get_current_user),
 ):
     if not current_user:
@@ -29,11 +32,13 @@ def get_profile(
     last_name = parts[1] if len(parts) > 1 else None
 
     user_id = current_user.id
+    # game_transactions reads stay inside the query window (partition pruning)
+    since = game_tx_window_start()
 
     # count of game transactions for this user (use jester_id)
     gt_count = (
         db.query(func.count(models.GameTransaction.id))
-        .filter(models.GameTransaction.jester_id == user_id)
+        .filter(models.GameTransaction.jester_id == user_id, models.GameTransaction.created_at >= since)
         .scalar()
     ) or 0
 
@@ -49,7 +54,7 @@ def get_profile(
     # total wins: count where dedacted_amount < 0
     wins_count = (
         db.query(func.count(models.GameTransaction.id))
-        .filter(models.GameTransaction.jester_id == user_id)
+        .filter(models.GameTransaction.jester_id == user_id, models.GameTransaction.created_at >= since)
         .filter(models.GameTransaction.dedacted_amount < 0)
         .scalar()
     ) or 0
@@ -57,7 +62,7 @@ def get_profile(
     # total winnings: sum of -dedacted_amount where dedacted_amount < 0
     total_winnings = (
         db.query(func.coalesce(func.sum(-models.GameTransaction.dedacted_amount), 0))
-        .filter(models.GameTransaction.jester_id == user_id)
+        .filter(models.GameTransaction.jester_id == user_id, models.GameTransaction.created_at >= since)
         .filter(models.GameTransaction.dedacted_amount < 0)
         .scalar()
     ) or 0
@@ -65,7 +70,7 @@ def get_profile(
     return {
         "first_name": first_name,
         "last_name": last_name,
-        "wallet_balance": float(getattr(current_user, "wallet_balance", 0.0) or 0.0),
+        "wallet_balance": float(wallets.balance(db, current_user.id)),
         "total_winnings": float(total_winnings),
         "total_wins_count": int(wins_count),
         "total_transactions": int(total_transactions),
@@ -73,44 +78,44 @@ def get_profile(
 
 
 
-@router.get("/transactions", response_model=List[schemas.TransactionOut])
+TRANSACTIONS_KEYSET = Keyset(models.GameTransaction.created_at, models.GameTransaction.id)
+
+
+@router.get("/transactions", response_model=List[schemas.TransactionOut], dependencies=[Depends(bulkhead.REPORTS)])
 def get_transactions(
-    page: int = 1,
-    limit: int = 10,
-    db: Session = Depends(get_db),
+    response: Response,
+    page: Page = Depends(page_params),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(oauth2.get_current_user),
 ):
-    if page < 1:
-        page = 1
-    if limit < 1:
-        limit = 10
-
-    offset = (page - 1) * limit
-
+    """Newest-first game history; the next page is in the `Link` and `X-Next-Cursor` headers."""
     try:
-        txs = (
-            db.query(models.GameTransaction)
-            .filter(models.GameTransaction.jester_id == current_user.id)
-            .order_by(models.GameTransaction.created_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
+        gt = models.GameTransaction
+        stmt = TRANSACTIONS_KEYSET.apply(
+            select(gt.id, gt.created_at, gt.winning_pattern, gt.bet_amount).where(
+                gt.jester_id == current_user.id, gt.created_at >= game_tx_window_start()
+            ),
+            page,
         )
-
-        result = []
-        for t in txs:
-            result.append(
-                {
-                    "date": t.created_at,
-                    "game_pattern": getattr(t, "winning_pattern", None),
-                    "bet_amount": t.bet_amount,
-                    "status": "completed",
-                }
-            )
-
-        return result
+        rows, next_cursor = TRANSACTIONS_KEYSET.trim(db.execute(stmt).all(), page)
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not fetch transactions",
         )
+
+    response.headers.update(page.link_headers(next_cursor))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return [
+        {
+            "date": t.created_at,
+            "game_pattern": t.winning_pattern,
+            "bet_amount": t.bet_amount,
+            "status": "completed",
+        }
+        for t in rows
+    ]
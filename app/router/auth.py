@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, status, HTTPException
 from sqlalchemy.orm import Session
 from app import database
+from app.core import audit, bulkhead, money
 from .. import models, utils, oauth2, schemas
 
 
@@ -8,12 +9,19 @@ router = APIRouter(tags=["Authentication"])
 
 
 # New API: /auth/signin (requirements)
-@router.post("/auth/signin", status_code=status.HTTP_200_OK, response_model=schemas.SignInResponse)
+@router.post("/auth/signin", status_code=status.HTTP_200_OK, response_model=schemas.SignInResponse, dependencies=[Depends(bulkhead.AUTH)])
 def auth_signin(
     credentials: schemas.SignInRequest,
     db: Session = Depends(database.get_db),
 ):
-    user = db.query(models.User).filter(models.User.phone == credentials.phone_number).first()
+    # balance comes along in the same round trip
+    found = (
+        db.query(models.User, models.Wallet.balance)
+        .outerjoin(models.Wallet, models.Wallet.user_id == models.User.id)
+        .filter(models.User.phone == credentials.phone_number)
+        .first()
+    )
+    user, balance = found if found else (None, None)
 
     if not user or not utils.verify_password(credentials.password, user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
@@ -24,8 +32,7 @@ def auth_signin(
     if hasattr(user, "role") and user.role.value == "OWNER":
         balance_field = "UNLIMITED"
     else:
-        # only use wallet_balance
-        balance_field = float(getattr(user, "wallet_balance", 0.0) or 0.0)
+        balance_field = money.as_float(balance)
 
     user_out = {
         "id": user.id,
@@ -42,7 +49,7 @@ def auth_signin(
 
 
 
-@router.post("/auth/change-password", status_code=status.HTTP_200_OK)
+@router.post("/auth/change-password", status_code=status.HTTP_200_OK, dependencies=[Depends(bulkhead.AUTH)])
 def change_password(
     payload: schemas.ChangePasswordRequest,
     db: Session = Depends(database.get_db),
@@ -65,4 +72,6 @@ def change_password(
     db.query(models.User).filter(models.User.id == current_user.id).update({"password": hashed})
     db.commit()
 
+    audit.emit("password.changed", actor_id=current_user.id, target_id=current_user.id)
+
     return {"status": "success", "message": "Password changed successfully"}
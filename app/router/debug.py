@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+
+from app import models, oauth2
+from app.core import slow_queries
+
+router = APIRouter(prefix="/debug", tags=["Debug"])
+
+
+@router.get("/slow-queries")
+def slow_queries_summary(
+    limit: int = 50,
+    current_user: models.User = Depends(oauth2.RoleChecker(["OWNER"])),
+):
+    """Slow statements from every worker's log, grouped by fingerprint, slowest total first."""
+    limit = max(1, min(limit, 500))
+    return {"status": "success", "data": slow_queries.summarize(limit)}
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+
+from app import models, oauth2
+from app.core import database as core_db
+from app.core import money, push, wallets
+from app.core.config import settings
+
+router = APIRouter(tags=["Events"])
+
+
+def _load(user_id) -> Optional[tuple]:
+    db = core_db.SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        if user is None:
+            return None
+        if user.role.value == "OWNER":
+            return user.id, "UNLIMITED"
+        return user.id, money.as_float(wallets.balance(db, user.id))
+    finally:
+        db.close()
+
+
+def _frame(seq: int, message: dict) -> bytes:
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (seq, message["type"].encode(), orjson.dumps(message))
+
+
+@router.get("/events")
+async def events(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(oauth2.oauth2_scheme),
+    access_token: Optional[str] = Query(None, description="JWT for clients that cannot set headers (EventSource)"),
+):
+    """Server-sent events for the current user (see app.core.push).
+
+    Opens with a `balance_changed` carrying the current balance, then
+    streams `balance_changed`, `package_received` and
+    `credit_request_created` as they are committed, with a keepalive comment
+    every PUSH_KEEPALIVE seconds. After a reconnect or a `resync` event,
+    reload `/users/me` once; missed messages are not replayed.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token = credentials.credentials if credentials and credentials.credentials else access_token
+    if not token:
+        raise credentials_exception
+    token_data = oauth2.verify_token(token, credentials_exception)
+
+    # subscribe before reading the balance: a change committed in between is
+    # then delivered as an event (at worst a duplicate), never lost
+    sub = push.hub.subscribe(token_data.id)
+    try:
+        loaded = await run_in_threadpool(_load, token_data.id)
+        if loaded is None:
+            raise credentials_exception
+    except BaseException:
+        push.hub.unsubscribe(sub)
+        raise
+    user_id, balance = loaded
+
+    async def stream():
+        seq = 1
+        try:
+            yield _frame(seq, {"user_id": user_id, "type": "balance_changed", "balance": balance})
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), settings.PUSH_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield b": keepalive\n\n"
+                    continue
+                seq += 1
+                yield _frame(seq, message)
+                if message["type"] == "resync":
+                    return
+        finally:
+            push.hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        # no proxy buffering, so each event goes out as it is written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,46 +1,132 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
+from sqlalchemy import Integer, cast, func, or_, select
 
-from app.database import get_db
+from app.database import get_read_db
 from app import models
 from app import schemas, oauth2
+from app.core import bulkhead, money
+from app.core.archive import as_utc
+from app.core.partitions import game_tx_since
+from app.core.pagination import Keyset, Page, decode_cursor, encode_cursor, page_params
+from app.core.responses import StreamingJSONResponse
 from fastapi import Depends
 
 router = APIRouter(prefix="/api/game", tags=["Game"])
 
 
-@router.get("/cards")
-def get_game_cards(db: Session = Depends(get_db)):
-    """Return all bingo cards across all BingoCard entries.
+def visible_card_owners(user: models.User):
+    """Owner ids whose cards `user` may list (None => all), mirroring the transactions scope."""
+    role = getattr(user.role, "value", str(user.role)).upper()
+    if role == "OWNER":
+        return None
+    if role in ("MANAGER", "SUPERAGENT"):
+        u = models.User
+        return select(u.id).where(or_(u.id == user.id, u.superior_id == user.id))
+    return [user.id]
+
+
+@router.get("/cards", dependencies=[Depends(bulkhead.REPORTS)])
+def get_game_cards(
+    page: Page = Depends(page_params),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(oauth2.get_current_user),
+):
+    """Return the bingo cards visible to the caller, one page at a time.
 
     Response format:
-      {"cards": [ {"cardNumber": [...], "B": [...], "I": [...], "N": [...], "G": [...], "O": [...]}, ... ]}
+      {"next_cursor": "..." | null, "cards": [ {"cardNumber": [...], "B": [...], ...}, ... ]}
 
-    On error returns 500 Internal Server Error.
+    Cards are stored as lists inside BingoCard rows, so the cursor is the
+    (row id, position in the row) of the next card. On error returns 500.
     """
+    bc = models.BingoCard
+    start_id, start_index = decode_cursor(page.cursor, (str, int)) if page.cursor else (None, 0)
+    owners = visible_card_owners(current_user)
+
+    cards = []
+    next_cursor = None
+    last_id = None
     try:
-        bingo_cards = db.query(models.BingoCard).all()
-        cards_list = []
-        for bc in bingo_cards:
-            data = bc.card_data or {}
-            if isinstance(data, dict):
-                items = data.get("cards")
-                if isinstance(items, list):
-                    cards_list.extend(items)
-
-        return {"cards": cards_list}
+        while next_cursor is None:
+            stmt = select(bc.id, bc.card_data).order_by(bc.id).limit(page.limit + 1)
+            if owners is not None:
+                stmt = stmt.where(bc.owner_id.in_(owners))
+            if last_id is not None:
+                stmt = stmt.where(bc.id > last_id)
+            elif start_id is not None:
+                stmt = stmt.where(bc.id >= start_id)
+            rows = db.execute(stmt).all()
+            for row in rows:
+                items = row.card_data.get("cards") if isinstance(row.card_data, dict) else None
+                items = items if isinstance(items, list) else []
+                for i in range(start_index if row.id == start_id else 0, len(items)):
+                    if len(cards) == page.limit:
+                        next_cursor = encode_cursor([row.id, i])
+                        break
+                    cards.append(items[i])
+                if next_cursor is not None:
+                    break
+                last_id = row.id
+            if len(rows) <= page.limit:
+                break
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
+    return StreamingJSONResponse(cards, key="cards", envelope={"next_cursor": next_cursor}, headers=page.link_headers(next_cursor))
 
 
+def my_game_transactions_query(
+    jester_id: int,
+    since: Optional[datetime] = None,
+    played_from: Optional[datetime] = None,
+    played_to: Optional[datetime] = None,
+):
+    """A jester's own game history, newest first.
 
-
-
-
-@router.get("/my-transactions")
+    `since` bounds `created_at` (partition pruning); `played_from`/`played_to`
+    filter on `played_at` through the (jester_id, played_at) index.
+    """
+    gt = models.GameTransaction
+    stmt = (
+        select(
+            gt.id,
+            gt.tx_date,
+            gt.tx_time,
+            gt.created_at,
+            gt.played_at,
+            gt.winning_pattern,
+            gt.jester_name,
+            func.coalesce(gt.bet_amount, 0).label("bet_amount"),
+            func.coalesce(gt.winner_payout, 0).label("win_amount"),
+            func.coalesce(gt.total_pot, 0).label("total_pot"),
+            func.coalesce(gt.cut_amount, 0).label("cut"),
+            cast(func.coalesce(gt.number_of_cards, 0), Integer).label("number_of_cards"),
+        )
+        .where(gt.jester_id == jester_id)
+        .order_by(gt.created_at.desc())
+    )
+    if since is not None:
+        stmt = stmt.where(gt.created_at >= since)
+    if played_from is not None:
+        stmt = stmt.where(gt.played_at >= played_from)
+    if played_to is not None:
+        stmt = stmt.where(gt.played_at <= played_to)
+    return stmt
+
+
+MY_TRANSACTIONS_KEYSET = Keyset(models.GameTransaction.created_at, models.GameTransaction.id)
+
+
+@router.get("/my-transactions", dependencies=[Depends(bulkhead.REPORTS)])
 def my_game_transactions(
-    db: Session = Depends(get_db),
+    start: Optional[datetime] = Query(None, alias="from", description="played_at lower bound"),
+    end: Optional[datetime] = Query(None, alias="to", description="played_at upper bound"),
+    page: Page = Depends(page_params),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(oauth2.get_current_user),
 ):
     # Jester only
@@ -52,38 +138,33 @@ def my_game_transactions(
     if role != "JESTER":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only Jester can access this endpoint")
 
-    txs = db.query(models.GameTransaction).filter(models.GameTransaction.jester_id == current_user.id).order_by(models.GameTransaction.created_at.desc()).all()
-
-    result = []
-    for t in txs:
-        # compute total_pot and cut from stored fields; ensure numeric types
-        total_pot = float(getattr(t, "total_pot", 0.0) or 0.0)
-        cut = float(getattr(t, "cut_amount", 0.0) or 0.0)
-        bet = float(getattr(t, "bet_amount", 0.0) or 0.0)
-        # number_of_cards computed as total_pot / bet_amount when possible, otherwise fall back to stored value
-        if bet > 0:
-            try:
-                number_of_cards = int(total_pot / bet)
-            except Exception:
-                number_of_cards = int(getattr(t, "number_of_cards", 0) or 0)
-        else:
-            number_of_cards = int(getattr(t, "number_of_cards", 0) or 0)
-
-        result.append({
-            "id": t.id,
-            "date": t.tx_date or t.created_at,
-            "time": t.tx_time,
-            "game_pattern": getattr(t, "winning_pattern", None),
-            "bet_amount": bet,
-            "win_amount": float(getattr(t, "winner_payout", 0.0) or 0.0),
-            "jester_name": t.jester_name,
-            "total_pot": total_pot,
-            "cut": cut,
-            "number_of_cards": number_of_cards,
-        })
-
-    return {"status": "success", "data": result}
-
-
-
-
+    stmt = MY_TRANSACTIONS_KEYSET.apply(
+        my_game_transactions_query(current_user.id, game_tx_since(as_utc(start)), as_utc(start), as_utc(end)),
+        page,
+    )
+    rows, next_cursor = MY_TRANSACTIONS_KEYSET.trim(db.execute(stmt).all(), page)
+
+    def iter_rows(rows):
+        for t in rows:
+            # number_of_cards computed as total_pot / bet_amount when possible, otherwise fall back to stored value
+            number_of_cards = int(t.total_pot / t.bet_amount) if t.bet_amount > 0 else t.number_of_cards
+
+            yield {
+                "id": t.id,
+                "date": t.tx_date or t.created_at,
+                "time": t.tx_time,
+                "played_at": t.played_at,
+                "game_pattern": t.winning_pattern,
+                "bet_amount": money.as_float(t.bet_amount),
+                "win_amount": money.as_float(t.win_amount),
+                "jester_name": t.jester_name,
+                "total_pot": money.as_float(t.total_pot),
+                "cut": money.as_float(t.cut),
+                "number_of_cards": number_of_cards,
+            }
+
+    return StreamingJSONResponse(
+        iter_rows(rows),
+        envelope={"status": "success", "next_cursor": next_cursor},
+        headers=page.link_headers(next_cursor),
+    )
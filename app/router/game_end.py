@@ -1,12 +1,15 @@
+from datetime import datetime, timezone
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app import models, schemas, oauth2
+from app import helper, models, schemas, oauth2
 from app import database
+from app.core import audit, bulkhead, money, outbox, push, wallets
 
 router = APIRouter(prefix="/game", tags=["Game End"])
 
 
-@router.post("/end", status_code=status.HTTP_200_OK)
+@router.post("/end", status_code=status.HTTP_200_OK, dependencies=[Depends(bulkhead.MONEY)])
 def end_game(
     payload: schemas.EndGameRequest,
     db: Session = Depends(database.get_db),
@@ -22,27 +25,16 @@ def end_game(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only Jester can end a game")
 
     # Wallet Update: Deduct the win_amount from Jester's wallet
-    current_balance = float(getattr(current_user, "wallet_balance", 0.0) or 0.0)
-    win_amount = float(payload.win_amount or 0.0)
-
-    if current_balance < win_amount:
+    win_amount = payload.win_amount
+    new_balance = wallets.debit(db, current_user.id, win_amount)
+    if new_balance is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient balance to cover the payout")
 
-    new_balance = current_balance - win_amount
-    db.query(models.User).filter(models.User.id == current_user.id).update({"wallet_balance": new_balance})
-
     # Save record: create GameTransaction
     try:
         # calculate number_of_cards from total_pot and bet_amount when possible
-        try:
-            bet = float(payload.bet_amount or 0.0)
-        except Exception:
-            bet = 0.0
-
-        try:
-            total_pot = float(payload.total_pot or 0.0)
-        except Exception:
-            total_pot = 0.0
+        bet = payload.bet_amount
+        total_pot = payload.total_pot
 
         if bet > 0:
             try:
@@ -64,10 +56,15 @@ def end_game(
             jester_name=payload.jester_name,
             tx_date=payload.date,
             tx_time=payload.time,
+            played_at=helper.parse_played_at(payload.date, payload.time) or datetime.now(timezone.utc),
             jester_remaining_balance=new_balance,
             total_balance=new_balance,
         )
         db.add(tx)
+        db.flush()
+        outbox.append(db, "game.ended", transaction_id=tx.id, jester_id=current_user.id,
+                      bet_amount=bet, total_pot=total_pot, win_amount=win_amount)
+        push.notify(db, current_user.id, "balance_changed", balance=new_balance)
         db.commit()
         db.refresh(tx)
     except Exception as e:
@@ -77,4 +74,14 @@ def end_game(
             pass
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not save transaction: {e}")
 
-    return {"status": "success", "new_balance": float(new_balance)}
+    audit.emit(
+        "game.ended",
+        actor_id=current_user.id,
+        transaction_id=tx.id,
+        bet_amount=payload.bet_amount,
+        total_pot=payload.total_pot,
+        win_amount=win_amount,
+        new_balance=new_balance,
+    )
+
+    return {"status": "success", "new_balance": money.as_float(new_balance)}
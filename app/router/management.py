@@ -1,18 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import func, insert, or_, select, true, union, update
+from typing import Optional
 
 from app import models, oauth2
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app import schemas, utils
+from app.core import analytics, audit, bulkhead, money, outbox, push, snapshots, user_search, wallets
+from app.core.archive import as_utc
+from app.core.pagination import Keyset, Page, page_params
+from app.core.config import settings
+from app.core.responses import StreamingJSONResponse
 from sqlalchemy.exc import SQLAlchemyError, InvalidRequestError
 
 
 router = APIRouter(prefix="/api/management", tags=["Management"])
 
+# Hierarchy rules: roles each role may create
+CREATE_ROLE_RULES = {
+    "OWNER": {"MANAGER", "SUPERAGENT", "JESTER"},
+    "MANAGER": {"SUPERAGENT", "JESTER"},
+    "SUPERAGENT": {"JESTER"},
+}
+
 
 # New endpoints to match API requirement under /users
-@router.post("/users/create", status_code=201)
+@router.post("/users/create", status_code=201, dependencies=[Depends(bulkhead.AUTH)])
 def users_create(
     payload: schemas.CreateUserRequest,
     db: Session = Depends(get_db),
@@ -24,14 +42,7 @@ def users_create(
     # Role of current user
     cur_role = current_user.role.value
 
-    # Hierarchy rules
-    allowed = {
-        "OWNER": {"MANAGER", "SUPERAGENT", "JESTER"},
-        "MANAGER": {"SUPERAGENT", "JESTER"},
-        "SUPERAGENT": {"JESTER"},
-    }
-
-    if payload.role not in allowed.get(cur_role, set()):
+    if payload.role not in CREATE_ROLE_RULES.get(cur_role, set()):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to create this role")
 
     # duplicate phone check
@@ -49,69 +60,290 @@ def users_create(
         city=payload.city,
         region=payload.region,
         role=models.Role[payload.role],
-        wallet_balance=0.0,
         superior_id=current_user.id,
         created_by=current_user.id,
     )
     db.add(new_user)
+    db.flush()
+    wallets.create(db, [new_user.id])
     db.commit()
     db.refresh(new_user)
 
     return {"status": "success", "message": f"{payload.role} account created successfully.", "data": {"user_id": new_user.id, "created_by": current_user.id}}
 
 
-@router.get("/users", status_code=200)
-def users_list(role: str = None, db: Session = Depends(get_db), current_user: models.User = Depends(oauth2.get_current_user)):
+IMPORT_COLUMNS = ("first_name", "last_name", "phone_number", "city", "region", "password", "role")
+
+
+@router.post("/users/import", status_code=201, dependencies=[Depends(bulkhead.AUTH)])
+def users_import(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(oauth2.get_current_user),
+):
+    """Create many users from a CSV with the `users/create` columns.
+
+    All rows are validated before anything is written; any error rejects
+    the whole file with the list of offending rows.
+    """
+    if not current_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+
+    allowed = CREATE_ROLE_RULES.get(current_user.role.value, set())
+    if not allowed:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to create users")
+
+    try:
+        text_stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        reader = csv.DictReader(text_stream)
+        missing = [c for c in ("first_name", "last_name", "phone_number", "password", "role") if c not in (reader.fieldnames or [])]
+        if missing:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Missing CSV columns: {', '.join(missing)}")
+
+        rows = []
+        errors = []
+        seen_phones = {}
+        for line_no, raw in enumerate(reader, start=2):
+            if len(rows) + len(errors) >= settings.USER_IMPORT_MAX_ROWS:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"At most {settings.USER_IMPORT_MAX_ROWS} rows per import",
+                )
+            data = {c: (raw.get(c) or "").strip() or None for c in IMPORT_COLUMNS}
+            if data["role"]:
+                data["role"] = data["role"].upper()
+            try:
+                row = schemas.CreateUserRequest(**data)
+            except ValidationError as e:
+                errors.append({"row": line_no, "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+                continue
+            if row.role not in allowed:
+                errors.append({"row": line_no, "error": f"Not allowed to create role {row.role}"})
+                continue
+            if row.phone_number in seen_phones:
+                errors.append({"row": line_no, "error": f"Duplicate phone number (also on row {seen_phones[row.phone_number]})"})
+                continue
+            seen_phones[row.phone_number] = line_no
+            rows.append(row)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV must be UTF-8 encoded")
+    except csv.Error as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid CSV: {e}")
+
+    if not rows and not errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV contains no rows")
+
+    # one round trip for every phone in the file, against both phone columns
+    if seen_phones:
+        phones = list(seen_phones)
+        taken = db.execute(
+            select(models.User.phone, models.User.phone_number).where(
+                or_(models.User.phone.in_(phones), models.User.phone_number.in_(phones))
+            )
+        ).all()
+        taken_phones = {p for pair in taken for p in pair if p}
+        for phone in sorted(taken_phones & set(phones), key=seen_phones.get):
+            errors.append({"row": seen_phones[phone], "error": "Phone number already registered"})
+
+    if errors:
+        errors.sort(key=lambda e: e["row"])
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"message": "Import rejected", "errors": errors})
+
+    hashed = utils.hash_passwords([r.password for r in rows])
+
+    values = [
+        {
+            "first_name": r.first_name,
+            "last_name": r.last_name,
+            "phone": r.phone_number,
+            "phone_number": r.phone_number,
+            "password": pw,
+            "city": r.city,
+            "region": r.region,
+            "role": models.Role[r.role],
+            "superior_id": current_user.id,
+            "created_by": current_user.id,
+        }
+        for r, pw in zip(rows, hashed)
+    ]
+    try:
+        created = db.execute(insert(models.User).returning(models.User.id), values).scalars().all()
+        wallets.create(db, created)
+        db.commit()
+        # Core insert: the ORM flush hook does not see these rows
+        user_search.invalidate()
+    except SQLAlchemyError as e:
+        db.rollback()
+        # a concurrent create can still win the race for a phone number
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Could not import users: {e.__class__.__name__}")
+
+    audit.emit("users.imported", actor_id=current_user.id, count=len(created))
+
+    return {
+        "status": "success",
+        "message": f"{len(created)} accounts created successfully.",
+        "data": {"created": len(created), "user_ids": created, "created_by": current_user.id},
+    }
+
+
+@router.get("/users", status_code=200, dependencies=[Depends(bulkhead.REPORTS)])
+def users_list(role: str = None, db: Session = Depends(get_read_db), current_user: models.User = Depends(oauth2.get_current_user)):
     if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
 
     cur_role = current_user.role.value
-    query = db.query(models.User)
+    u = models.User
+    w = models.Wallet
+    pt = models.PackageTransaction
+
+    # latest package transaction touching each listed user, resolved in the same statement
+    last_tx_id = (
+        select(pt.id)
+        .where(or_(pt.receiver_id == u.id, pt.sender_id == u.id))
+        .order_by(pt.created_at.desc(), pt.id.desc())
+        .limit(1)
+        .correlate(u)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            u.id,
+            u.first_name,
+            u.last_name,
+            u.role,
+            func.coalesce(w.balance, 0).label("balance"),
+            u.superior_id,
+            pt.sender_name,
+            pt.receiver_name,
+        )
+        .select_from(u)
+        .outerjoin(w, w.user_id == u.id)
+        .outerjoin(pt, pt.id == last_tx_id)
+    )
     if role:
         # role filter expects uppercase
-        query = query.filter(models.User.role == models.Role[role])
+        stmt = stmt.where(u.role == models.Role[role])
 
     if cur_role == "OWNER":
-        users = query.all()
+        pass
     elif cur_role in ("MANAGER", "SUPERAGENT"):
-        users = query.filter(models.User.superior_id == current_user.id).all()
+        stmt = stmt.where(u.superior_id == current_user.id)
     else:
         # Jester only own
-        users = query.filter(models.User.id == current_user.id).all()
+        stmt = stmt.where(u.id == current_user.id)
+
+    def iter_rows(rows):
+        for r in rows:
+            yield {
+                "id": r.id,
+                "name": f"{r.first_name} {r.last_name or ''}".strip(),
+                "role": r.role.value.title(),
+                "balance": money.as_float(r.balance),
+                "superior_id": r.superior_id,
+                "status": "active",
+                # include latest package transaction sender/receiver names as extra
+                "extra": {"sender_name": r.sender_name, "receiver_name": r.receiver_name},
+            }
+
+    return StreamingJSONResponse(iter_rows(db.execute(stmt).all()), envelope={"status": "success"})
+
+
+@router.get("/users/search", dependencies=[Depends(bulkhead.REPORTS)])
+def users_search(
+    q: str = Query(..., min_length=1, max_length=64, description="Prefix of a phone number, first or last name"),
+    limit: int = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(oauth2.get_current_user),
+):
+    """Typeahead lookup of agents, e.g. to pick the receiver of a package.
 
-    data = []
-    for u in users:
-        # include latest package transaction sender/receiver names as extra
-        try:
-            last_tx = (
-                db.query(models.PackageTransaction)
-                .filter(
-                    (models.PackageTransaction.receiver_id == u.id) | (models.PackageTransaction.sender_id == u.id)
-                )
-                .order_by(models.PackageTransaction.created_at.desc())
-                .first()
-            )
-        except Exception:
-            last_tx = None
+    Prefix match on phone and on each word of the name, best matches first
+    (see app.core.user_search). Owners search everyone, managers and
+    superagents their direct reports.
+    """
+    cur_role = current_user.role.value
+    if cur_role == "OWNER":
+        superior_id = None
+    elif cur_role in ("MANAGER", "SUPERAGENT"):
+        superior_id = current_user.id
+    else:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
 
-        extra = {
-            "sender_name": getattr(last_tx, "sender_name", None) if last_tx else None,
-            "receiver_name": getattr(last_tx, "receiver_name", None) if last_tx else None,
-        }
+    limit = min(limit or settings.USER_SEARCH_LIMIT, settings.USER_SEARCH_MAX_LIMIT)
+    return {"status": "success", "data": user_search.search(db, q, limit, superior_id)}
 
-        data.append({
-            "id": u.id,
-            "name": f"{getattr(u,'first_name',None) or getattr(u,'name',None)} {getattr(u,'last_name',None) or ''}".strip(),
-            "role": u.role.value.title(),
-            "balance": float(getattr(u, 'wallet_balance', 0.0) or 0.0),
-            "superior_id": getattr(u, 'superior_id', None),
-            "status": "active",
-            "extra": extra,
-        })
 
+def _viewable_user(db: Session, user_id: int, current_user: models.User) -> models.User:
+    """The user `current_user` may look at: anyone for owners, their own users for
+    managers and superagents, themselves otherwise (404/403 if not)."""
+    target = db.query(models.User).filter(models.User.id == user_id).first()
+    if not target:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    cur_role = current_user.role.value
+    if cur_role in ("MANAGER", "SUPERAGENT"):
+        allowed = current_user.id in (target.id, target.superior_id, target.created_by)
+    else:
+        allowed = cur_role == "OWNER" or target.id == current_user.id
+    if not allowed:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    return target
+
+
+@router.get("/users/{user_id}/balance", dependencies=[Depends(bulkhead.REPORTS)])
+def user_balance_as_of(
+    user_id: int,
+    as_of: Optional[datetime] = Query(None, description="Defaults to now"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(oauth2.get_current_user),
+):
+    """Wallet balance of a user at `as_of`.
+
+    Computed from the nearest daily snapshot plus the ledger in between
+    (see app.core.snapshots). Owners may ask about anyone, managers and
+    superagents about the users under them, jesters about themselves.
+    """
+    target = _viewable_user(db, user_id, current_user)
+
+    now = datetime.now(timezone.utc)
+    as_of = as_utc(as_of) or now
+    if as_of > now:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="`as_of` is in the future")
+
+    data = {"user_id": target.id, "as_of": as_of.isoformat()}
+    if target.role.value == "OWNER":
+        data["balance"] = "UNLIMITED"
+    else:
+        result = snapshots.balance_as_of(db, target.id, as_of)
+        data["balance"] = money.as_float(result.pop("balance"))
+        data.update(result)
     return {"status": "success", "data": data}
 
 
+@router.get("/users/{user_id}/stats", dependencies=[Depends(bulkhead.REPORTS)])
+def user_stats(
+    user_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(oauth2.get_current_user),
+):
+    """Activity totals of a user, projected from the outbox (about a second behind writes)."""
+    target = _viewable_user(db, user_id, current_user)
+    stats = db.get(models.UserStats, target.id)
+    return {
+        "status": "success",
+        "data": {
+            "user_id": target.id,
+            "games_played": stats.games_played if stats else 0,
+            "payout_total": money.as_float(stats.payout_total) if stats else 0.0,
+            "packages_received": stats.packages_received if stats else 0,
+            "received_total": money.as_float(stats.received_total) if stats else 0.0,
+            "packages_sent": stats.packages_sent if stats else 0,
+            "sent_total": money.as_float(stats.sent_total) if stats else 0.0,
+            "last_event_at": stats.last_event_at if stats else None,
+        },
+    }
+
+
 @router.put("/users/profile", status_code=200)
 def update_profile(payload: dict, db: Session = Depends(get_db), current_user: models.User = Depends(oauth2.get_current_user)):
     if not current_user:
@@ -125,14 +357,56 @@ def update_profile(payload: dict, db: Session = Depends(get_db), current_user: m
 
     db.query(models.User).filter(models.User.id == current_user.id).update(update_data)
     db.commit()
+    user_search.invalidate()
 
     user = db.query(models.User).filter(models.User.id == current_user.id).first()
     return {"status": "success", "data": {"id": user.id, "first_name": user.first_name, "last_name": user.last_name, "city": user.city, "region": user.region}}
 
 
-@router.get("/dashboard")
+def dashboard_queries(manager_id: Optional[int] = None) -> dict:
+    """Aggregates behind `/dashboard`.
+
+    `manager_id=None` covers every user (Owner view); otherwise the scope is
+    the users created by that manager/superagent plus the manager. Every
+    figure is all-time, like the wallet and package ones, so game counts are
+    not cut to the game_transactions query window (that only bounds the
+    per-jester list paths). Also used by the query-plan snapshot suite.
+    """
+    u = models.User
+    w = models.Wallet
+    gt = models.GameTransaction
+    pt = models.PackageTransaction
+
+    if manager_id is None:
+        user_filter = true()
+        game_filter = gt.jester_id.isnot(None)
+        package_filter = true()
+    else:
+        # UNIONs rather than ORs, so each branch is an index search
+        scope = union(select(u.id).where(u.created_by == manager_id), select(u.id).where(u.id == manager_id))
+        user_filter = u.id.in_(scope)
+        game_filter = gt.jester_id.in_(scope)
+        package_filter = pt.id.in_(union(
+            select(pt.id).where(pt.sender_id.in_(scope)),
+            select(pt.id).where(pt.receiver_id.in_(scope)),
+        ))
+    return {
+        "wallet_summary": select(
+            func.coalesce(func.sum(w.balance), 0),
+            func.count(u.id),
+        ).select_from(u).outerjoin(w, w.user_id == u.id).where(user_filter),
+        "game_count": select(func.count(gt.id)).where(game_filter),
+        "package_count": select(func.count(pt.id)).where(package_filter),
+        "wins": select(
+            func.count(gt.id),
+            func.coalesce(func.sum(gt.winner_payout), 0),
+        ).where(game_filter, gt.winner_payout > 0),
+    }
+
+
+@router.get("/dashboard", dependencies=[Depends(bulkhead.REPORTS)])
 def dashboard(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(oauth2.get_current_user),
 ):
     if not current_user:
@@ -147,93 +421,94 @@ def dashboard(
     except Exception:
         role = getattr(current_user, "role", None)
 
-    # Determine user scope
+    # Determine user scope: Owner sees all users, managers/superagents their
+    # direct children plus themselves
     if role == "OWNER":
-        # all users
-        user_query = db.query(models.User.id)
+        queries = dashboard_queries()
     elif role in ("MANAGER", "SUPERAGENT"):
-        # direct children created by this user
-        user_query = db.query(models.User.id).filter(models.User.created_by == current_user.id)
+        queries = dashboard_queries(current_user.id)
     else:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
 
-    user_ids = [u[0] for u in user_query.all()]
-
-    # If owner and no users exist, return zeros
-    if role == "OWNER" and not user_ids:
-        # include 0 results
-        wallet_summary = {
-            "total_wallet_balance": 0.0,
-            "user_count": 0,
-        }
-        network_stats = {
-            "total_transactions": 0,
-            "total_wins_count": 0,
-            "total_wins_amount": 0.0,
-        }
-        return {"wallet_summary": wallet_summary, "network_stats": network_stats}
-
-    # For scope queries, include current_user as well for managers/superagents
-    if role in ("MANAGER", "SUPERAGENT"):
-        user_ids.append(current_user.id)
-
-    # Compute wallet summary
-    wallet_q = (
-        db.query(
-            func.coalesce(func.sum(models.User.wallet_balance), 0),
-            func.count(models.User.id),
-        )
-        .filter(models.User.id.in_(user_ids))
-        .first()
-    )
-
-    total_wallet_balance = float(wallet_q[0] or 0.0)
-    user_count = int(wallet_q[1] or 0)
-
-    # Compute transaction stats
-    gt_total = (
-        db.query(func.count(models.GameTransaction.id))
-        .filter(models.GameTransaction.jester_id.in_(user_ids))
-        .scalar()
-    ) or 0
-
-    pt_total = (
-        db.query(func.count(models.PackageTransaction.id))
-        .filter(or_(models.PackageTransaction.sender_id.in_(user_ids), models.PackageTransaction.receiver_id.in_(user_ids)))
-        .scalar()
-    ) or 0
-
-    total_transactions = int(gt_total) + int(pt_total)
-
-    wins_count = (
-        db.query(func.count(models.GameTransaction.id))
-        .filter(models.GameTransaction.jester_id.in_(user_ids))
-        .filter(models.GameTransaction.winner_payout > 0)
-        .scalar()
-    ) or 0
-
-    wins_amount = (
-        db.query(func.coalesce(func.sum(models.GameTransaction.winner_payout), 0))
-        .filter(models.GameTransaction.jester_id.in_(user_ids))
-        .filter(models.GameTransaction.winner_payout > 0)
-        .scalar()
-    ) or 0
+    total_wallet_balance, user_count = db.execute(queries["wallet_summary"]).one()
+    gt_total = db.execute(queries["game_count"]).scalar()
+    pt_total = db.execute(queries["package_count"]).scalar()
+    wins_count, wins_amount = db.execute(queries["wins"]).one()
 
     wallet_summary = {
-        "total_wallet_balance": total_wallet_balance,
-        "user_count": user_count,
+        "total_wallet_balance": money.as_float(total_wallet_balance),
+        "user_count": int(user_count),
     }
 
     network_stats = {
-        "total_transactions": int(total_transactions),
+        "total_transactions": int(gt_total) + int(pt_total),
         "total_wins_count": int(wins_count),
-        "total_wins_amount": float(wins_amount),
+        "total_wins_amount": money.as_float(wins_amount),
     }
 
     return {"wallet_summary": wallet_summary, "network_stats": network_stats}
 
 
-@router.post("/create-member")
+
+@router.get("/analytics", dependencies=[Depends(bulkhead.REPORTS)])
+def analytics_report(
+    bucket: str = Query("day", pattern="^(hour|day|week)$"),
+    group_by: Optional[str] = Query(None, pattern="^(manager|city|region)$"),
+    start: Optional[datetime] = Query(None, alias="from", description="Defaults to ANALYTICS_DEFAULT_DAYS before `to`"),
+    end: Optional[datetime] = Query(None, alias="to", description="Exclusive upper bound, defaults to now"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(oauth2.get_current_user),
+):
+    """Revenue, cut, payouts, game and package counts per time bucket.
+
+    Served from the hourly/daily rollups (see app.core.analytics).
+    Owners see every subtree; a manager only sees their own.
+    """
+    role = current_user.role.value
+    if role == "OWNER":
+        manager_id = None
+    elif role == "MANAGER":
+        manager_id = current_user.id
+    else:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+    end = as_utc(end) or datetime.now(timezone.utc)
+    start = as_utc(start) or end - timedelta(days=settings.ANALYTICS_DEFAULT_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="`from` must be before `to`")
+    max_days = settings.ANALYTICS_MAX_HOURLY_DAYS if bucket == "hour" else settings.ANALYTICS_MAX_DAYS
+    if end - start > timedelta(days=max_days):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too large for bucket={bucket} (max {max_days} days)",
+        )
+
+    stmt = analytics.report_query(bucket, group_by, start, end, manager_id, db.get_bind().dialect.name)
+    data = []
+    for row in db.execute(stmt):
+        item = {"bucket": as_utc(row.period).isoformat()}
+        if group_by:
+            item[group_by] = row.grp if row.grp not in (0, "") else None
+        item.update({
+            "games": int(row.game_count or 0),
+            "bets": float(row.bet_total or 0),
+            "revenue": float(row.pot_total or 0),
+            "cut": float(row.cut_total or 0),
+            "payouts": float(row.payout_total or 0),
+            "packages": int(row.package_count or 0),
+            "package_amount": float(row.package_total or 0),
+        })
+        data.append(item)
+    return {
+        "status": "success",
+        "bucket": bucket,
+        "group_by": group_by,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "data": data,
+    }
+
+@router.post("/create-member", dependencies=[Depends(bulkhead.AUTH)])
 def create_member(
     payload: schemas.CreateMemberSchema,
     db: Session = Depends(get_db),
@@ -295,13 +570,14 @@ def create_member(
         role=role_to_assign,
         city=payload.city,
         region=payload.region,
-        wallet_balance=0.0,
         created_by=current_user.id,
         parent_id=current_user.id if current_role in ("manager", "superagent") else None,
     )
 
     try:
         db.add(new_user)
+        db.flush()
+        wallets.create(db, [new_user.id])
         db.commit()
         db.refresh(new_user)
     except Exception as e:
@@ -312,6 +588,8 @@ def create_member(
             pass
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not create user: {e}")
 
+    audit.emit("user.created", actor_id=current_user.id, target_id=new_user.id, role=new_user.role.value)
+
     return {"user_id": new_user.id, "phone": new_user.phone, "role": new_user.role.value}
 
 
@@ -323,15 +601,178 @@ def create_member(
 
 
 
-@router.put("/credit-requests/{request_id}/action")
+CREDIT_REQUESTS_KEYSET = Keyset(models.CreditRequest.created_at, models.CreditRequest.id)
+# statuses an action may still be taken on ("REQUESTED"/NULL are legacy spellings of PENDING)
+OPEN_CREDIT_STATUSES = ("PENDING", "REQUESTED", None)
+
+
+def _open_credit_status(cr):
+    """SQL form of OPEN_CREDIT_STATUSES (IN never matches NULL)."""
+    return or_(cr.status.in_(("PENDING", "REQUESTED")), cr.status.is_(None))
+
+
+@router.get("/credit-requests", dependencies=[Depends(bulkhead.REPORTS)])
+def credit_requests_inbox(
+    status_filter: str = Query("PENDING", alias="status", description="PENDING, APPROVED or REJECTED"),
+    page: Page = Depends(page_params),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(oauth2.get_current_user),
+):
+    """Credit requests addressed to the current user, newest first; the next page is in `next_cursor`."""
+    status_filter = status_filter.upper()
+    if status_filter not in ("PENDING", "APPROVED", "REJECTED"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="status must be PENDING, APPROVED or REJECTED")
+
+    cr = models.CreditRequest
+    u = models.User
+    if status_filter == "PENDING":
+        # legacy rows say REQUESTED or nothing at all; they are still open
+        status_clause = _open_credit_status(cr)
+    else:
+        status_clause = cr.status == status_filter
+    stmt = CREDIT_REQUESTS_KEYSET.apply(
+        select(cr.id, cr.user_id, u.first_name, u.last_name, u.phone, cr.amount, cr.status, cr.created_at)
+        .join(u, u.id == cr.user_id)
+        .where(cr.superior_id == current_user.id, status_clause),
+        page,
+    )
+    rows, next_cursor = CREDIT_REQUESTS_KEYSET.trim(db.execute(stmt).all(), page)
+
+    def iter_rows(rows):
+        for r in rows:
+            yield {
+                "id": r.id,
+                "user_id": r.user_id,
+                "name": f"{r.first_name or ''} {r.last_name or ''}".strip(),
+                "phone": r.phone,
+                "amount": money.as_float(r.amount),
+                "status": r.status,
+                "created_at": r.created_at,
+            }
+
+    return StreamingJSONResponse(
+        iter_rows(rows),
+        envelope={"status": "success", "next_cursor": next_cursor},
+        headers=page.link_headers(next_cursor),
+    )
+
+
+@router.post("/credit-requests/bulk-action", dependencies=[Depends(bulkhead.MONEY)])
+def credit_requests_bulk_action(
+    payload: schemas.BulkActionSchema,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(oauth2.get_current_user),
+):
+    """Approve or reject many credit requests in one transaction.
+
+    All or nothing: if any request is unknown, not addressed to the current
+    user or already processed, nothing changes. Approval takes the total
+    from the superior with one debit, credits the recipients in one
+    statement and records the packages with one multi-row insert.
+    """
+    cr = models.CreditRequest
+    ids = sorted(set(payload.request_ids))
+    # locked like in the single action, so a concurrent single or bulk action waits
+    rows = db.execute(
+        select(cr.id, cr.user_id, cr.superior_id, cr.amount, cr.status).where(cr.id.in_(ids)).order_by(cr.id).with_for_update()
+    ).all()
+    found = {r.id: r for r in rows}
+    errors = []
+    for request_id in ids:
+        r = found.get(request_id)
+        if r is None:
+            errors.append({"request_id": request_id, "error": "Credit request not found"})
+        elif r.superior_id != current_user.id:
+            errors.append({"request_id": request_id, "error": "Not authorized to act on this request"})
+        elif r.status not in OPEN_CREDIT_STATUSES:
+            errors.append({"request_id": request_id, "error": "Request already processed"})
+    if errors:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"message": "Bulk action rejected", "errors": errors})
+
+    approve = payload.action == schemas.CreditAction.APPROVE
+    data = {"action": payload.action.value, "request_ids": ids}
+    transaction_ids = {}
+    try:
+        # claim every request before any money moves; a concurrent action that
+        # got one first leaves fewer rows to update
+        claimed = db.execute(
+            update(cr).where(cr.id.in_(ids), _open_credit_status(cr))
+            .values(status="APPROVED" if approve else "REJECTED")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed != len(ids):
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Requests were processed concurrently; reload and retry")
+        if approve:
+            superior_balance = wallets.debit(db, current_user.id, sum((r.amount for r in rows), money.ZERO))
+            if superior_balance is None:
+                db.rollback()
+                raise HTTPException(status_code=402, detail="Superior has insufficient balance")
+            per_user = {}
+            for r in rows:
+                per_user[r.user_id] = per_user.get(r.user_id, money.ZERO) + r.amount
+            recipient_balances = wallets.credit_many(db, per_user)
+            names = dict(db.execute(select(models.User.id, models.User.first_name).where(models.User.id.in_(per_user))).all())
+            pt = models.PackageTransaction
+            created = db.execute(
+                insert(pt).values([
+                    {
+                        "sender_id": current_user.id,
+                        "receiver_id": r.user_id,
+                        "receiver_name": names.get(r.user_id),
+                        "sender_name": current_user.first_name,
+                        "package_amount": r.amount,
+                    }
+                    for r in rows
+                ]).returning(pt.id, pt.receiver_id, pt.package_amount)
+            ).all()
+            # RETURNING order is not guaranteed; packages with the same receiver and amount are interchangeable
+            by_key = {}
+            for tx in created:
+                by_key.setdefault((tx.receiver_id, tx.package_amount), []).append(tx.id)
+            transaction_ids = {r.id: by_key[(r.user_id, r.amount)].pop() for r in rows}
+            data["superior_balance"] = money.as_float(superior_balance)
+            data["recipient_balances"] = {uid: money.as_float(b) for uid, b in recipient_balances.items()}
+            data["transaction_ids"] = list(transaction_ids.values())
+        if approve:
+            push.notify(db, current_user.id, "balance_changed", balance=superior_balance)
+            for uid, balance in recipient_balances.items():
+                push.notify(db, uid, "balance_changed", balance=balance)
+        for r in rows:
+            if approve:
+                outbox.append(db, "credit_request.approved", request_id=r.id, transaction_id=transaction_ids[r.id],
+                              sender_id=current_user.id, receiver_id=r.user_id, amount=r.amount)
+                push.notify(db, r.user_id, "package_received", transaction_id=transaction_ids[r.id],
+                            sender_id=current_user.id, sender_name=current_user.first_name, amount=r.amount)
+            else:
+                outbox.append(db, "credit_request.rejected", request_id=r.id, user_id=r.user_id, superior_id=r.superior_id)
+        db.commit()
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not process action: {e.__class__.__name__}")
+
+    for r in rows:
+        if approve:
+            audit.emit("credit_request.approved", actor_id=current_user.id, target_id=r.user_id, request_id=r.id,
+                       transaction_id=transaction_ids[r.id], amount=r.amount)
+        else:
+            audit.emit("credit_request.rejected", actor_id=current_user.id, target_id=r.user_id, request_id=r.id)
+
+    return {"status": "success", "data": data}
+
+
+@router.put("/credit-requests/{request_id}/action", dependencies=[Depends(bulkhead.MONEY)])
 def credit_request_action(
     request_id: int,
     payload: schemas.ActionSchema,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(oauth2.get_current_user),
 ):
-    # Load credit request
-    cr = db.query(models.CreditRequest).filter(models.CreditRequest.id == request_id).first()
+    # Load credit request, locked so a concurrent single or bulk action waits for this one
+    cr = db.query(models.CreditRequest).filter(models.CreditRequest.id == request_id).with_for_update().first()
     if not cr:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Credit request not found")
 
@@ -340,57 +781,83 @@ def credit_request_action(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to act on this request")
 
     # Only allow action if request is pending
-    if cr.status not in ("PENDING", "REQUESTED", None):
+    if cr.status not in OPEN_CREDIT_STATUSES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request already processed")
+    if payload.action not in (schemas.CreditAction.APPROVE, schemas.CreditAction.REJECT):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid action")
+
+    # claim the request before any money moves: only one action can flip it out
+    # of an open status, even where the row lock above is a no-op (SQLite)
+    new_status = "APPROVED" if payload.action == schemas.CreditAction.APPROVE else "REJECTED"
+    claimed = db.execute(
+        update(models.CreditRequest)
+        .where(models.CreditRequest.id == cr.id, _open_credit_status(models.CreditRequest))
+        .values(status=new_status)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request already processed")
 
     # If REJECT simply update status
     try:
         if payload.action == schemas.CreditAction.REJECT:
-            cr.status = "REJECTED"
-            db.add(cr)
+            outbox.append(db, "credit_request.rejected", request_id=cr.id, user_id=cr.user_id, superior_id=cr.superior_id)
             db.commit()
             db.refresh(cr)
+            audit.emit("credit_request.rejected", actor_id=current_user.id, target_id=cr.user_id, request_id=cr.id)
             return {"status": cr.status}
 
         # For APPROVE, transfer funds
         if payload.action == schemas.CreditAction.APPROVE:
-            amount = float(cr.amount)
-
-            # check superior balance
-            superior = db.query(models.User).filter(models.User.id == current_user.id).with_for_update().one()
-            if float(getattr(superior, 'wallet_balance', 0.0) or 0.0) < amount:
-                raise HTTPException(status_code=402, detail="Superior has insufficient balance")
-
-            # fetch recipient and lock
-            recipient = db.query(models.User).filter(models.User.id == cr.user_id).with_for_update().one()
+            amount = cr.amount
 
-            # perform transfer
-            superior.wallet_balance = (superior.wallet_balance or 0.0) - amount
-            recipient.wallet_balance = (recipient.wallet_balance or 0.0) + amount
+            superior = current_user
+            recipient = db.query(models.User).filter(models.User.id == cr.user_id).one()
 
-            # update request status
-            cr.status = "APPROVED"
+            # perform transfer (the debit only applies if the superior's balance covers it)
+            superior_balance = wallets.debit(db, superior.id, amount)
+            if superior_balance is None:
+                # also releases the claim on the request
+                db.rollback()
+                raise HTTPException(status_code=402, detail="Superior has insufficient balance")
+            recipient_balance = wallets.credit(db, recipient.id, amount)
 
             # log package transaction
             tx = models.PackageTransaction(
                 sender_id=superior.id,
                 receiver_id=recipient.id,
-                receiver_name=recipient.name,
-                sender_name=superior.name,
-                package_amount=int(amount) if isinstance(amount, (int, float)) else amount,
+                receiver_name=recipient.first_name,
+                sender_name=superior.first_name,
+                package_amount=amount,
             )
             db.add(tx)
-            db.add(superior)
-            db.add(recipient)
-            db.add(cr)
+            db.flush()
+            outbox.append(db, "credit_request.approved", request_id=cr.id, transaction_id=tx.id,
+                          sender_id=superior.id, receiver_id=recipient.id, amount=amount)
+            push.notify(db, recipient.id, "package_received", transaction_id=tx.id, sender_id=superior.id,
+                        sender_name=superior.first_name, amount=amount)
+            push.notify(db, recipient.id, "balance_changed", balance=recipient_balance)
+            push.notify(db, superior.id, "balance_changed", balance=superior_balance)
 
             # commit changes explicitly as requested
             db.commit()
-            db.refresh(superior)
-            db.refresh(recipient)
             db.refresh(cr)
 
-            return {"status": cr.status, "superior_balance": float(superior.wallet_balance), "recipient_balance": float(recipient.wallet_balance)}
+            audit.emit(
+                "credit_request.approved",
+                actor_id=current_user.id,
+                target_id=recipient.id,
+                request_id=cr.id,
+                transaction_id=tx.id,
+                amount=amount,
+            )
+
+            return {
+                "status": cr.status,
+                "superior_balance": money.as_float(superior_balance),
+                "recipient_balance": money.as_float(recipient_balance),
+            }
 
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid action")
 
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import itertools
+from datetime import datetime, timezone
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+
 from sqlalchemy.orm import Session
 from app import models, oauth2, schemas
 from app import database
-from sqlalchemy import text
+from app.core import archive, audit, bulkhead, money, outbox, push, wallets
+from app.core import database as core_db
+from app.core.partitions import game_tx_since
+from app.core.responses import StreamingJSONResponse
+from sqlalchemy import Integer, cast, func, select, text, union
 from sqlalchemy.exc import ProgrammingError
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 
-@router.post("/send-package", status_code=status.HTTP_200_OK)
+@router.post("/send-package", status_code=status.HTTP_200_OK, dependencies=[Depends(bulkhead.MONEY)])
 def send_package(
     payload: schemas.SendPackageRequest,
     db: Session = Depends(database.get_db),
@@ -23,20 +36,13 @@ def send_package(
 
     # Owner can send without balance checks
     if current_user.role.value != "OWNER":
-        sender_balance = float(getattr(current_user, "wallet_balance", 0.0) or 0.0)
-        if sender_balance < payload.amount:
+        new_sender_balance = wallets.debit(db, current_user.id, payload.amount)
+        if new_sender_balance is None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient balance")
-
-        new_sender_balance = sender_balance - payload.amount
-        db.query(models.User).filter(models.User.id == current_user.id).update({"wallet_balance": new_sender_balance})
     else:
         new_sender_balance = "UNLIMITED"
 
-    receiver_balance = float(getattr(receiver, "wallet_balance", 0.0) or 0.0)
-    new_receiver_balance = receiver_balance + payload.amount
-    db.query(models.User).filter(models.User.id == receiver.id).update({"wallet_balance": new_receiver_balance})
-
-    db.commit()
+    new_receiver_balance = wallets.credit(db, receiver.id, payload.amount)
 
     new_tx = models.PackageTransaction(
         receiver_id=receiver.id,
@@ -46,22 +52,39 @@ def send_package(
         package_amount=payload.amount,
     )
     db.add(new_tx)
+    db.flush()
+    # committed with the balances and the package, or not at all
+    outbox.append(db, "package.sent", transaction_id=new_tx.id, sender_id=current_user.id,
+                  receiver_id=receiver.id, amount=payload.amount)
+    push.notify(db, receiver.id, "package_received", transaction_id=new_tx.id, sender_id=current_user.id,
+                sender_name=new_tx.sender_name, amount=payload.amount)
+    push.notify(db, receiver.id, "balance_changed", balance=new_receiver_balance)
+    if new_sender_balance != "UNLIMITED":
+        push.notify(db, current_user.id, "balance_changed", balance=new_sender_balance)
     db.commit()
     db.refresh(new_tx)
 
+    audit.emit(
+        "package.sent",
+        actor_id=current_user.id,
+        target_id=receiver.id,
+        transaction_id=new_tx.id,
+        amount=payload.amount,
+    )
+
     return {
         "status": "success",
         "message": "Package sent successfully",
         "data": {
             "transaction_id": f"TXN-{new_tx.id}",
             "transaction_id_num": new_tx.id,
-            "sender_new_balance": new_sender_balance,
-            "receiver_new_balance": new_receiver_balance,
+            "sender_new_balance": new_sender_balance if isinstance(new_sender_balance, str) else money.as_float(new_sender_balance),
+            "receiver_new_balance": money.as_float(new_receiver_balance),
         },
     }
 
 
-@router.post("/request-package", status_code=status.HTTP_200_OK)
+@router.post("/request-package", status_code=status.HTTP_200_OK, dependencies=[Depends(bulkhead.MONEY)])
 def request_package(
     payload: dict,
     db: Session = Depends(database.get_db),
@@ -70,32 +93,116 @@ def request_package(
     if current_user.role.value != "JESTER":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only Jester can request packages")
 
+    try:
+        amount = money.to_decimal(payload.get("amount", 0))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="amount must be a number")
+
     new_req = models.CreditRequest(
         user_id=current_user.id,
         superior_id=getattr(current_user, "superior_id", None),
-        amount=payload.get("amount", 0.0),
+        amount=amount,
         status="PENDING",
     )
     db.add(new_req)
+    db.flush()
+    push.notify(db, new_req.superior_id, "credit_request_created", request_id=new_req.id,
+                requester_id=current_user.id, amount=amount)
     db.commit()
     db.refresh(new_req)
 
+    audit.emit(
+        "credit_request.created",
+        actor_id=current_user.id,
+        target_id=new_req.superior_id,
+        request_id=new_req.id,
+        amount=new_req.amount,
+    )
+
     return {"status": "success", "message": "Request created", "data": {"request_id": new_req.id}}
 
 
-@router.get("", status_code=status.HTTP_200_OK)
+def package_transactions_query(
+    subs: Optional[List[int]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Package transactions touching any of `subs` (None => all) created in [start, end], newest first."""
+    pt = models.PackageTransaction
+    stmt = select(
+        pt.id,
+        pt.sender_id,
+        pt.receiver_id,
+        pt.sender_name,
+        pt.receiver_name,
+        func.coalesce(pt.package_amount, 0).label("amount"),
+        func.coalesce(pt.status, "COMPLETED").label("status"),
+        pt.created_at,
+    ).order_by(pt.created_at.desc())
+    if subs is not None:
+        # one index per side; an OR across sender and receiver reads the whole table
+        stmt = stmt.where(pt.id.in_(union(
+            select(pt.id).where(pt.receiver_id.in_(subs)),
+            select(pt.id).where(pt.sender_id.in_(subs)),
+        )))
+    if start is not None:
+        stmt = stmt.where(pt.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(pt.created_at <= end)
+    return stmt
+
+
+def game_transactions_query(
+    subs: Optional[List[int]] = None,
+    since: Optional[datetime] = None,
+    played_from: Optional[datetime] = None,
+    played_to: Optional[datetime] = None,
+):
+    """Game transactions played by any of `subs` (None => all), newest first.
+
+    `since` bounds `created_at` (partition pruning); `played_from`/`played_to`
+    filter on `played_at`.
+    """
+    gt = models.GameTransaction
+    stmt = select(
+        gt.id,
+        gt.jester_id,
+        gt.jester_name,
+        func.coalesce(gt.bet_amount, 0).label("bet_amount"),
+        cast(func.coalesce(gt.number_of_cards, 0), Integer).label("number_of_cards"),
+        gt.winning_pattern,
+        func.coalesce(gt.winner_payout, 0).label("winner_payout"),
+        gt.played_at,
+        gt.created_at,
+    ).order_by(gt.created_at.desc())
+    if subs is not None:
+        stmt = stmt.where(gt.jester_id.in_(subs))
+    if since is not None:
+        stmt = stmt.where(gt.created_at >= since)
+    if played_from is not None:
+        stmt = stmt.where(gt.played_at >= played_from)
+    if played_to is not None:
+        stmt = stmt.where(gt.played_at <= played_to)
+    return stmt
+
+
+@router.get("", status_code=status.HTTP_200_OK, dependencies=[Depends(bulkhead.REPORTS)])
 def list_transactions(
     type: str = None,
-    db: Session = Depends(database.get_db),
+    start: Optional[datetime] = Query(None, alias="from", description="played_at / created_at lower bound"),
+    end: Optional[datetime] = Query(None, alias="to", description="played_at / created_at upper bound"),
+    db: Session = Depends(database.get_read_db),
     current_user: models.User = Depends(oauth2.get_current_user),
 ):
+    start, end = archive.as_utc(start), archive.as_utc(end)
+
     # Determine the scope of jester ids to include based on role
     role_val = getattr(current_user.role, "value", str(current_user.role)).upper()
 
     if role_val == "OWNER":
         subs = None  # all
     elif role_val in ("MANAGER", "SUPERAGENT"):
-        subs = [u.id for u in db.query(models.User).filter(models.User.superior_id == current_user.id).all()]
+        subs = db.execute(select(models.User.id).where(models.User.superior_id == current_user.id)).scalars().all()
     else:
         # Jester
         subs = [current_user.id]
@@ -106,12 +213,12 @@ def list_transactions(
             "transaction_type": "PACKAGE",
             "sender_id": tx.sender_id,
             "receiver_id": tx.receiver_id,
-            "amount": float(tx.package_amount or 0.0),
-            "created_at": tx.created_at.isoformat() if hasattr(tx, "created_at") else None,
-            "status": tx.status or "COMPLETED",
+            "amount": money.as_float(tx.amount),
+            "created_at": tx.created_at.isoformat() if tx.created_at else None,
+            "status": tx.status,
             "extra": {
-                "sender_name": getattr(tx, "sender_name", None),
-                "receiver_name": getattr(tx, "receiver_name", None),
+                "sender_name": tx.sender_name,
+                "receiver_name": tx.receiver_name,
             },
         }
 
@@ -121,84 +228,126 @@ def list_transactions(
             "transaction_type": "GAME",
             "jester_id": tx.jester_id,
             "jester_name": tx.jester_name,
-            "bet_amount": float(tx.bet_amount or 0.0),
-            "number_of_cards": int(tx.number_of_cards or 0),
+            "bet_amount": money.as_float(tx.bet_amount),
+            "number_of_cards": tx.number_of_cards,
             "winning_pattern": tx.winning_pattern,
-            "winner_payout": float(tx.winner_payout or 0.0),
-            "created_at": tx.created_at.isoformat() if hasattr(tx, "created_at") else None,
+            "winner_payout": money.as_float(tx.winner_payout),
+            "played_at": tx.played_at.isoformat() if tx.played_at else None,
+            "created_at": tx.created_at.isoformat() if tx.created_at else None,
+        }
+
+    def serialize_game_fallback(t):
+        # rows from the raw fallback query carry no SQL-side defaults and
+        # amounts in raw minor units
+        return {
+            "id": t.get("id"),
+            "transaction_type": "GAME",
+            "jester_id": t.get("jester_id"),
+            "jester_name": t.get("jester_name"),
+            "bet_amount": money.as_float(money.from_minor(t.get("bet_amount") or 0)),
+            "number_of_cards": int(t.get("number_of_cards") or 0),
+            "winning_pattern": t.get("winning_pattern"),
+            "winner_payout": money.as_float(money.from_minor(t.get("winner_payout") or 0)),
+            "created_at": t.get("created_at"),
+        }
+
+    def serialize_archived_package(r):
+        # archived rows hold ISO timestamps and amounts in major units
+        return {
+            "id": r["id"],
+            "transaction_type": "PACKAGE",
+            "sender_id": r.get("sender_id"),
+            "receiver_id": r.get("receiver_id"),
+            "amount": float(r.get("package_amount") or 0),
+            "created_at": r.get("created_at"),
+            "status": r.get("status") or "COMPLETED",
+            "extra": {
+                "sender_name": r.get("sender_name"),
+                "receiver_name": r.get("receiver_name"),
+            },
+        }
+
+    def serialize_archived_game(r):
+        return {
+            "id": r["id"],
+            "transaction_type": "GAME",
+            "jester_id": r.get("jester_id"),
+            "jester_name": r.get("jester_name"),
+            "bet_amount": float(r.get("bet_amount") or 0),
+            "number_of_cards": int(r.get("number_of_cards") or 0),
+            "winning_pattern": r.get("winning_pattern"),
+            "winner_payout": float(r.get("winner_payout") or 0),
+            "played_at": r.get("played_at"),
+            "created_at": r.get("created_at"),
         }
 
+    scope = set(subs) if subs is not None else None
+    boundary = {t: archive.archived_through(t) for t in ("package_transactions", "game_transactions")}
+
+    def archived(table, range_start, range_end, keep):
+        # the part of the range already moved to the cold archive, newest first;
+        # archived rows are all older than the hot ones
+        rows = [r for r in archive.read_range(table, range_start, range_end, boundary[table]) if keep(r)]
+        return reversed(rows)
+
     # Helper to fetch package transactions scoped to `subs` (None => all)
     def get_package_txs():
-        if subs is None:
-            return db.query(models.PackageTransaction).order_by(models.PackageTransaction.created_at.desc()).all()
-        return db.query(models.PackageTransaction).filter(
-            (models.PackageTransaction.receiver_id.in_(subs)) | (models.PackageTransaction.sender_id.in_(subs))
-        ).order_by(models.PackageTransaction.created_at.desc()).all()
+        pt = models.PackageTransaction
+        stmt = package_transactions_query(subs, start, end)
+        if boundary["package_transactions"] is not None:
+            stmt = stmt.where(archive.hot_range_filter(pt.created_at, None, None, boundary["package_transactions"]))
+        hot = db.execute(stmt).all()
+        cold = archived("package_transactions", start, end, lambda r: scope is None
+                        or r.get("sender_id") in scope or r.get("receiver_id") in scope)
+        return itertools.chain(map(serialize_package, hot), map(serialize_archived_package, cold))
+
+    # Helper to fetch game transactions scoped to `subs` (None => all);
+    # the time bound lets PostgreSQL prune old game_transactions partitions
+    since = game_tx_since(start)
+
+    def played_in_range(r):
+        # from/to bound played_at, like the SQL query
+        played = archive.as_utc(r.get("played_at"))
+        if start is not None and (played is None or played < start):
+            return False
+        return end is None or (played is not None and played <= end)
 
-    # Helper to fetch game transactions scoped to `subs` (None => all)
     def get_game_txs():
-        if subs is None:
+        gt = models.GameTransaction
+        cold = archived("game_transactions", since, None,
+                        lambda r: (scope is None or r.get("jester_id") in scope) and played_in_range(r))
+        try:
+            stmt = game_transactions_query(subs, since, start, end)
+            if boundary["game_transactions"] is not None:
+                stmt = stmt.where(archive.hot_range_filter(gt.created_at, None, None, boundary["game_transactions"]))
+            hot = db.execute(stmt).all()
+            return itertools.chain(map(serialize_game, hot), map(serialize_archived_game, cold))
+        except ProgrammingError:
+            if subs is not None:
+                raise
             try:
-                return db.query(models.GameTransaction).order_by(models.GameTransaction.created_at.desc()).all()
-            except ProgrammingError:
-                try:
-                    db.rollback()
-                except Exception:
-                    pass
-                rows = db.execute(text(
-                    "SELECT * FROM game_transactions ORDER BY created_at DESC"
-                )).fetchall()
-                return [dict(r._mapping) for r in rows]
-        return db.query(models.GameTransaction).filter(models.GameTransaction.jester_id.in_(subs)).order_by(models.GameTransaction.created_at.desc()).all()
-
+                db.rollback()
+            except Exception:
+                pass
+            # legacy schema (e.g. played_at not migrated yet): range on created_at instead
+            rows = db.execute(text(
+                "SELECT * FROM game_transactions WHERE created_at >= :since "
+                "AND (:start IS NULL OR created_at >= :start) AND (:end IS NULL OR created_at <= :end) "
+                "ORDER BY created_at DESC"
+            ), {"since": since, "start": start, "end": end}).mappings().all()
+            return map(serialize_game_fallback, rows)
+
+    # Rows are fetched eagerly; serialization and encoding happen while streaming
     # Return only package transactions
     if type == "package":
-        pkg_txs = get_package_txs()
-        return {"status": "success", "data": [serialize_package(t) for t in pkg_txs]}
+        return StreamingJSONResponse(get_package_txs(), envelope={"status": "success"})
 
     # Return only game transactions
     if type == "game":
-        game_txs = get_game_txs()
-        # game_txs may be dict rows when using fallback raw query
-        result = []
-        for t in game_txs:
-            if isinstance(t, dict):
-                result.append({
-                    "id": t.get("id"),
-                    "transaction_type": "GAME",
-                    "jester_id": t.get("jester_id"),
-                    "jester_name": t.get("jester_name"),
-                    "bet_amount": float(t.get("bet_amount") or 0.0),
-                    "number_of_cards": int(t.get("number_of_cards") or 0),
-                    "winning_pattern": t.get("winning_pattern"),
-                    "winner_payout": float(t.get("winner_payout") or 0.0),
-                    "created_at": t.get("created_at"),
-                })
-            else:
-                result.append(serialize_game(t))
-        return {"status": "success", "data": result}
+        return StreamingJSONResponse(get_game_txs(), envelope={"status": "success"})
 
     # No type param -> return both package and game transactions merged chronologically
-    pkg_txs = get_package_txs()
-    game_txs = get_game_txs()
-
-    serialized = [serialize_package(t) for t in pkg_txs]
-    for t in game_txs:
-        if isinstance(t, dict):
-            serialized.append({
-                "id": t.get("id"),
-                "transaction_type": "GAME",
-                "jester_id": t.get("jester_id"),
-                "jester_name": t.get("jester_name"),
-                "bet_amount": float(t.get("bet_amount") or 0.0),
-                "number_of_cards": int(t.get("number_of_cards") or 0),
-                "winning_pattern": t.get("winning_pattern"),
-                    "winner_payout": float(t.get("winner_payout") or 0.0),
-                    "created_at": t.get("created_at"),
-            })
-        else:
-            serialized.append(serialize_game(t))
+    serialized = [*get_package_txs(), *get_game_txs()]
 
     # Optionally sort by created_at desc when present
     try:
@@ -206,10 +355,77 @@ def list_transactions(
     except Exception:
         pass
 
-    return {"status": "success", "data": serialized}
+    return StreamingJSONResponse(serialized, envelope={"status": "success"})
+
+
+EXPORT_TABLES = {"game": models.GameTransaction, "package": models.PackageTransaction}
+
+
+@router.get("/export", dependencies=[Depends(bulkhead.REPORTS)])
+def export_transactions(
+    type: str = "game",
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    format: str = "ndjson",
+    current_user: models.User = Depends(oauth2.RoleChecker(["OWNER"])),
+):
+    """Stream every transaction in [from, to], oldest first, as NDJSON or CSV.
+
+    Rows already moved to the cold archive are read from its files, the rest
+    from the database, so a range reaching back past the archive horizon
+    is served in full.
+    """
+    model = EXPORT_TABLES.get(type)
+    if model is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="type must be 'game' or 'package'")
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format must be 'ndjson' or 'csv'")
+    table = model.__table__
+    table_name = table.name
+
+    def iter_rows():
+        through = archive.archived_through(table_name)
+        yield from archive.read_range(table_name, start, end, through)
+        # own session: the request's dependencies are closed before streaming ends
+        db = (core_db.ReadSessionLocal or core_db.SessionLocal)()
+        try:
+            stmt = (
+                select(table)
+                .where(archive.hot_range_filter(table.c.created_at, start, end, through))
+                .order_by(table.c.created_at, table.c.id)
+                .execution_options(yield_per=1000)
+            )
+            for row in db.execute(stmt).mappings():
+                yield archive.encode_row(row)
+        finally:
+            db.close()
+
+    def iter_ndjson():
+        for row in iter_rows():
+            yield orjson.dumps(row) + b"\n"
+
+    def iter_csv():
+        columns = [c.name for c in table.columns]
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for row in iter_rows():
+            writer.writerow(row)
+            if buf.tell() >= 64 * 1024:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    filename = f"{table_name}.{format}"
+    return StreamingResponse(
+        iter_csv() if format == "csv" else iter_ndjson(),
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
-@router.post("/revert", status_code=status.HTTP_200_OK)
+@router.post("/revert", status_code=status.HTTP_200_OK, dependencies=[Depends(bulkhead.MONEY)])
 def revert_transaction(
     payload: dict,
     db: Session = Depends(database.get_db),
@@ -242,7 +458,7 @@ def revert_transaction(
     if not (tx.sender_id == current_user.id or is_owner):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only sender or OWNER can revert this transaction")
 
-    amount = float(tx.package_amount or 0.0)
+    amount = tx.package_amount or money.ZERO
 
     try:
         from sqlalchemy.exc import InvalidRequestError
@@ -253,47 +469,26 @@ def revert_transaction(
             txn = db.begin_nested()
 
         with txn:
-            # If OWNER is reverting, move funds from receiver -> OWNER (current_user)
-            if is_owner and tx.sender_id != current_user.id:
-                receiver = db.query(models.User).filter(models.User.id == tx.receiver_id).with_for_update().one()
-                owner = db.query(models.User).filter(models.User.id == current_user.id).with_for_update().one()
-
-                recv_balance = float(getattr(receiver, "wallet_balance", 0.0) or 0.0)
-                if recv_balance < amount:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Receiver has insufficient funds to revert")
-
-                # subtract from receiver
-                # subtract from receiver's wallet_balance
-                receiver.wallet_balance = recv_balance - amount
-
-                # add to owner
-                owner_balance = float(getattr(owner, "wallet_balance", 0.0) or 0.0)
-                owner.wallet_balance = owner_balance + amount
-
-                db.add(receiver)
-                db.add(owner)
-
-            else:
-                # Sender-initiated revert: transfer from receiver back to sender
-                sender = db.query(models.User).filter(models.User.id == tx.sender_id).with_for_update().one()
-                receiver = db.query(models.User).filter(models.User.id == tx.receiver_id).with_for_update().one()
-
-                recv_balance = float(getattr(receiver, "wallet_balance", 0.0) or 0.0)
-                if recv_balance < amount:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Receiver has insufficient funds to revert")
-
-                # perform reversal
-                receiver.wallet_balance = recv_balance - amount
-
-                sender_balance = float(getattr(sender, "wallet_balance", 0.0) or 0.0)
-                sender.wallet_balance = sender_balance + amount
-
-                db.add(sender)
-                db.add(receiver)
+            # If OWNER is reverting, move funds from receiver -> OWNER (current_user);
+            # otherwise it is a sender-initiated revert: receiver back to sender
+            refund_to = current_user.id if is_owner and tx.sender_id != current_user.id else tx.sender_id
+
+            receiver_balance = wallets.debit(db, tx.receiver_id, amount)
+            if receiver_balance is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Receiver has insufficient funds to revert")
+            refund_balance = wallets.credit(db, refund_to, amount)
+            push.notify(db, tx.receiver_id, "balance_changed", balance=receiver_balance)
+            if not is_owner or refund_to != current_user.id:
+                # an owner's balance reads UNLIMITED
+                push.notify(db, refund_to, "balance_changed", balance=refund_balance)
 
             # mark original transaction as REVERTED
             tx.status = "REVERTED"
+            tx.refund_to = refund_to
+            tx.reverted_at = datetime.now(timezone.utc)
             db.add(tx)
+            outbox.append(db, "package.reverted", transaction_id=tx.id, sender_id=tx.sender_id,
+                          receiver_id=tx.receiver_id, refund_to=refund_to, amount=amount)
 
         # Ensure changes are committed to the database and refreshed
         try:
@@ -309,16 +504,19 @@ def revert_transaction(
         # Refresh objects so the returned response reflects current DB state
         try:
             db.refresh(tx)
-            if is_owner and tx.sender_id != current_user.id:
-                db.refresh(owner)
-                db.refresh(receiver)
-            else:
-                db.refresh(sender)
-                db.refresh(receiver)
         except Exception:
             # ignore refresh errors but changes should be persisted
             pass
 
+        audit.emit(
+            "package.reverted",
+            actor_id=current_user.id,
+            target_id=tx.receiver_id,
+            transaction_id=tx.id,
+            amount=amount,
+            by_owner=is_owner and tx.sender_id != current_user.id,
+        )
+
         return {"status": "success", "message": "Transaction reverted", "data": {"transaction_id": f"TXN-{tx.id}", "transaction_id_num": tx.id}}
     except HTTPException:
         raise
@@ -2,15 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
-from app.database import get_db
+from app.database import get_read_db
 from app import models, oauth2, schemas
+from app.core import bulkhead, wallets
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-@router.get("/me")
+@router.get("/me", dependencies=[Depends(bulkhead.REPORTS)])
 def fetch_current_user_profile(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(oauth2.get_current_user),
 ):
     if not current_user:
@@ -27,7 +28,7 @@ def fetch_current_user_profile(
     }
 
     # wallet balance
-    wallet_balance = float(getattr(current_user, "wallet_balance", 0.0) or 0.0)
+    wallet_balance = wallets.balance(db, current_user.id)
 
     # total sent and received from package transactions
     total_sent = db.query(func.coalesce(func.sum(models.PackageTransaction.package_amount), 0)).filter(models.PackageTransaction.sender_id == current_user.id).scalar() or 0.0
@@ -5,6 +5,7 @@ from pydantic import EmailStr, Field
 from datetime import datetime
 import enum
 from app.models import Role
+from app.core.money import ZERO, Amount
 
 
 class IntList(BaseModel):
@@ -152,7 +153,7 @@ class TransactionOut(BaseModel):
 
 class GameStartRequest(BaseModel):
     selected_card_numbers: List[int]
-    bet_amount_per_card: float
+    bet_amount_per_card: Amount
 
 
 class GameStartResponse(BaseModel):
@@ -171,16 +172,16 @@ class GameResultStatus(str, enum.Enum):
 class GameResultRequest(BaseModel):
     game_session_id: int
     status: GameResultStatus
-    win_amount: float = 0.0
+    win_amount: Amount = ZERO
     winning_pattern: Optional[str] = None
 
 
 class EndGameRequest(BaseModel):
-    total_pot: float
-    cut: float
+    total_pot: Amount
+    cut: Amount
     winning_pattern: str
-    win_amount: float
-    bet_amount: float
+    win_amount: Amount
+    bet_amount: Amount
     date: str
     time: str
     jester_name: str
@@ -210,7 +211,7 @@ class CreateMemberSchema(BaseModel):
 
 class TransferRequest(BaseModel):
     recipient_id: int
-    amount: float
+    amount: Amount
 
 
 class TransferResponse(BaseModel):
@@ -233,6 +234,11 @@ class ActionSchema(BaseModel):
         from_attributes = True
 
 
+class BulkActionSchema(BaseModel):
+    action: CreditAction
+    request_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
 class RevokeRequest(BaseModel):
     transaction_id: int
 
@@ -281,7 +287,7 @@ class CreateUserResponse(BaseModel):
 
 class SendPackageRequest(BaseModel):
     receiver_id: int
-    amount: float
+    amount: Amount
 
 
 class SendPackageResponse(BaseModel):
@@ -1,7 +1,21 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# below this many passwords, starting worker processes costs more than it saves
+_PARALLEL_HASH_MIN = 16
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
 
 def hash_password(password: str):
     return pwd_context.hash(password)
@@ -9,3 +23,30 @@ def hash_password(password: str):
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+            # spawn: forking a worker that already runs threads can deadlock the child
+            _hash_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _hash_pool
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash many passwords across a process pool (bcrypt is CPU-bound and holds the GIL)."""
+    if len(passwords) < _PARALLEL_HASH_MIN:
+        return [hash_password(p) for p in passwords]
+    pool = _get_hash_pool()
+    chunksize = max(1, len(passwords) // (pool._max_workers * 4))
+    return list(pool.map(hash_password, passwords, chunksize=chunksize))
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=True)
+            _hash_pool = None
@@ -0,0 +1,73 @@
+"""Alembic environment: runs revisions against settings.DATABASE_URL.
+
+Each revision runs in its own transaction (so a failure leaves earlier ones
+applied) with the session `lock_timeout` from MIGRATION_LOCK_TIMEOUT_MS: a
+migration that cannot get its lock fails fast instead of blocking writes.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app import models  # noqa: F401  registers every table on Base.metadata
+from app.core import online_migrations, user_search
+from app.core.config import settings
+from app.database import Base
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+target_metadata = Base.metadata
+
+# created by scripts/partition_game_transactions.py and online_migrations,
+# not by models
+_UNMANAGED_PREFIXES = ("game_transactions_y", online_migrations.PROGRESS_TABLE)
+
+
+def _database_url() -> str:
+    return (
+        context.get_x_argument(as_dictionary=True).get("url")
+        or config.get_main_option("sqlalchemy.url")
+        or settings.DATABASE_URL
+    )
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "table":
+        return not (name or "").startswith(_UNMANAGED_PREFIXES)
+    if type_ == "index":
+        # expression/operator-class indexes that autogenerate cannot compare
+        return name not in user_search.PG_INDEXES
+    return True
+
+
+def _configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        include_name=include_name,
+        transaction_per_migration=True,
+        compare_type=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    _configure(url=_database_url(), literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    engine = create_engine(_database_url(), poolclass=NullPool)
+    with engine.connect() as connection:
+        online_migrations.set_lock_timeout(connection)
+        _configure(connection=connection, render_as_batch=connection.dialect.name == "sqlite")
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
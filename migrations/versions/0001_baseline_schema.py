@@ -0,0 +1,281 @@
+"""baseline schema
+
+The schema as of the switch to Alembic. Databases that already have it
+(created with create_all and the scripts/ migration helpers) are adopted
+with `alembic stamp 0001` instead of running this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 15:36:48.089858
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # users and bingo_cards reference each other, so users -> bingo_cards is
+    # added once both tables exist. SQLite cannot ALTER constraints but does
+    # not check the target at CREATE time, so it gets the FK inline.
+    sqlite = op.get_context().dialect.name == "sqlite"
+    card_fk = sa.ForeignKeyConstraint(
+        ['bingo_card_code'], ['bingo_cards.id'], name='users_bingo_card_code_fkey', ondelete='CASCADE'
+    )
+    op.create_table('analytics_daily',
+    sa.Column('bucket', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('manager_id', sa.Integer(), nullable=False),
+    sa.Column('city', sa.String(), nullable=False),
+    sa.Column('region', sa.String(), nullable=False),
+    sa.Column('game_count', sa.Integer(), nullable=False),
+    sa.Column('bet_total', sa.Float(), nullable=False),
+    sa.Column('pot_total', sa.Float(), nullable=False),
+    sa.Column('cut_total', sa.Float(), nullable=False),
+    sa.Column('payout_total', sa.Float(), nullable=False),
+    sa.Column('package_count', sa.Integer(), nullable=False),
+    sa.Column('package_total', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket', 'manager_id', 'city', 'region')
+    )
+    op.create_table('analytics_hourly',
+    sa.Column('bucket', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('manager_id', sa.Integer(), nullable=False),
+    sa.Column('city', sa.String(), nullable=False),
+    sa.Column('region', sa.String(), nullable=False),
+    sa.Column('game_count', sa.Integer(), nullable=False),
+    sa.Column('bet_total', sa.Float(), nullable=False),
+    sa.Column('pot_total', sa.Float(), nullable=False),
+    sa.Column('cut_total', sa.Float(), nullable=False),
+    sa.Column('payout_total', sa.Float(), nullable=False),
+    sa.Column('package_count', sa.Integer(), nullable=False),
+    sa.Column('package_total', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket', 'manager_id', 'city', 'region')
+    )
+    op.create_table('audit_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ts', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('target_id', sa.Integer(), nullable=True),
+    sa.Column('endpoint', sa.String(), nullable=True),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_events_action'), 'audit_events', ['action'], unique=False)
+    op.create_index(op.f('ix_audit_events_actor_id'), 'audit_events', ['actor_id'], unique=False)
+    op.create_index(op.f('ix_audit_events_id'), 'audit_events', ['id'], unique=False)
+    op.create_index(op.f('ix_audit_events_ts'), 'audit_events', ['ts'], unique=False)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('first_name', sa.String(), nullable=True),
+    sa.Column('last_name', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=False),
+    sa.Column('phone_number', sa.String(), nullable=True),
+    sa.Column('password', sa.String(), nullable=False),
+    sa.Column('gender', sa.String(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('region', sa.String(), nullable=True),
+    sa.Column('role', sa.Enum('OWNER', 'MANAGER', 'SUPERAGENT', 'JESTER', name='role'), nullable=False),
+    sa.Column('wallet_balance', sa.Float(), nullable=False),
+    sa.Column('profile_picture', sa.String(), nullable=True),
+    sa.Column('superior_id', sa.Integer(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('bingo_card_code', sa.String(length=6), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('(now())'), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['parent_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['superior_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    *([card_fk] if sqlite else [])
+    )
+    op.create_index(op.f('ix_users_city'), 'users', ['city'], unique=False)
+    op.create_index(op.f('ix_users_created_by'), 'users', ['created_by'], unique=False)
+    op.create_index(op.f('ix_users_first_name'), 'users', ['first_name'], unique=False)
+    op.create_index(op.f('ix_users_gender'), 'users', ['gender'], unique=False)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_last_name'), 'users', ['last_name'], unique=False)
+    op.create_index(op.f('ix_users_password'), 'users', ['password'], unique=False)
+    op.create_index(op.f('ix_users_phone'), 'users', ['phone'], unique=True)
+    op.create_index(op.f('ix_users_phone_number'), 'users', ['phone_number'], unique=True)
+    op.create_index(op.f('ix_users_region'), 'users', ['region'], unique=False)
+    op.create_index(op.f('ix_users_role'), 'users', ['role'], unique=False)
+    op.create_index(op.f('ix_users_superior_id'), 'users', ['superior_id'], unique=False)
+    op.create_index(op.f('ix_users_wallet_balance'), 'users', ['wallet_balance'], unique=False)
+
+    op.create_table('bingo_cards',
+    sa.Column('id', sa.String(length=6), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('card_data', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('(now())'), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_bingo_cards_id'), 'bingo_cards', ['id'], unique=False)
+
+    if not sqlite:
+        op.create_foreign_key('users_bingo_card_code_fkey', 'users', 'bingo_cards', ['bingo_card_code'], ['id'], ondelete='CASCADE')
+
+    op.create_table('credit_requests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('superior_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('(now())'), nullable=False),
+    sa.ForeignKeyConstraint(['superior_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_credit_requests_id'), 'credit_requests', ['id'], unique=False)
+    op.create_index(op.f('ix_credit_requests_status'), 'credit_requests', ['status'], unique=False)
+
+    op.create_table('game_sessions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('bet_amount_per_card', sa.Float(), nullable=False),
+    sa.Column('total_bet', sa.Float(), nullable=False),
+    sa.Column('selected_cards', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('total_pot', sa.Float(), nullable=True),
+    sa.Column('house_cut', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('(now())'), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_game_sessions_id'), 'game_sessions', ['id'], unique=False)
+    op.create_index(op.f('ix_game_sessions_status'), 'game_sessions', ['status'], unique=False)
+
+    op.create_table('game_transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('bet_amount', sa.Float(), nullable=True),
+    sa.Column('winning_pattern', sa.String(), nullable=True),
+    sa.Column('number_of_cards', sa.Integer(), nullable=True),
+    sa.Column('cut_amount', sa.Float(), nullable=True),
+    sa.Column('winner_payout', sa.Float(), nullable=True),
+    sa.Column('total_pot', sa.Float(), nullable=True),
+    sa.Column('dedacted_amount', sa.Float(), nullable=True),
+    sa.Column('jester_id', sa.Integer(), nullable=True),
+    sa.Column('jester_name', sa.String(), nullable=True),
+    sa.Column('jester_remaining_balance', sa.Float(), nullable=True),
+    sa.Column('tx_date', sa.String(), nullable=True),
+    sa.Column('tx_time', sa.String(), nullable=True),
+    sa.Column('played_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('total_balance', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('(now())'), nullable=False),
+    sa.ForeignKeyConstraint(['jester_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_game_transactions_bet_amount'), 'game_transactions', ['bet_amount'], unique=False)
+    op.create_index(op.f('ix_game_transactions_cut_amount'), 'game_transactions', ['cut_amount'], unique=False)
+    op.create_index(op.f('ix_game_transactions_dedacted_amount'), 'game_transactions', ['dedacted_amount'], unique=False)
+    op.create_index(op.f('ix_game_transactions_id'), 'game_transactions', ['id'], unique=False)
+    op.create_index('ix_game_transactions_jester_created', 'game_transactions', ['jester_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_game_transactions_jester_name'), 'game_transactions', ['jester_name'], unique=False)
+    op.create_index('ix_game_transactions_jester_played', 'game_transactions', ['jester_id', 'played_at'], unique=False)
+    op.create_index(op.f('ix_game_transactions_jester_remaining_balance'), 'game_transactions', ['jester_remaining_balance'], unique=False)
+    op.create_index(op.f('ix_game_transactions_number_of_cards'), 'game_transactions', ['number_of_cards'], unique=False)
+    op.create_index(op.f('ix_game_transactions_total_balance'), 'game_transactions', ['total_balance'], unique=False)
+    op.create_index(op.f('ix_game_transactions_total_pot'), 'game_transactions', ['total_pot'], unique=False)
+    op.create_index(op.f('ix_game_transactions_tx_date'), 'game_transactions', ['tx_date'], unique=False)
+    op.create_index(op.f('ix_game_transactions_tx_time'), 'game_transactions', ['tx_time'], unique=False)
+    op.create_index(op.f('ix_game_transactions_winner_payout'), 'game_transactions', ['winner_payout'], unique=False)
+    op.create_index(op.f('ix_game_transactions_winning_pattern'), 'game_transactions', ['winning_pattern'], unique=False)
+
+    op.create_table('package_transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sender_id', sa.Integer(), nullable=False),
+    sa.Column('receiver_id', sa.Integer(), nullable=False),
+    sa.Column('receiver_name', sa.String(), nullable=True),
+    sa.Column('sender_name', sa.String(), nullable=True),
+    sa.Column('package_amount', sa.Float(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('(now())'), nullable=False),
+    sa.ForeignKeyConstraint(['receiver_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_package_transactions_id'), 'package_transactions', ['id'], unique=False)
+    op.create_index(op.f('ix_package_transactions_package_amount'), 'package_transactions', ['package_amount'], unique=False)
+    op.create_index('ix_package_transactions_receiver_created', 'package_transactions', ['receiver_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_package_transactions_receiver_name'), 'package_transactions', ['receiver_name'], unique=False)
+    op.create_index('ix_package_transactions_sender_created', 'package_transactions', ['sender_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_package_transactions_sender_name'), 'package_transactions', ['sender_name'], unique=False)
+    op.create_index(op.f('ix_package_transactions_status'), 'package_transactions', ['status'], unique=False)
+
+    op.create_table('stored_data',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stored_data_id'), 'stored_data', ['id'], unique=False)
+
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_stored_data_id'), table_name='stored_data')
+    op.drop_table('stored_data')
+    op.drop_index(op.f('ix_package_transactions_status'), table_name='package_transactions')
+    op.drop_index(op.f('ix_package_transactions_sender_name'), table_name='package_transactions')
+    op.drop_index('ix_package_transactions_sender_created', table_name='package_transactions')
+    op.drop_index(op.f('ix_package_transactions_receiver_name'), table_name='package_transactions')
+    op.drop_index('ix_package_transactions_receiver_created', table_name='package_transactions')
+    op.drop_index(op.f('ix_package_transactions_package_amount'), table_name='package_transactions')
+    op.drop_index(op.f('ix_package_transactions_id'), table_name='package_transactions')
+    op.drop_table('package_transactions')
+    op.drop_index(op.f('ix_game_transactions_winning_pattern'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_winner_payout'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_tx_time'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_tx_date'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_total_pot'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_total_balance'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_number_of_cards'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_jester_remaining_balance'), table_name='game_transactions')
+    op.drop_index('ix_game_transactions_jester_played', table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_jester_name'), table_name='game_transactions')
+    op.drop_index('ix_game_transactions_jester_created', table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_id'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_dedacted_amount'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_cut_amount'), table_name='game_transactions')
+    op.drop_index(op.f('ix_game_transactions_bet_amount'), table_name='game_transactions')
+    op.drop_table('game_transactions')
+    op.drop_index(op.f('ix_game_sessions_status'), table_name='game_sessions')
+    op.drop_index(op.f('ix_game_sessions_id'), table_name='game_sessions')
+    op.drop_table('game_sessions')
+    op.drop_index(op.f('ix_credit_requests_status'), table_name='credit_requests')
+    op.drop_index(op.f('ix_credit_requests_id'), table_name='credit_requests')
+    op.drop_table('credit_requests')
+    if op.get_context().dialect.name != "sqlite":
+        op.drop_constraint('users_bingo_card_code_fkey', 'users', type_='foreignkey')
+    op.drop_index(op.f('ix_bingo_cards_id'), table_name='bingo_cards')
+    op.drop_table('bingo_cards')
+    op.drop_index(op.f('ix_users_wallet_balance'), table_name='users')
+    op.drop_index(op.f('ix_users_superior_id'), table_name='users')
+    op.drop_index(op.f('ix_users_role'), table_name='users')
+    op.drop_index(op.f('ix_users_region'), table_name='users')
+    op.drop_index(op.f('ix_users_phone_number'), table_name='users')
+    op.drop_index(op.f('ix_users_phone'), table_name='users')
+    op.drop_index(op.f('ix_users_password'), table_name='users')
+    op.drop_index(op.f('ix_users_last_name'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_gender'), table_name='users')
+    op.drop_index(op.f('ix_users_first_name'), table_name='users')
+    op.drop_index(op.f('ix_users_created_by'), table_name='users')
+    op.drop_index(op.f('ix_users_city'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_audit_events_ts'), table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_id'), table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_actor_id'), table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_action'), table_name='audit_events')
+    op.drop_table('audit_events')
+    op.drop_table('analytics_hourly')
+    op.drop_table('analytics_daily')
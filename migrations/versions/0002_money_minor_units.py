@@ -0,0 +1,141 @@
+"""money columns as BIGINT minor units
+
+Float amounts become exact BIGINT cent counts (app.core.money.Money).
+
+PostgreSQL converts each table online:
+
+  1. ADD COLUMN <col>_minor BIGINT for every money column (metadata only)
+  2. a BEFORE INSERT OR UPDATE trigger keeps <col>_minor = round(<col> * 100)
+     for rows the running release writes meanwhile
+  3. <col>_minor is backfilled in primary-key batches (resumable)
+  4. one short statement batch under lock_timeout drops the trigger and the
+     float columns and renames <col>_minor to <col>
+  5. NOT NULL is restored through a validated check constraint and the
+     column indexes are rebuilt CONCURRENTLY
+
+Roll out the release that reads `Money` as soon as step 4 has run: workers
+still on the float code would write major units into the BIGINT columns.
+
+SQLite (dev/test) rewrites each table with batch_alter_table.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 17:02:11.514270
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core import online_migrations as online
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (batching key, [(column, nullable, indexed)])
+MONEY_COLUMNS = {
+    'users': ('id', [('wallet_balance', False, True)]),
+    'game_transactions': ('id', [
+        ('bet_amount', True, True),
+        ('cut_amount', True, True),
+        ('winner_payout', True, True),
+        ('total_pot', True, True),
+        ('dedacted_amount', True, True),
+        ('jester_remaining_balance', True, True),
+        ('total_balance', True, True),
+    ]),
+    'package_transactions': ('id', [('package_amount', True, True)]),
+    'game_sessions': ('id', [
+        ('bet_amount_per_card', False, False),
+        ('total_bet', False, False),
+        ('total_pot', True, False),
+        ('house_cut', True, False),
+    ]),
+    'credit_requests': ('id', [('amount', False, False)]),
+    # small rollups keyed by (bucket, dimensions): one UPDATE each
+    'analytics_hourly': (None, [(c, False, False) for c in ('bet_total', 'pot_total', 'cut_total', 'payout_total', 'package_total')]),
+    'analytics_daily': (None, [(c, False, False) for c in ('bet_total', 'pot_total', 'cut_total', 'payout_total', 'package_total')]),
+}
+
+
+def _converted(conn, table, column) -> bool:
+    for c in sa.inspect(conn).get_columns(table):
+        if c['name'] == column:
+            return isinstance(c['type'], sa.Integer)
+    return False
+
+
+def _convert_postgres(conn, table, pk, columns) -> None:
+    names = [c for c, _, _ in columns]
+    if all(_converted(conn, table, c) for c in names):
+        return
+    for name in names:
+        online.add_column(conn, table, sa.Column(f'{name}_minor', sa.BigInteger, nullable=True))
+
+    sync = f'{table}_money_minor'
+    assignments = ' '.join(f'NEW.{c}_minor := round(NEW.{c} * 100);' for c in names)
+    online.execute(conn, f'CREATE OR REPLACE FUNCTION {sync}() RETURNS trigger AS $$ BEGIN {assignments} RETURN NEW; END $$ LANGUAGE plpgsql')
+    online.execute(conn, f'DROP TRIGGER IF EXISTS {sync} ON {table}')
+    online.execute(conn, f'CREATE TRIGGER {sync} BEFORE INSERT OR UPDATE ON {table} FOR EACH ROW EXECUTE FUNCTION {sync}()')
+
+    values = {f'{c}_minor': sa.func.round(sa.column(c) * 100) for c in names}
+    pending = sa.or_(*(sa.and_(sa.column(f'{c}_minor').is_(None), sa.column(c).isnot(None)) for c in names))
+    if pk:
+        online.backfill(conn, f'0002_{table}_minor', table, values, where=pending, pk=pk)
+    else:
+        t = sa.table(table, *(sa.column(c) for c in names), *(sa.column(f'{c}_minor') for c in names))
+        online.execute(conn, sa.update(t).values(values).where(pending))
+
+    # one simple-protocol query string runs as a single implicit transaction,
+    # so the swap is atomic and retried as a whole on lock timeout
+    swap = [f'DROP TRIGGER IF EXISTS {sync} ON {table}']
+    for name in names:
+        swap.append(f'ALTER TABLE {table} DROP COLUMN {name}')
+        swap.append(f'ALTER TABLE {table} RENAME COLUMN {name}_minor TO {name}')
+    online.execute(conn, '; '.join(swap))
+    online.execute(conn, f'DROP FUNCTION IF EXISTS {sync}()')
+
+    for name, nullable, indexed in columns:
+        if not nullable:
+            online.set_not_null(conn, table, name)
+        if indexed:
+            online.create_index(conn, f'ix_{table}_{name}', table, [name])
+
+
+def _convert_sqlite(table, columns, to_minor: bool) -> None:
+    old, new = (sa.Float(), sa.BigInteger()) if to_minor else (sa.BigInteger(), sa.Float())
+    expr = 'ROUND({c} * 100)' if to_minor else '{c} / 100.0'
+    scale = f"UPDATE {table} SET " + ', '.join(f'{c} = {expr.format(c=c)}' for c, _, _ in columns)
+    # the table copy CASTs to the new type, so scale while the column is REAL
+    if to_minor:
+        op.execute(scale)
+    with op.batch_alter_table(table) as batch_op:
+        for name, nullable, _ in columns:
+            batch_op.alter_column(name, existing_type=old, type_=new, existing_nullable=nullable)
+    if not to_minor:
+        op.execute(scale)
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        with online.autocommit() as conn:
+            for table, (pk, columns) in MONEY_COLUMNS.items():
+                _convert_postgres(conn, table, pk, columns)
+    else:
+        for table, (_, columns) in MONEY_COLUMNS.items():
+            _convert_sqlite(table, columns, to_minor=True)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        # rollback path only: rewrites each table under its lock
+        for table, (_, columns) in MONEY_COLUMNS.items():
+            for name, _, _ in columns:
+                op.execute(f'ALTER TABLE {table} ALTER COLUMN {name} TYPE DOUBLE PRECISION USING {name} / 100.0')
+    else:
+        for table, (_, columns) in MONEY_COLUMNS.items():
+            _convert_sqlite(table, columns, to_minor=False)
@@ -0,0 +1,97 @@
+"""wallets table (expand)
+
+Creates `wallets(user_id, balance, version)` and copies every balance out of
+`users.wallet_balance`. The column stays until 0004, so this revision can run
+while the previous release is serving:
+
+  - on PostgreSQL a trigger on `users` mirrors balance writes of that release
+    into `wallets` until the release reading `wallets` is rolled out. The
+    new release changes `wallets` by deltas and never touches
+    `users.wallet_balance`, so from then on the column is a stale total; the
+    trigger therefore applies `NEW - OLD` of each old-release write as a
+    delta and never copies the absolute value over the wallet
+  - `users.wallet_balance` gets DEFAULT 0, since the new release no longer
+    sets it on INSERT
+
+Run 0004 (contract) once no process writes `users.wallet_balance` any more.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 18:11:40.201734
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core import online_migrations as online
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNC = 'users_wallet_balance_sync'
+
+
+def upgrade() -> None:
+    op.create_table('wallets',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.BigInteger(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    if op.get_context().dialect.name != 'postgresql':
+        op.execute('INSERT INTO wallets (user_id, balance, version) SELECT id, wallet_balance, 1 FROM users')
+        return
+
+    with online.autocommit() as conn:
+        # room on each page for the next version of a row (HOT updates)
+        online.execute(conn, 'ALTER TABLE wallets SET (fillfactor = 70)')
+        online.execute(conn, 'ALTER TABLE users ALTER COLUMN wallet_balance SET DEFAULT 0')
+        # inserts of the new release leave the column at 0 and open the
+        # wallet themselves, so only non-zero inserts are mirrored. An update
+        # adds its delta; a wallet not copied yet starts from the new total.
+        online.execute(conn, f"""
+            CREATE OR REPLACE FUNCTION {SYNC}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    IF NEW.wallet_balance <> 0 THEN
+                        INSERT INTO wallets (user_id, balance, version) VALUES (NEW.id, NEW.wallet_balance, 1)
+                        ON CONFLICT (user_id) DO UPDATE SET balance = wallets.balance + EXCLUDED.balance,
+                                                            version = wallets.version + 1;
+                    END IF;
+                ELSIF NEW.wallet_balance IS DISTINCT FROM OLD.wallet_balance THEN
+                    INSERT INTO wallets (user_id, balance, version) VALUES (NEW.id, NEW.wallet_balance, 1)
+                    ON CONFLICT (user_id) DO UPDATE
+                    SET balance = wallets.balance + (NEW.wallet_balance - COALESCE(OLD.wallet_balance, 0)),
+                        version = wallets.version + 1;
+                END IF;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql
+        """)
+        online.execute(conn, f'DROP TRIGGER IF EXISTS {SYNC} ON users')
+        online.execute(conn, f'CREATE TRIGGER {SYNC} AFTER INSERT OR UPDATE OF wallet_balance ON users FOR EACH ROW EXECUTE FUNCTION {SYNC}()')
+
+        # copy in id ranges; rows the trigger already mirrored are newer and kept
+        lo, hi = conn.execute(sa.text('SELECT min(id), max(id) FROM users')).one()
+        step = settings.MIGRATION_BATCH_SIZE
+        while lo is not None and lo <= hi:
+            online.execute(conn, sa.text(
+                'INSERT INTO wallets (user_id, balance, version) '
+                'SELECT id, wallet_balance, 1 FROM users WHERE id >= :lo AND id < :hi '
+                'ON CONFLICT (user_id) DO NOTHING'
+            ).bindparams(lo=lo, hi=lo + step))
+            lo += step
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute(f'DROP TRIGGER IF EXISTS {SYNC} ON users')
+        op.execute(f'DROP FUNCTION IF EXISTS {SYNC}()')
+        op.execute('ALTER TABLE users ALTER COLUMN wallet_balance DROP DEFAULT')
+    op.drop_table('wallets')
@@ -0,0 +1,46 @@
+"""drop users.wallet_balance (contract)
+
+Balances are read and written in `wallets` since 0003 and the release that
+uses it. Removes the mirror trigger, the index and the column, so balance
+changes no longer touch `users` at all.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 18:12:05.667012
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core import online_migrations as online
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNC = 'users_wallet_balance_sync'
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        op.drop_index(op.f('ix_users_wallet_balance'), table_name='users')
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.drop_column('wallet_balance')
+        return
+
+    with online.autocommit() as conn:
+        online.execute(conn, f'DROP TRIGGER IF EXISTS {SYNC} ON users')
+        online.execute(conn, f'DROP FUNCTION IF EXISTS {SYNC}()')
+        online.drop_index(conn, 'ix_users_wallet_balance')
+        # catalog-only change; the space is reclaimed as rows are rewritten
+        online.execute(conn, 'ALTER TABLE users DROP COLUMN IF EXISTS wallet_balance')
+
+
+def downgrade() -> None:
+    op.add_column('users', sa.Column('wallet_balance', sa.BigInteger(), nullable=False, server_default='0'))
+    op.execute('UPDATE users SET wallet_balance = COALESCE((SELECT balance FROM wallets WHERE wallets.user_id = users.id), 0)')
+    op.create_index(op.f('ix_users_wallet_balance'), 'users', ['wallet_balance'], unique=False)
@@ -0,0 +1,41 @@
+"""user search indexes
+
+PostgreSQL only: a `text_pattern_ops` btree on `users.phone` for phone
+prefixes and a pg_trgm GIN index on the lower-cased full name for name and
+word prefixes (app/core/user_search.py), both built CONCURRENTLY. Other
+databases search through the in-process index instead.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 20:02:13.540221
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core import online_migrations as online
+from app.core.user_search import NAME_SQL
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    with online.autocommit() as conn:
+        online.execute(conn, 'CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        online.create_index(conn, 'ix_users_search_phone', 'users', ['phone text_pattern_ops'])
+        online.create_index(conn, 'ix_users_search_name', 'users', [f'({NAME_SQL}) gin_trgm_ops'], using='gin')
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    with online.autocommit() as conn:
+        online.drop_index(conn, 'ix_users_search_name')
+        online.drop_index(conn, 'ix_users_search_phone')
@@ -0,0 +1,31 @@
+"""credit_requests (superior_id, status, created_at) index
+
+Serves a superior's inbox of pending requests, newest first
+(`GET /api/management/credit-requests`). Built CONCURRENTLY on PostgreSQL.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 20:41:07.316590
+
+"""
+from typing import Sequence, Union
+
+from app.core import online_migrations as online
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = 'ix_credit_requests_superior_status_created'
+
+
+def upgrade() -> None:
+    with online.autocommit() as conn:
+        online.create_index(conn, INDEX, 'credit_requests', ['superior_id', 'status', 'created_at'])
+
+
+def downgrade() -> None:
+    with online.autocommit() as conn:
+        online.drop_index(conn, INDEX)
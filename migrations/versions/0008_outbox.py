@@ -0,0 +1,56 @@
+"""outbox_events, projection_checkpoints, user_stats
+
+The transactional outbox and its first projection (app/core/outbox.py).
+`user_stats` starts empty and fills from events written after this
+revision; older activity is not replayed into it.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 21:18:40.662170
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('topic', sa.String(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_table('projection_checkpoints',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('last_event_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.Column('payout_total', sa.BigInteger(), nullable=False),
+    sa.Column('packages_received', sa.Integer(), nullable=False),
+    sa.Column('received_total', sa.BigInteger(), nullable=False),
+    sa.Column('packages_sent', sa.Integer(), nullable=False),
+    sa.Column('sent_total', sa.BigInteger(), nullable=False),
+    sa.Column('last_event_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
+    op.drop_table('projection_checkpoints')
+    op.drop_table('outbox_events')
@@ -0,0 +1,83 @@
+"""package_transactions.refund_to / reverted_at
+
+Records who got a REVERTED package's amount back and when, so ledger
+consumers (app.core.reconcile, app.core.snapshots) fold reverts from the
+transaction itself instead of the best-effort audit log. Two indexes find
+a user's reverts by time for as-of balances; they are built CONCURRENTLY.
+
+Existing REVERTED rows are filled in primary-key batches:
+
+  1. from `package.reverted` audit events, where AUDIT_SINK=db kept them:
+     the revert time, and the OWNER as `refund_to` for owner reverts
+  2. the rest as refunded to the sender, reverted at `created_at`
+
+Rows reverted by the previous release while this runs keep `refund_to`
+NULL, which the ledger reads as a refund to the sender.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-20 09:12:31.408117
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core import online_migrations as online
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_package_transactions_receiver_reverted': ['receiver_id', 'reverted_at'],
+    'ix_package_transactions_refund_reverted': ['refund_to', 'reverted_at'],
+}
+
+
+def _from_audit(conn) -> None:
+    if not sa.inspect(conn).has_table('audit_events'):
+        return
+    pt = sa.table('package_transactions', sa.column('id'), sa.column('status'),
+                  sa.column('refund_to'), sa.column('reverted_at'))
+    ae = sa.table('audit_events', sa.column('ts'), sa.column('action'), sa.column('actor_id'), sa.column('data', sa.JSON))
+    events = conn.execute(sa.select(ae.c.ts, ae.c.actor_id, ae.c.data).where(ae.c.action == 'package.reverted')).all()
+    for ts, actor_id, data in events:
+        if not isinstance(data, dict) or data.get('transaction_id') is None:
+            continue
+        values = {'reverted_at': ts}
+        if data.get('by_owner') and actor_id is not None:
+            values['refund_to'] = actor_id
+        online.execute(conn, sa.update(pt).where(
+            pt.c.id == int(data['transaction_id']), pt.c.status == 'REVERTED', pt.c.reverted_at.is_(None),
+        ).values(values))
+
+
+def upgrade() -> None:
+    with online.autocommit() as conn:
+        online.add_column(conn, 'package_transactions', sa.Column('refund_to', sa.Integer(), nullable=True))
+        online.add_column(conn, 'package_transactions', sa.Column('reverted_at', sa.TIMESTAMP(timezone=True), nullable=True))
+        _from_audit(conn)
+        online.backfill(
+            conn, 'package_transactions_revert_columns', 'package_transactions',
+            {
+                'refund_to': sa.func.coalesce(sa.column('refund_to'), sa.column('sender_id')),
+                'reverted_at': sa.func.coalesce(sa.column('reverted_at'), sa.column('created_at')),
+            },
+            where=sa.and_(sa.column('status') == 'REVERTED',
+                          sa.or_(sa.column('refund_to').is_(None), sa.column('reverted_at').is_(None))),
+        )
+        for name, columns in INDEXES.items():
+            online.create_index(conn, name, 'package_transactions', columns)
+
+
+def downgrade() -> None:
+    with online.autocommit() as conn:
+        for name in INDEXES:
+            online.drop_index(conn, name)
+    with op.batch_alter_table('package_transactions') as batch_op:
+        batch_op.drop_column('reverted_at')
+        batch_op.drop_column('refund_to')
@@ -0,0 +1,39 @@
+"""analytics rollups move to the outbox projection
+
+Starts the `analytics` projection (app.core.outbox) at the newest outbox
+event: everything before it was folded inline by the previous release.
+Writes of that release after this point are folded by it and projected
+again, so once it is drained, rebuild the deploy day:
+
+    python -m scripts.rebuild_analytics --from <deploy day>
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-20 10:02:44.190562
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PROJECTION = 'analytics'
+
+checkpoints = sa.table('projection_checkpoints', sa.column('name'), sa.column('last_event_id'), sa.column('updated_at'))
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    head = conn.execute(sa.text('SELECT max(id) FROM outbox_events')).scalar() or 0
+    conn.execute(checkpoints.delete().where(checkpoints.c.name == PROJECTION))
+    conn.execute(checkpoints.insert().values(name=PROJECTION, last_event_id=head, updated_at=sa.func.now()))
+
+
+def downgrade() -> None:
+    op.execute(checkpoints.delete().where(checkpoints.c.name == PROJECTION))
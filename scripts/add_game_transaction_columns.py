@@ -1,32 +1,39 @@
 """
 Migration helper: add missing columns to `game_transactions` table if they don't exist.
-This script uses the project's config (`app.core.config.settings`) and SQLAlchemy engine.
-Run with the same Python environment used by the app so `DATABASE_URL` and dependencies are available.
+
+Pre-Alembic helper for databases older than migrations/versions/0001; run it
+before `alembic stamp 0001`. Each column is added in its own statement under
+MIGRATION_LOCK_TIMEOUT_MS (app.core.online_migrations), so a busy table makes
+it retry instead of blocking game writes.
+
+Usage:
+    python -m scripts.add_game_transaction_columns
 """
-from sqlalchemy import text
+import sqlalchemy as sa
+
+from app.core import online_migrations as online
 from app.core.database import engine
 
-ALTERS = [
-    "ALTER TABLE game_transactions ADD COLUMN IF NOT EXISTS dedacted_amount DOUBLE PRECISION",
-    "ALTER TABLE game_transactions ADD COLUMN IF NOT EXISTS owner_id INTEGER",
-    "ALTER TABLE game_transactions ADD COLUMN IF NOT EXISTS owner_name TEXT",
-    "ALTER TABLE game_transactions ADD COLUMN IF NOT EXISTS jester_id INTEGER",
-    "ALTER TABLE game_transactions ADD COLUMN IF NOT EXISTS jester_name TEXT",
-    "ALTER TABLE game_transactions ADD COLUMN IF NOT EXISTS jester_remaining_balance DOUBLE PRECISION",
-    "ALTER TABLE game_transactions ADD COLUMN IF NOT EXISTS total_balance DOUBLE PRECISION",
+COLUMNS = [
+    sa.Column("dedacted_amount", sa.Float),
+    sa.Column("owner_id", sa.Integer),
+    sa.Column("owner_name", sa.Text),
+    sa.Column("jester_id", sa.Integer),
+    sa.Column("jester_name", sa.Text),
+    sa.Column("jester_remaining_balance", sa.Float),
+    sa.Column("total_balance", sa.Float),
 ]
 
 
 def main():
     print("Connecting to DB via app.core.database.engine")
-    with engine.begin() as conn:
-        for stmt in ALTERS:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for column in COLUMNS:
             try:
-                print("Executing:", stmt)
-                conn.execute(text(stmt))
-                print("OK")
+                added = online.add_column(conn, "game_transactions", column)
+                print(f"{column.name}: {'added' if added else 'already present'}")
             except Exception as e:
-                print("FAILED:", e)
+                print(f"{column.name}: FAILED: {e}")
 
     print("Migration finished.")
 
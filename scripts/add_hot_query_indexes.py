@@ -0,0 +1,39 @@
+"""
+Migration helper: create the indexes behind the scoped listing/dashboard queries.
+
+Indexes are built with CREATE INDEX CONCURRENTLY (app.core.online_migrations)
+so writes to the tables are not blocked while they build, and invalid
+leftovers of an interrupted build are rebuilt. Safe to re-run. Databases
+migrated with Alembic get these from migrations/versions/0001.
+
+Usage:
+    python -m scripts.add_hot_query_indexes
+"""
+from app.core import online_migrations as online
+from app.core.database import engine
+
+INDEXES = [
+    ("ix_game_transactions_jester_created", "game_transactions", ["jester_id", "created_at"]),
+    ("ix_package_transactions_sender_created", "package_transactions", ["sender_id", "created_at"]),
+    ("ix_package_transactions_receiver_created", "package_transactions", ["receiver_id", "created_at"]),
+    ("ix_users_superior_id", "users", ["superior_id"]),
+    ("ix_users_created_by", "users", ["created_by"]),
+]
+
+
+def main():
+    print("Connecting to DB via app.core.database.engine")
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, table, columns in INDEXES:
+            try:
+                created = online.create_index(conn, name, table, columns)
+                print(f"{name}: {'created' if created else 'already present'}")
+            except Exception as e:
+                print(f"{name}: FAILED: {e}")
+
+    print("Migration finished.")
+
+
+if __name__ == "__main__":
+    main()
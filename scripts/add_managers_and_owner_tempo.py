@@ -15,6 +15,7 @@ Note: Ensure your `DATABASE_URL` environment variable is set (same as the app).
 from sqlalchemy.exc import IntegrityError
 
 from app import models, utils
+from app.core import wallets
 from app.database import SessionLocal
 
 
@@ -50,13 +51,14 @@ def create_user(db, first_name, last_name, phone, password, role, superior_id=No
         phone_number=phone,
         password=hashed,
         role=role,
-        wallet_balance=0.0,
         superior_id=superior_id,
         created_by=created_by,
     )
 
     db.add(user)
     try:
+        db.flush()
+        wallets.create(db, [user.id])
         db.commit()
         db.refresh(user)
         print(f"CREATED: id={user.id} phone={user.phone} role={user.role}")
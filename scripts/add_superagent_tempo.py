@@ -11,6 +11,7 @@ Note: Ensure your `DATABASE_URL` environment variable is set (same as the app).
 from sqlalchemy.exc import IntegrityError
 
 from app import models, utils
+from app.core import wallets
 from app.database import SessionLocal
 
 
@@ -38,10 +39,11 @@ def main():
             phone_number=PHONE,
             password=hashed,
             role=models.Role.SUPERAGENT,
-            wallet_balance=0.0,
         )
 
         db.add(user)
+        db.flush()
+        wallets.create(db, [user.id])
         db.commit()
         db.refresh(user)
 
@@ -0,0 +1,38 @@
+"""
+Move old rows of `game_transactions` and `package_transactions` to the cold archive.
+
+Rows with created_at older than --older-than-days (default ARCHIVE_AFTER_DAYS) are
+written to gzip NDJSON files under ARCHIVE_DIR, indexed in ARCHIVE_DIR/manifest.json,
+and deleted in batches of ARCHIVE_BATCH_SIZE. `/transactions/export` keeps serving
+archived ranges. Run daily from cron so the hot tables stay bounded; run one
+archiver at a time.
+
+Usage:
+    python -m scripts.archive_transactions [--older-than-days 365] [--table game_transactions]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from app.core import archive
+from app.core.config import settings
+from app.core.database import engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--table", action="append", choices=["game_transactions", "package_transactions"])
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=args.older_than_days)
+    print("Connecting to DB via app.core.database.engine")
+    for table in args.table or ["game_transactions", "package_transactions"]:
+        moved = archive.archive_table(engine, table, cutoff, args.batch_size)
+        print(f"{table}: archived {moved} rows older than {cutoff:%Y-%m-%d}, through {archive.archived_through(table)}")
+
+    print("Archival finished.")
+
+
+if __name__ == "__main__":
+    main()
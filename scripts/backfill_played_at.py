@@ -0,0 +1,85 @@
+"""
+Migration: add `game_transactions.played_at` and backfill it from the legacy
+`tx_date` / `tx_time` strings.
+
+1. ADD COLUMN IF NOT EXISTS played_at + the (jester_id, played_at) index
+   (CONCURRENTLY on a plain table; a partitioned parent builds it per partition)
+2. walk rows with played_at IS NULL in id batches, parse the strings with
+   `helper.parse_played_at` (PLAYED_AT_TIMEZONE) and fall back to created_at
+   when they cannot be parsed; one short transaction per batch
+
+Safe to re-run; only rows still missing played_at are touched.
+
+Usage:
+    python -m scripts.backfill_played_at [--batch-size 5000]
+"""
+import argparse
+
+from sqlalchemy import bindparam, select, text, update
+
+from app import helper, models
+from app.core import partitions
+from app.core.database import engine
+
+
+def add_column():
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE game_transactions ADD COLUMN IF NOT EXISTS played_at TIMESTAMP WITH TIME ZONE"))
+        partitioned = partitions.is_partitioned(conn)
+    index = "INDEX {}IF NOT EXISTS ix_game_transactions_jester_played ON game_transactions (jester_id, played_at)"
+    if partitioned:
+        # CONCURRENTLY is not supported on partitioned tables
+        with engine.begin() as conn:
+            conn.execute(text("CREATE " + index.format("")))
+    else:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("CREATE " + index.format("CONCURRENTLY ")))
+
+
+def backfill(batch_size):
+    gt = models.GameTransaction
+    stmt = (
+        update(gt.__table__)
+        .where(gt.__table__.c.id == bindparam("row_id"))
+        .values(played_at=bindparam("played"))
+    )
+    last_id = 0
+    total = unparsed = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(gt.id, gt.tx_date, gt.tx_time, gt.created_at)
+                .where(gt.played_at.is_(None), gt.id > last_id)
+                .order_by(gt.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            params = []
+            for r in rows:
+                played = helper.parse_played_at(r.tx_date, r.tx_time)
+                if played is None:
+                    unparsed += 1
+                    played = r.created_at
+                params.append({"row_id": r.id, "played": played})
+            conn.execute(stmt, params)
+        last_id = rows[-1].id
+        total += len(rows)
+        print(f"Backfilled through id {last_id} ({total} rows, {unparsed} from created_at)")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    print("Connecting to DB via app.core.database.engine")
+    if engine.dialect.name == "postgresql":
+        add_column()
+    backfill(args.batch_size)
+    print("Migration finished.")
+
+
+if __name__ == "__main__":
+    main()
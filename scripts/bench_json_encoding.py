@@ -0,0 +1,68 @@
+"""Benchmark: default FastAPI encoding vs the orjson streaming response.
+
+Usage:
+    python -m scripts.bench_json_encoding [rows]
+
+Encodes `rows` transaction-shaped dicts the way FastAPI does by default
+(`jsonable_encoder` + stdlib `json.dumps` of the full body) and through
+`StreamingJSONResponse`, reporting wall time and peak traced memory.
+"""
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import StreamingJSONResponse
+
+
+def make_rows(n):
+    now = datetime.now(timezone.utc)
+    for i in range(n):
+        yield {
+            "id": i,
+            "transaction_type": "GAME",
+            "jester_id": i % 97,
+            "jester_name": f"jester-{i % 97}",
+            "bet_amount": 10.0,
+            "number_of_cards": 4,
+            "winning_pattern": "row",
+            "winner_payout": 32.0,
+            "created_at": now,
+        }
+
+
+def default_encode(n):
+    body = jsonable_encoder({"status": "success", "data": list(make_rows(n))})
+    return len(json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def streaming_encode(n):
+    response = StreamingJSONResponse(make_rows(n), envelope={"status": "success"})
+
+    async def drain():
+        total = 0
+        async for chunk in response.body_iterator:
+            total += len(chunk)
+        return total
+
+    return asyncio.run(drain())
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    for name, fn in (("default", default_encode), ("orjson-stream", streaming_encode)):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        size = fn(n)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:<14} rows={n} bytes={size} time={elapsed * 1000:8.1f} ms peak_mem={peak / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
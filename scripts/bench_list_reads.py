@@ -0,0 +1,84 @@
+"""Benchmark: ORM entity loading vs Core column projection for list reads.
+
+Usage:
+    python -m scripts.bench_list_reads [rows]
+
+Seeds a throwaway SQLite database with `rows` game transactions and times
+the old read shape (full `GameTransaction` objects + getattr/`or 0.0`
+copies) against the Core `select()` projection used by the list endpoints.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import Float, Integer, cast, create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import Base
+
+STAMP = datetime(2025, 1, 1)
+
+
+def orm_read(db, jester_id):
+    out = []
+    for t in db.query(models.GameTransaction).filter(models.GameTransaction.jester_id == jester_id).all():
+        out.append({
+            "id": t.id,
+            "bet_amount": float(getattr(t, "bet_amount", 0.0) or 0.0),
+            "win_amount": float(getattr(t, "winner_payout", 0.0) or 0.0),
+            "total_pot": float(getattr(t, "total_pot", 0.0) or 0.0),
+            "jester_name": t.jester_name,
+        })
+    return out
+
+
+def core_read(db, jester_id):
+    gt = models.GameTransaction
+    stmt = select(
+        gt.id,
+        cast(func.coalesce(gt.bet_amount, 0), Float).label("bet_amount"),
+        cast(func.coalesce(gt.winner_payout, 0), Float).label("win_amount"),
+        cast(func.coalesce(gt.total_pot, 0), Float).label("total_pot"),
+        gt.jester_name,
+    ).where(gt.jester_id == jester_id)
+    return [dict(r._mapping) for r in db.execute(stmt)]
+
+
+def measure(fn, db, jester_id):
+    db.expunge_all()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows = fn(db, jester_id)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(rows), elapsed, peak
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [{"id": 1, "phone": "bench", "password": "x", "role": "JESTER", "created_at": STAMP}])
+        conn.execute(models.GameTransaction.__table__.insert(), [
+            {"jester_id": 1, "jester_name": "bench", "bet_amount": 10.0, "winner_payout": 30.0, "total_pot": 40.0, "created_at": STAMP}
+            for _ in range(n)
+        ])
+
+    db = sessionmaker(bind=engine)()
+    try:
+        for name, fn in (("orm", orm_read), ("core", core_read)):
+            count, elapsed, peak = measure(fn, db, 1)
+            print(f"{name:<5} rows={count} time={elapsed * 1000:8.1f} ms peak_mem={peak / 1024:8.0f} KiB")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
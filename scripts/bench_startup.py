@@ -0,0 +1,52 @@
+"""Startup benchmark: time from a fresh interpreter to the first served request.
+
+Usage:
+    python -m scripts.bench_startup [runs]
+
+Each run spawns a new Python process that imports `app.main`, enters the
+app lifespan and serves `GET /` followed by two `GET /openapi.json` calls
+through the in-process test client. The timings printed are:
+
+  import      - importing app.main (module-level create_app included)
+  first_req   - lifespan startup + first `GET /`
+  openapi_1   - first `/openapi.json` (schema build or prebuilt load)
+  openapi_2   - second `/openapi.json` (served from memory)
+"""
+import json
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import app.main as m
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(m.app) as c:
+    c.get("/")
+    t2 = time.perf_counter()
+    c.get("/openapi.json")
+    t3 = time.perf_counter()
+    c.get("/openapi.json")
+    t4 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "first_req": t2 - t1, "openapi_1": t3 - t2, "openapi_2": t4 - t3}))
+"""
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", CHILD], capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"startup benchmark ({runs} runs, median ms)")
+    for key in ("import", "first_req", "openapi_1", "openapi_2"):
+        print(f"  {key:<10} {statistics.median(s[key] for s in samples) * 1000:8.1f}")
+    total = statistics.median(s["import"] + s["first_req"] for s in samples)
+    print(f"  {'total':<10} {total * 1000:8.1f}  (time to first request)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: typeahead latency of /api/management/users/search.
+
+Usage:
+    python -m scripts.bench_user_search [users] [DATABASE_URL]
+
+Seeds `users` random agents (default 100000) into a throwaway SQLite
+database, or into DATABASE_URL if given (the table must be empty there).
+Then it times `user_search.search` for 1-6 character prefixes of phones,
+first names and last names the way a typeahead sends them. On SQLite
+this measures the in-process prefix index; on PostgreSQL it measures the
+indexed SQL. The one-off index build is reported on its own line.
+"""
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.core import user_search
+from app.database import Base
+
+STAMP = datetime(2025, 1, 1)
+LIMIT = 10
+
+
+def _word(rng):
+    return rng.choice(string.ascii_uppercase) + "".join(rng.choices("aeioulnrstkbdm", k=rng.randint(3, 9)))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    url = sys.argv[2] if len(sys.argv) > 2 else f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    users = [
+        {"id": i, "first_name": _word(rng), "last_name": _word(rng), "phone": f"09{i:08d}",
+         "password": "x", "role": "JESTER", "created_at": STAMP}
+        for i in range(1, n + 1)
+    ]
+    with engine.begin() as conn:
+        for i in range(0, n, 10000):
+            conn.execute(models.User.__table__.insert(), users[i:i + 10000])
+
+    queries = []
+    for _ in range(500):
+        u = rng.choice(users)
+        word = rng.choice((u["phone"], u["first_name"], u["last_name"]))
+        queries.extend(word[:k] for k in range(1, 7))
+
+    db = sessionmaker(bind=engine)()
+    try:
+        t0 = time.perf_counter()
+        user_search.search(db, "warmup", LIMIT)
+        print(f"first search (builds the index off PostgreSQL): {(time.perf_counter() - t0) * 1000:.0f} ms")
+        times = []
+        for q in queries:
+            t0 = time.perf_counter()
+            user_search.search(db, q, LIMIT)
+            times.append(time.perf_counter() - t0)
+        times.sort()
+        pct = lambda p: times[int(p * (len(times) - 1))] * 1000  # noqa: E731
+        print(f"{engine.dialect.name} users={n} searches={len(times)} "
+              f"p50={pct(0.5):.2f} ms p95={pct(0.95):.2f} ms p99={pct(0.99):.2f} ms max={times[-1] * 1000:.2f} ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
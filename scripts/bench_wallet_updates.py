@@ -0,0 +1,121 @@
+"""Benchmark: balance updates on the wide `users` row vs the narrow `wallets` table.
+
+Usage:
+    python -m scripts.bench_wallet_updates [users] [updates] [database_url]
+
+Builds two scratch tables on `database_url` (default: a throwaway SQLite
+file): `bench_users_wide`, shaped like `users` before the split (every
+column and index, including the indexed wallet_balance), and
+`bench_wallets`, shaped like `wallets`. It then applies the same
+`updates` single-row balance changes, one transaction each, to both and
+prints updates/s. On PostgreSQL it also prints the table+index size growth
+and how many updates were HOT (no new index entries). The scratch tables
+are dropped at the end.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, Index, Integer, MetaData, Table, create_engine, text
+
+from app import models
+
+STAMP = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+metadata = MetaData()
+
+wide = Table(
+    "bench_users_wide",
+    metadata,
+    *(Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in models.User.__table__.c),
+    Column("wallet_balance", BigInteger, nullable=False, default=0),
+)
+for c in models.User.__table__.c:
+    if c.index or c.unique:
+        Index(f"ix_bench_users_wide_{c.name}", wide.c[c.name], unique=bool(c.unique))
+Index("ix_bench_users_wide_wallet_balance", wide.c.wallet_balance)
+
+narrow = Table(
+    "bench_wallets",
+    metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("balance", BigInteger, nullable=False),
+    Column("version", Integer, nullable=False),
+)
+
+
+def seed(engine, n):
+    metadata.drop_all(bind=engine)
+    metadata.create_all(bind=engine)
+    rows = [{
+        "id": i, "first_name": f"first{i}", "last_name": f"last{i}", "phone": f"09{i:08d}", "phone_number": f"09{i:08d}",
+        "password": "$2b$12$" + "x" * 53, "gender": "F", "city": "Adama", "region": "Oromia", "role": "JESTER",
+        "profile_picture": f"/media/{i}.png", "wallet_balance": 10000, "created_at": STAMP,
+    } for i in range(1, n + 1)]
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ALTER TABLE bench_wallets SET (fillfactor = 70)"))
+        conn.execute(wide.insert(), rows)
+        conn.execute(narrow.insert(), [{"user_id": r["id"], "balance": r["wallet_balance"], "version": 1} for r in rows])
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE bench_users_wide"))
+            conn.execute(text("ANALYZE bench_wallets"))
+
+
+def pg_stats(conn, table):
+    # statistics are reported asynchronously; PostgreSQL 15+ can flush on demand
+    try:
+        conn.execute(text("SELECT pg_stat_force_next_flush()"))
+    except Exception:
+        conn.rollback()
+    time.sleep(0.6)
+    return conn.execute(text(
+        "SELECT pg_total_relation_size(relid), n_tup_upd, n_tup_hot_upd FROM pg_stat_user_tables WHERE relname = :t"
+    ), {"t": table}).one()
+
+
+def run(engine, stmt, ids):
+    t0 = time.perf_counter()
+    for uid, delta in ids:
+        with engine.begin() as conn:
+            conn.execute(stmt, {"uid": uid, "delta": delta})
+    return time.perf_counter() - t0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    url = sys.argv[3] if len(sys.argv) > 3 else f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_engine(url)
+    postgres = engine.dialect.name == "postgresql"
+    seed(engine, n)
+
+    rng = random.Random(7)
+    ids = [(rng.randint(1, n), rng.choice((-100, 100, 250))) for _ in range(updates)]
+    cases = (
+        ("users.wallet_balance", "bench_users_wide",
+         text("UPDATE bench_users_wide SET wallet_balance = wallet_balance + :delta WHERE id = :uid")),
+        ("wallets.balance", "bench_wallets",
+         text("UPDATE bench_wallets SET balance = balance + :delta, version = version + 1 WHERE user_id = :uid")),
+    )
+    try:
+        for name, table, stmt in cases:
+            if postgres:
+                with engine.connect() as conn:
+                    size0, upd0, hot0 = pg_stats(conn, table)
+            elapsed = run(engine, stmt, ids)
+            line = f"{name:<21} updates={updates} time={elapsed:7.2f} s rate={updates / elapsed:8.0f}/s"
+            if postgres:
+                with engine.connect() as conn:
+                    size1, upd1, hot1 = pg_stats(conn, table)
+                line += f" growth={(size1 - size0) / 1024:8.0f} KiB hot={hot1 - hot0}/{upd1 - upd0}"
+            print(line)
+    finally:
+        metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Build-time helper: write the app's OpenAPI document to a JSON file.
+
+Usage:
+    python -m scripts.export_openapi [output_path]
+
+Point `OPENAPI_SCHEMA_PATH` at the written file and workers will serve it
+from memory instead of walking every route to build the schema.
+"""
+import json
+import sys
+
+from app.main import build_openapi, create_app
+
+
+def main():
+    out_path = sys.argv[1] if len(sys.argv) > 1 else "openapi.json"
+    schema = build_openapi(create_app())
+    with open(out_path, "w", encoding="utf-8") as fh:
+        json.dump(schema, fh, separators=(",", ":"))
+    print(f"Wrote OpenAPI schema ({len(schema.get('paths', {}))} paths) to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
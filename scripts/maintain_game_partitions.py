@@ -0,0 +1,35 @@
+"""
+Maintenance for the partitioned `game_transactions` table; run daily from cron.
+
+- creates the partitions for the next GAME_TX_PARTITION_MONTHS_AHEAD months
+- when GAME_TX_RETENTION_MONTHS > 0, detaches older monthly partitions
+  (DETACH PARTITION CONCURRENTLY, no row-by-row DELETE); the detached tables
+  keep their rows until archived or dropped
+
+Usage:
+    python -m scripts.maintain_game_partitions
+"""
+from datetime import datetime, timezone
+
+from app.core import partitions
+from app.core.config import settings
+from app.core.database import engine
+
+
+def main():
+    print("Connecting to DB via app.core.database.engine")
+    created = partitions.ensure_partitions(engine)
+    print("Created partitions:", ", ".join(created) or "none")
+
+    if settings.GAME_TX_RETENTION_MONTHS > 0:
+        cutoff = partitions.add_months(
+            partitions.month_start(datetime.now(timezone.utc)), -settings.GAME_TX_RETENTION_MONTHS
+        )
+        detached = partitions.detach_partitions_before(engine, cutoff)
+        print("Detached partitions:", ", ".join(detached) or "none")
+
+    print("Maintenance finished.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Migration: convert `game_transactions` into monthly range partitions on `created_at` (PostgreSQL).
+
+Steps (re-runnable; each one skips what is already done):
+1. create `game_transactions_part` shaped like the live table, PARTITION BY RANGE (created_at),
+   primary key (id, created_at), every index of the model and the jester_id foreign key
+   (LIKE ... INCLUDING INDEXES cannot be used: the live primary key on `id` alone is not
+   allowed on a table partitioned by created_at)
+2. create one partition per month from the oldest row through GAME_TX_PARTITION_MONTHS_AHEAD
+3. copy rows in id batches, one short transaction per batch, while the app keeps writing
+4. swap: lock the live table, copy every row still missing from the new table, check
+   that both tables hold the same number of rows and the same secondary indexes and
+   foreign key/check constraints, rename
+   game_transactions -> game_transactions_unpartitioned, move the new table into place
+   and hand the id sequence over
+
+Ids are handed out before commit, so a row with a lower id than a copied batch can
+commit after that batch; the catch-up in step 4 is an anti-join, not `id > max(id)`.
+Rows are append-only, so updates made to already-copied rows during step 3 are not
+re-copied; run step 4 during a quiet period. Drop `game_transactions_unpartitioned`
+once the new table is verified.
+
+Usage:
+    python -m scripts.partition_game_transactions [--batch-size 50000] [--no-swap]
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.core import partitions
+from app.core.config import settings
+from app.core.database import engine
+
+TABLE = "game_transactions"
+NEW = "game_transactions_part"
+OLD = "game_transactions_unpartitioned"
+
+
+def _model_table():
+    from app import models
+
+    return models.GameTransaction.__table__
+
+
+def _renamed(name, table_name):
+    """`name` of an index/constraint of game_transactions, as named on `table_name`."""
+    return name.replace(TABLE, table_name, 1)
+
+
+def _foreign_keys():
+    """(column, target table, target column, ON DELETE) of each foreign key in the model."""
+    return [
+        (fk.columns[0].name, fk.referred_table.name, fk.elements[0].column.name, fk.ondelete)
+        for fk in _model_table().foreign_key_constraints
+    ]
+
+
+def index_statements(table_name=NEW):
+    """CREATE INDEX for every index of the model, on `table_name`."""
+    out = []
+    for index in sorted(_model_table().indexes, key=lambda i: i.name):
+        columns = ", ".join(c.name for c in index.columns)
+        unique = "UNIQUE " if index.unique else ""
+        out.append(f"CREATE {unique}INDEX IF NOT EXISTS {_renamed(index.name, table_name)} ON {table_name} ({columns})")
+    return out
+
+
+def foreign_key_statements(table_name=NEW):
+    """ADD CONSTRAINT for every foreign key of the model, on `table_name` (skipped if present)."""
+    out = []
+    for column, target, target_column, ondelete in _foreign_keys():
+        name = f"{table_name}_{column}_fkey"
+        action = f" ON DELETE {ondelete}" if ondelete else ""
+        out.append(
+            f"DO $$ BEGIN "
+            f"IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{name}') THEN "
+            f"ALTER TABLE {table_name} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+            f"REFERENCES {target}({target_column}){action}; END IF; END $$"
+        )
+    return out
+
+
+def create_parent(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {NEW} (LIKE game_transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (created_at)"
+    ))
+    conn.execute(text(
+        f"DO $$ BEGIN "
+        f"IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{NEW}_pkey') THEN "
+        f"ALTER TABLE {NEW} ADD CONSTRAINT {NEW}_pkey PRIMARY KEY (id, created_at); END IF; END $$"
+    ))
+    # the model's indexes, created on the parent so every partition gets them
+    for statement in index_statements() + foreign_key_statements():
+        conn.execute(text(statement))
+
+
+def create_partitions(conn):
+    oldest = conn.execute(text("SELECT min(created_at) FROM game_transactions")).scalar()
+    newest = conn.execute(text("SELECT max(created_at) FROM game_transactions")).scalar()
+    now = datetime.now(timezone.utc)
+    month = partitions.month_start(oldest or now)
+    last = max(
+        partitions.add_months(partitions.month_start(now), settings.GAME_TX_PARTITION_MONTHS_AHEAD),
+        partitions.month_start(newest or now),
+    )
+    while month <= last:
+        conn.execute(text(partitions.create_partition_sql(month, parent=NEW)))
+        month = partitions.add_months(month, 1)
+
+
+def copy_batch(conn, after_id, batch_size):
+    upper = conn.execute(
+        text("SELECT max(id) FROM (SELECT id FROM game_transactions WHERE id > :lo ORDER BY id LIMIT :n) b"),
+        {"lo": after_id, "n": batch_size},
+    ).scalar()
+    if upper is None:
+        return None
+    conn.execute(
+        text(f"INSERT INTO {NEW} SELECT * FROM game_transactions WHERE id > :lo AND id <= :hi ON CONFLICT DO NOTHING"),
+        {"lo": after_id, "hi": upper},
+    )
+    return upper
+
+
+class CountMismatch(Exception):
+    pass
+
+
+class ShapeMismatch(Exception):
+    pass
+
+
+def shape(conn, table_name):
+    """Secondary indexes as (unique, columns) and foreign key/check constraint definitions of `table_name`."""
+    indexes = conn.execute(text(
+        "SELECT i.indisunique, array_agg(a.attname ORDER BY k.n) FROM pg_index i "
+        "CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, n) "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum "
+        "WHERE i.indrelid = CAST(:t AS regclass) AND NOT i.indisprimary GROUP BY i.indexrelid, i.indisunique"
+    ), {"t": table_name}).all()
+    constraints = conn.execute(text(
+        "SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = CAST(:t AS regclass) AND contype IN ('f', 'c')"
+    ), {"t": table_name}).scalars().all()
+    return {(unique, tuple(columns)) for unique, columns in indexes}, set(constraints)
+
+
+def _rename_constraint(conn, table_name, old, new):
+    conn.execute(text(
+        f"DO $$ BEGIN "
+        f"IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{old}' AND conrelid = '{table_name}'::regclass) THEN "
+        f"ALTER TABLE {table_name} RENAME CONSTRAINT {old} TO {new}; END IF; END $$"
+    ))
+
+
+def swap(conn):
+    conn.execute(text("LOCK TABLE game_transactions IN ACCESS EXCLUSIVE MODE"))
+    # late commits below the copied max(id) included
+    conn.execute(text(
+        f"INSERT INTO {NEW} SELECT * FROM game_transactions g "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {NEW} n WHERE n.id = g.id) ON CONFLICT DO NOTHING"
+    ))
+    live = conn.execute(text("SELECT count(*) FROM game_transactions")).scalar()
+    copied = conn.execute(text(f"SELECT count(*) FROM {NEW}")).scalar()
+    if live != copied:
+        raise CountMismatch(f"game_transactions has {live} rows but {NEW} has {copied}; not swapping")
+    (live_indexes, live_constraints), (new_indexes, new_constraints) = shape(conn, TABLE), shape(conn, NEW)
+    if live_indexes != new_indexes or live_constraints != new_constraints:
+        raise ShapeMismatch(
+            f"indexes only on game_transactions: {sorted(live_indexes - new_indexes)}, only on {NEW}: "
+            f"{sorted(new_indexes - live_indexes)}; constraints only on game_transactions: "
+            f"{sorted(live_constraints - new_constraints)}, only on {NEW}: {sorted(new_constraints - live_constraints)}; "
+            "not swapping"
+        )
+    seq = conn.execute(text("SELECT pg_get_serial_sequence('game_transactions', 'id')")).scalar()
+    conn.execute(text(f"ALTER TABLE game_transactions RENAME TO {OLD}"))
+    # free the model's names on the old table, then give them to the new one
+    for index in _model_table().indexes:
+        conn.execute(text(f"ALTER INDEX IF EXISTS {index.name} RENAME TO {_renamed(index.name, OLD)}"))
+    constraints = [f"{TABLE}_pkey"] + [f"{TABLE}_{column}_fkey" for column, *_ in _foreign_keys()]
+    for name in constraints:
+        _rename_constraint(conn, OLD, name, _renamed(name, OLD))
+    conn.execute(text(f"ALTER TABLE {NEW} RENAME TO game_transactions"))
+    for index in _model_table().indexes:
+        conn.execute(text(f"ALTER INDEX {_renamed(index.name, NEW)} RENAME TO {index.name}"))
+    for name in constraints:
+        _rename_constraint(conn, TABLE, _renamed(name, NEW), name)
+    if seq:
+        conn.execute(text(f"ALTER SEQUENCE {seq} OWNED BY game_transactions.id"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--no-swap", action="store_true", help="copy only; run again later to swap")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("Partitioning needs PostgreSQL; nothing to do.")
+        return
+
+    with engine.connect() as conn:
+        if partitions.is_partitioned(conn):
+            print("game_transactions is already partitioned.")
+            return
+
+    print("Connecting to DB via app.core.database.engine")
+    with engine.begin() as conn:
+        create_parent(conn)
+        create_partitions(conn)
+        after_id = conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {NEW}")).scalar()
+
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            upper = copy_batch(conn, after_id, args.batch_size)
+        if upper is None:
+            break
+        total += 1
+        after_id = upper
+        print(f"Copied through id {after_id} ({total} batches)")
+
+    if args.no_swap:
+        print("Copy finished; re-run without --no-swap to swap the tables in.")
+        return
+
+    try:
+        with engine.begin() as conn:
+            swap(conn)
+    except (CountMismatch, ShapeMismatch) as e:
+        print(f"Swap aborted: {e}")
+        sys.exit(1)
+    print(f"Swapped in the partitioned table; old rows kept in {OLD}.")
+    print("Migration finished.")
+
+
+if __name__ == "__main__":
+    main()
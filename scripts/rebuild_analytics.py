@@ -0,0 +1,65 @@
+"""
+Create the analytics rollups (`analytics_hourly`, `analytics_daily`) if
+needed and rebuild them from game_transactions and package_transactions.
+
+The `analytics` outbox projection keeps the rollups current as transactions
+are written; run this once after deploying it (to fold in history), and
+after any bulk load that wrote no outbox events (COPY, raw INSERTs,
+restores). Transactions whose events the projection has not applied yet are
+left to it, so this can run while the app keeps writing. Each day is rebuilt in its
+own transaction, so running it against live traffic only locks one day of
+buckets at a time. Archived rows (scripts/archive_transactions.py) are no
+longer in the tables, so rebuild ranges that are still hot.
+
+Usage:
+    python -m scripts.rebuild_analytics [--from 2024-01-01] [--to 2024-02-01]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from app import models
+from app.core import analytics
+from app.core.archive import as_utc
+from app.core.database import engine
+
+
+def oldest_row():
+    gt, pt = models.GameTransaction, models.PackageTransaction
+    with engine.connect() as conn:
+        found = [
+            conn.execute(select(func.min(func.coalesce(gt.played_at, gt.created_at)))).scalar(),
+            conn.execute(select(func.min(pt.created_at))).scalar(),
+        ]
+    found = [as_utc(v) for v in found if v is not None]
+    return min(found) if found else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="start", help="first day to rebuild (default: oldest transaction)")
+    parser.add_argument("--to", dest="end", help="day after the last one to rebuild (default: tomorrow)")
+    args = parser.parse_args()
+
+    print("Connecting to DB via app.core.database.engine")
+    for table in (models.AnalyticsHourly, models.AnalyticsDaily, models.OutboxEvent, models.ProjectionCheckpoint):
+        table.__table__.create(bind=engine, checkfirst=True)
+
+    start = as_utc(args.start) or oldest_row()
+    if start is None:
+        print("No transactions, nothing to rebuild.")
+        return
+    end = as_utc(args.end) or datetime.now(timezone.utc) + timedelta(days=1)
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    total = 0
+    while day < end:
+        upper = min(day + timedelta(days=1), end)
+        total += analytics.rebuild(engine, day, upper)
+        day = upper
+        print(f"Rebuilt through {day:%Y-%m-%d} ({total} transactions)")
+    print("Rebuild finished.")
+
+
+if __name__ == "__main__":
+    main()
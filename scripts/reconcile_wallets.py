@@ -0,0 +1,55 @@
+"""
+Check every wallet balance against the ledger (package and game transactions,
+archived ones included) and report the wallets that drifted.
+
+The history is folded in parallel across RECONCILE_WORKERS processes, in
+primary-key units streamed through server-side cursors (see
+app.core.reconcile). Discrepancies are written as CSV, grouped by hierarchy
+subtree, with `difference` = balance - expected. The exit status is 1 when
+any wallet is off, so the script can run from cron. Do not run it together
+with scripts/archive_transactions.py.
+
+Usage:
+    python -m scripts.reconcile_wallets [--workers 8] [--out drift.csv]
+"""
+import argparse
+import csv
+import sys
+
+from app.core import reconcile
+from app.core.config import settings
+from app.core.database import engine
+
+COLUMNS = ("subtree_id", "user_id", "role", "balance", "expected", "difference")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=settings.RECONCILE_WORKERS,
+                        help="processes (-1 = one per CPU, 0 = in-process)")
+    parser.add_argument("--unit-rows", type=int, default=settings.RECONCILE_UNIT_ROWS)
+    parser.add_argument("--out", help="CSV report path (default: stdout)")
+    args = parser.parse_args()
+
+    print("Connecting to DB via app.core.database.engine", file=sys.stderr)
+    report = reconcile.reconcile(engine, workers=args.workers, unit_rows=args.unit_rows)
+
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(report.discrepancies)
+    finally:
+        if args.out:
+            out.close()
+
+    print(
+        f"Checked {report.users_checked} wallets against {report.rows} ledger rows "
+        f"({report.units} units) in {report.seconds:.1f}s: {len(report.discrepancies)} off.",
+        file=sys.stderr,
+    )
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
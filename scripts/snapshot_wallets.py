@@ -0,0 +1,30 @@
+"""
+Copy every wallet balance into `wallet_snapshots` as the close of a day.
+
+`GET /api/management/users/{id}/balance?as_of=` starts from the nearest
+snapshot, so run this from cron shortly after midnight UTC. Without
+snapshots as-of queries still work, but they replay the ledger back from
+the live balance. Re-running for a day replaces that day's snapshot.
+
+Usage:
+    python -m scripts.snapshot_wallets [--day 2024-01-31]
+"""
+import argparse
+from datetime import date
+
+from app.core import snapshots
+from app.core.database import engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--day", type=date.fromisoformat, help="day that closed (default: yesterday, UTC)")
+    args = parser.parse_args()
+
+    print("Connecting to DB via app.core.database.engine")
+    rows = snapshots.take(engine, args.day)
+    print(f"Snapshot written: {rows} wallets.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import os
 import tempfile
 import shutil
+from datetime import datetime, timezone
 import pytest
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from fastapi.testclient import TestClient
@@ -13,6 +14,21 @@ import app.database as app_db
 from app.database import Base
 
 
+@pytest.fixture(scope="session", autouse=True)
+def log_dirs(tmp_path_factory):
+    """Keep the audit and slow-query logs of the run out of the checkout."""
+    from app.core import slow_queries
+    from app.core.config import settings
+
+    saved = settings.AUDIT_LOG_DIR, settings.SLOW_QUERY_LOG_DIR
+    settings.AUDIT_LOG_DIR = str(tmp_path_factory.mktemp("audit_logs"))
+    settings.SLOW_QUERY_LOG_DIR = str(tmp_path_factory.mktemp("slow_query_logs"))
+    slow_queries.reset_logger()
+    yield
+    slow_queries.reset_logger()
+    settings.AUDIT_LOG_DIR, settings.SLOW_QUERY_LOG_DIR = saved
+
+
 @pytest.fixture(scope="session")
 def tmp_sqlite_file(tmp_path_factory):
     path = tmp_path_factory.mktemp("data") / "test.db"
@@ -23,6 +39,12 @@ def tmp_sqlite_file(tmp_path_factory):
 def engine(tmp_sqlite_file):
     url = f"sqlite:///{tmp_sqlite_file}"
     engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    # models use server_default=now(), which SQLite does not provide
+    @event.listens_for(engine, "connect")
+    def _register_now(dbapi_conn, _record):
+        dbapi_conn.create_function("now", 0, lambda: datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f"))
+
     return engine
 
 
@@ -94,9 +116,10 @@ def create_user(db_session):
             role=role,
             city=None,
             region=None,
-            wallet_balance=remaining_balance,
         )
         db_session.add(user)
+        db_session.flush()
+        db_session.add(models.Wallet(user_id=user.id, balance=remaining_balance))
         db_session.commit()
         db_session.refresh(user)
         return user
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+
+from app import models
+from app.core import analytics, outbox
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _play(client, token, day, clock, pot, cut, payout):
+    resp = client.post("/game/end", json={
+        "total_pot": pot, "cut": cut, "winning_pattern": "row", "win_amount": payout,
+        "bet_amount": 10, "date": day.isoformat(), "time": clock, "jester_name": "aj",
+    }, headers=auth_header(token))
+    assert resp.status_code == 200
+
+
+def test_rollup_follows_writes_and_rebuilds(client, db_session, engine, create_user, get_token):
+    manager = create_user(phone="analytics_mgr", password="am", role=models.Role.MANAGER, remaining_balance=1000.0)
+    jester = create_user(phone="analytics_jester", password="aj", role=models.Role.JESTER, remaining_balance=1000.0)
+    jester.superior_id = manager.id
+    jester.city, jester.region = "Adama", "Oromia"
+    db_session.commit()
+
+    today = datetime.now(timezone.utc).date()
+    yesterday = today - timedelta(days=1)
+    jester_token = get_token(jester.phone, "aj")
+    _play(client, jester_token, yesterday, "10:05", 40, 8, 32)
+    _play(client, jester_token, yesterday, "10:40", 60, 12, 0)
+    _play(client, jester_token, today, "00:30", 20, 4, 16)
+    token = get_token(manager.phone, "am")
+    resp = client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": 250},
+                       headers=auth_header(token))
+    assert resp.status_code == 200
+    # the rollups are an outbox projection, off the request path
+    while outbox.process_all(engine):
+        pass
+    window = f"from={yesterday}T00:00:00&to={today + timedelta(days=1)}T00:00:00"
+
+    resp = client.get(f"/api/management/analytics?bucket=hour&{window}", headers=auth_header(token))
+    assert resp.status_code == 200
+    games = [(r["bucket"], r["games"], r["revenue"], r["cut"], r["payouts"]) for r in resp.json()["data"] if r["games"]]
+    assert games == [
+        (f"{yesterday}T10:00:00+00:00", 2, 100.0, 20.0, 32.0),
+        (f"{today}T00:00:00+00:00", 1, 20.0, 4.0, 16.0),
+    ]
+
+    def by_day():
+        resp = client.get(f"/api/management/analytics?bucket=day&group_by=city&{window}", headers=auth_header(token))
+        assert resp.status_code == 200
+        return [(r["bucket"][:10], r["city"], r["games"], r["cut"], r["packages"], r["package_amount"]) for r in resp.json()["data"]]
+
+    expected = [(str(yesterday), "Adama", 2, 20.0, 0, 0.0), (str(today), "Adama", 1, 4.0, 1, 250.0)]
+    assert by_day() == expected
+
+    # rebuilding from the raw tables reproduces what the projection folded in
+    for rollup in (models.AnalyticsHourly, models.AnalyticsDaily):
+        db_session.query(rollup).filter(rollup.manager_id == manager.id).delete()
+    db_session.commit()
+    assert by_day() == []
+    analytics.rebuild(engine, datetime.combine(yesterday, datetime.min.time()), datetime.now(timezone.utc) + timedelta(hours=1))
+    assert by_day() == expected
+
+
+def test_week_buckets_start_on_monday(client, db_session, create_user, get_token):
+    owner = create_user(phone="analytics_owner", password="ao", role=models.Role.OWNER)
+    thursday = datetime(2024, 3, 7, tzinfo=timezone.utc)
+    db_session.add(models.AnalyticsDaily(bucket=thursday, manager_id=0, city="", region="Week", game_count=3, cut_total=9.0))
+    db_session.commit()
+
+    resp = client.get(
+        "/api/management/analytics?bucket=week&group_by=region&from=2024-03-01T00:00:00&to=2024-03-15T00:00:00",
+        headers=auth_header(get_token(owner.phone, "ao")),
+    )
+    assert resp.status_code == 200
+    rows = [r for r in resp.json()["data"] if r["region"] == "Week"]
+    assert [(r["bucket"], r["games"], r["cut"]) for r in rows] == [("2024-03-04T00:00:00+00:00", 3, 9.0)]
+
+
+def test_analytics_access_and_range_limits(client, create_user, get_token):
+    jester = create_user(phone="analytics_nobody", password="an", role=models.Role.JESTER)
+    resp = client.get("/api/management/analytics", headers=auth_header(get_token(jester.phone, "an")))
+    assert resp.status_code == 403
+
+    owner = create_user(phone="analytics_owner2", password="ao", role=models.Role.OWNER)
+    headers = auth_header(get_token(owner.phone, "ao"))
+    assert client.get("/api/management/analytics?bucket=hour&from=2024-01-01T00:00:00&to=2024-06-01T00:00:00", headers=headers).status_code == 400
+    assert client.get("/api/management/analytics?bucket=month", headers=headers).status_code == 422
+    assert client.get("/api/management/analytics", headers=headers).status_code == 200
+
+
+def test_rebuild_leaves_unapplied_events_to_the_projection(client, db_session, engine, create_user, get_token, monkeypatch):
+    manager = create_user(phone="analytics_mgr2", password="am", role=models.Role.MANAGER, remaining_balance=100.0)
+    jester = create_user(phone="analytics_jester2", password="aj", role=models.Role.JESTER)
+    jester.superior_id = manager.id
+    jester.city = "Hawassa"
+    db_session.commit()
+    while outbox.process_all(engine):
+        pass
+
+    # the background task must not apply the event before the rebuild
+    monkeypatch.setattr(outbox, "PROJECTIONS", {})
+    resp = client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": 40},
+                       headers=auth_header(get_token(manager.phone, "am")))
+    assert resp.status_code == 200
+    monkeypatch.undo()
+    today = datetime.now(timezone.utc)
+    analytics.rebuild(engine, today - timedelta(days=1), today + timedelta(days=1))
+    while outbox.process_all(engine):
+        pass
+
+    rows = db_session.query(models.AnalyticsDaily).filter(models.AnalyticsDaily.city == "Hawassa").all()
+    assert [(r.package_count, float(r.package_total)) for r in rows] == [(1, 40.0)]
+
+
+def test_reverted_package_leaves_its_bucket(client, db_session, engine, create_user, get_token):
+    manager = create_user(phone="analytics_mgr3", password="am", role=models.Role.MANAGER, remaining_balance=100.0)
+    jester = create_user(phone="analytics_jester3", password="aj", role=models.Role.JESTER)
+    jester.superior_id = manager.id
+    jester.city = "Dire Dawa"
+    db_session.commit()
+    headers = auth_header(get_token(manager.phone, "am"))
+
+    sent = [client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": amount},
+                        headers=headers).json()["data"]["transaction_id_num"] for amount in (30, 5)]
+    while outbox.process_all(engine):
+        pass
+
+    def buckets():
+        db_session.expire_all()
+        rows = db_session.query(models.AnalyticsDaily).filter(models.AnalyticsDaily.city == "Dire Dawa").all()
+        return [(r.package_count, float(r.package_total)) for r in rows]
+
+    assert buckets() == [(2, 35.0)]
+    assert client.post("/transactions/revert", json={"transaction_id": sent[1]}, headers=headers).status_code == 200
+    while outbox.process_all(engine):
+        pass
+    assert buckets() == [(1, 30.0)]
+
+    # and a rebuild agrees
+    today = datetime.now(timezone.utc)
+    analytics.rebuild(engine, today - timedelta(days=1), today + timedelta(days=1))
+    assert buckets() == [(1, 30.0)]
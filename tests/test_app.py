@@ -0,0 +1,46 @@
+from app import main as main_module
+
+
+def test_openapi_built_once(client, monkeypatch):
+    calls = []
+    real_build = main_module.build_openapi
+
+    def counting_build(app):
+        calls.append(app)
+        return real_build(app)
+
+    monkeypatch.setattr(main_module, "build_openapi", counting_build)
+    client.app.openapi_schema = None
+
+    first = client.get("/openapi.json")
+    second = client.get("/openapi.json")
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert "BearerAuth" in first.json()["components"]["securitySchemes"]
+    assert len(calls) == 1
+
+
+def test_prebuilt_openapi_is_served(tmp_path, monkeypatch):
+    path = tmp_path / "openapi.json"
+    path.write_text('{"openapi": "3.1.0", "info": {"title": "prebuilt", "version": "1"}, "paths": {}}')
+    monkeypatch.setattr(main_module.settings, "OPENAPI_SCHEMA_PATH", str(path))
+
+    app = main_module.create_app()
+    assert app.openapi()["info"]["title"] == "prebuilt"
+
+
+def test_schema_creation_is_opt_in(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    created = []
+    monkeypatch.setattr(main_module.core_db.Base.metadata, "create_all", lambda **kw: created.append(kw))
+
+    monkeypatch.setattr(main_module.settings, "CREATE_SCHEMA_ON_STARTUP", False)
+    with TestClient(main_module.create_app()) as c:
+        assert c.get("/").status_code == 200
+    assert created == []
+
+    monkeypatch.setattr(main_module.settings, "CREATE_SCHEMA_ON_STARTUP", True)
+    with TestClient(main_module.create_app()):
+        pass
+    assert len(created) == 1
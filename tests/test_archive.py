@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import models
+from app.core import archive
+from app.core import database as core_db
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive.settings, "ARCHIVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_archive_moves_old_rows_and_export_reads_them(client, db_session, create_user, get_token, archive_dir):
+    owner = create_user(phone="arch_owner", password="ao", role=models.Role.OWNER)
+    jester = create_user(phone="arch_jester", password="aj", role=models.Role.JESTER)
+    stamps = [datetime(2023, 1, 1, 10), datetime(2023, 1, 2, 9), datetime(2023, 1, 2, 9), datetime(2023, 6, 1)]
+    rows = [models.GameTransaction(jester_id=jester.id, bet_amount=5.0, created_at=s) for s in stamps]
+    db_session.add_all(rows)
+    db_session.commit()
+    ids = [r.id for r in rows]
+
+    # batch size 1 still keeps rows sharing a timestamp together
+    moved = archive.archive_table(core_db.engine, "game_transactions", datetime(2023, 3, 1), batch_size=1)
+    assert moved == 3
+    assert archive.archived_through("game_transactions") == archive.as_utc(datetime(2023, 1, 2, 9))
+    db_session.expire_all()
+    assert db_session.query(models.GameTransaction).filter(models.GameTransaction.id.in_(ids)).count() == 1
+
+    manifest = json.loads((archive_dir / "manifest.json").read_text())
+    days = sorted({f["day"] for f in manifest["tables"]["game_transactions"]["files"]})
+    assert days == ["2023-01-01", "2023-01-02"]
+    assert [r["id"] for r in archive.read_archived("game_transactions", jester_id=jester.id)] == ids[:3]
+
+    token = get_token(owner.phone, "ao")
+    resp = client.get("/transactions/export?type=game&from=2022-12-01&to=2023-12-31", headers=auth_header(token))
+    assert resp.status_code == 200
+    exported = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["id"] for r in exported if r["jester_id"] == jester.id] == ids
+
+    resp = client.get("/transactions/export?type=game&from=2023-05-01&to=2023-12-31&format=csv", headers=auth_header(token))
+    table = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [int(r["id"]) for r in table if r["jester_id"] == str(jester.id)] == ids[3:]
+
+
+def test_export_is_owner_only(client, create_user, get_token, archive_dir):
+    manager = create_user(phone="arch_mgr", password="am", role=models.Role.MANAGER)
+    token = get_token(manager.phone, "am")
+    assert client.get("/transactions/export", headers=auth_header(token)).status_code == 403
+
+
+def test_transaction_list_reads_archived_ranges(client, db_session, create_user, get_token, archive_dir):
+    manager = create_user(phone="arch_list_mgr", password="lm", role=models.Role.MANAGER)
+    jester = create_user(phone="arch_list_jester", password="lj", role=models.Role.JESTER)
+    jester.superior_id = manager.id
+    now = datetime.now(timezone.utc)
+    old, recent = now - timedelta(days=200), now - timedelta(days=2)
+    games = [models.GameTransaction(jester_id=jester.id, bet_amount=5.0, played_at=t, created_at=t) for t in (old, recent)]
+    packages = [models.PackageTransaction(sender_id=manager.id, receiver_id=jester.id, package_amount=a, created_at=t)
+                for a, t in ((7.0, old), (3.0, recent))]
+    db_session.add_all(games + packages)
+    db_session.commit()
+    games, packages = [g.id for g in games], [p.id for p in packages]
+    for table in ("game_transactions", "package_transactions"):
+        archive.archive_table(core_db.engine, table, now - timedelta(days=100))
+
+    token = get_token(manager.phone, "lm")
+    resp = client.get("/transactions", params={"type": "package"}, headers=auth_header(token))
+    assert [(r["id"], r["amount"]) for r in resp.json()["data"]] == [(packages[1], 3.0), (packages[0], 7.0)]
+    resp = client.get("/transactions", params={"type": "game", "from": (old - timedelta(days=1)).isoformat()},
+                      headers=auth_header(token))
+    assert [r["id"] for r in resp.json()["data"]] == [games[1], games[0]]
+    resp = client.get("/transactions", params={"type": "game", "from": (now - timedelta(days=50)).isoformat()},
+                      headers=auth_header(token))
+    assert [r["id"] for r in resp.json()["data"]] == [games[1]]
@@ -0,0 +1,77 @@
+import gzip
+import json
+from collections import deque
+
+import pytest
+
+from app import models
+from app.core import audit
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def audit_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit.settings, "AUDIT_LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(audit.settings, "AUDIT_SINK", "file")
+    audit.flush()
+    return tmp_path
+
+
+def read_events(directory):
+    events = []
+    for path in sorted(directory.glob("audit.*.log.gz")):
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            events.extend(json.loads(line) for line in fh)
+    return events
+
+
+def test_send_package_is_audited_to_file(client, create_user, get_token, audit_dir):
+    owner = create_user(phone="audit_owner", password="ap", role=models.Role.OWNER)
+    jester = create_user(phone="audit_jester", password="jp", role=models.Role.JESTER)
+    token = get_token(owner.phone, "ap")
+
+    resp = client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": 12}, headers=auth_header(token))
+    assert resp.status_code == 200
+    audit.flush()
+
+    events = [e for e in read_events(audit_dir) if e["action"] == "package.sent"]
+    assert len(events) == 1
+    assert events[0]["actor_id"] == owner.id
+    assert events[0]["target_id"] == jester.id
+    assert events[0]["endpoint"] == "POST /transactions/send-package"
+    assert events[0]["data"]["amount"] == 12
+
+
+def test_db_sink_writes_batch(client, db_session, create_user, get_token, audit_dir, monkeypatch):
+    monkeypatch.setattr(audit.settings, "AUDIT_SINK", "db")
+    owner = create_user(phone="audit_db_owner", password="ap", role=models.Role.OWNER)
+
+    for i in range(3):
+        audit.emit("test.event", actor_id=owner.id, seq=i)
+    assert audit.flush() >= 3
+
+    rows = db_session.query(models.AuditEvent).filter(models.AuditEvent.action == "test.event").all()
+    assert sorted(r.data["seq"] for r in rows) == [0, 1, 2]
+
+
+def test_full_buffer_drops_oldest(audit_dir, monkeypatch):
+    monkeypatch.setattr(audit, "_buffer", deque(maxlen=2))
+    before = audit._dropped.value()
+    for i in range(3):
+        audit.emit("test.drop", seq=i)
+    assert audit._dropped.value() == before + 1
+    audit.flush()
+    assert [e["data"]["seq"] for e in read_events(audit_dir)] == [1, 2]
+
+
+def test_log_rotates_by_size(audit_dir, monkeypatch):
+    monkeypatch.setattr(audit.settings, "AUDIT_LOG_MAX_BYTES", 1)
+    audit.emit("test.rotate", seq=0)
+    audit.flush()
+    audit.emit("test.rotate", seq=1)
+    audit.flush()
+    assert len(list(audit_dir.glob("audit.*.log.gz"))) == 2
+    assert sorted(e["data"]["seq"] for e in read_events(audit_dir)) == [0, 1]
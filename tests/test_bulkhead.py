@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import bulkhead, metrics
+
+
+def test_bulkhead_sheds_when_queue_is_full():
+    bh = bulkhead.Bulkhead("test_queue", limit=1, max_queue=1)
+    depth = metrics.gauge("bulkhead_queue_depth", "")
+
+    async def scenario():
+        holder = bh()
+        await holder.__anext__()  # takes the only slot
+
+        waiter = asyncio.ensure_future(bh().__anext__())
+        await asyncio.sleep(0)
+        assert bh.waiting == 1
+        assert depth.value(bulkhead="test_queue") == 1
+
+        with pytest.raises(HTTPException) as info:
+            await bh().__anext__()
+        assert info.value.status_code == 503
+
+        await holder.aclose()  # release -> waiter gets the slot
+        await waiter
+        assert bh.active == 1 and bh.waiting == 0
+
+    asyncio.run(scenario())
+    assert metrics.counter("bulkhead_rejected_total", "").value(bulkhead="test_queue", reason="queue") == 1
+
+
+def test_low_priority_sheds_before_critical(monkeypatch):
+    monkeypatch.setattr(bulkhead, "threadpool_saturated", lambda: True)
+    reads = bulkhead.Bulkhead("test_reads", limit=4, max_queue=4, low_priority=True)
+    writes = bulkhead.Bulkhead("test_writes", limit=4, max_queue=4)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as info:
+            await reads().__anext__()
+        assert info.value.status_code == 503
+        assert info.value.headers["Retry-After"] == "1"
+
+        gen = writes()
+        await gen.__anext__()
+        assert writes.active == 1
+        await gen.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_threadpool_size_applied_in_lifespan(client):
+    import anyio.to_thread
+
+    size = client.portal.call(lambda: anyio.to_thread.current_default_thread_limiter().total_tokens)
+    assert size == bulkhead.settings.THREADPOOL_SIZE
@@ -0,0 +1,154 @@
+from sqlalchemy import func, select
+
+from app import models
+from app.core import outbox, wallets
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _setup(db_session, create_user, get_token, suffix, manager_balance):
+    manager = create_user(phone=f"cr_mgr_{suffix}", password="cm", role=models.Role.MANAGER, remaining_balance=manager_balance)
+    jesters = [create_user(phone=f"cr_j{i}_{suffix}", password="cj", role=models.Role.JESTER) for i in range(2)]
+    for j in jesters:
+        j.superior_id = manager.id
+    db_session.commit()
+    return manager, jesters, get_token(manager.phone, "cm"), [get_token(j.phone, "cj") for j in jesters]
+
+
+def _request(client, token, amount):
+    resp = client.post("/transactions/request-package", json={"amount": amount}, headers=auth_header(token))
+    assert resp.status_code == 200
+    return resp.json()["data"]["request_id"]
+
+
+def test_inbox_pages_and_bulk_approve(client, db_session, engine, create_user, get_token):
+    manager, jesters, token, jester_tokens = _setup(db_session, create_user, get_token, "a", 100)
+    ids = [_request(client, jester_tokens[i % 2], amount) for i, amount in enumerate((10, 20, 30))]
+
+    resp = client.get("/api/management/credit-requests", params={"limit": 2}, headers=auth_header(token))
+    body = resp.json()
+    assert [r["id"] for r in body["data"]] == ids[:0:-1]
+    assert body["data"][0]["amount"] == 30.0
+    resp = client.get("/api/management/credit-requests", params={"limit": 2, "cursor": body["next_cursor"]},
+                      headers=auth_header(token))
+    assert [r["id"] for r in resp.json()["data"]] == ids[:1]
+    assert resp.json()["next_cursor"] is None
+
+    packages_before = db_session.execute(select(func.count(models.PackageTransaction.id))).scalar()
+    while outbox.process_all(engine):
+        pass
+    rolled_before = db_session.execute(select(func.coalesce(func.sum(models.AnalyticsDaily.package_count), 0))).scalar()
+    resp = client.post("/api/management/credit-requests/bulk-action",
+                       json={"action": "APPROVE", "request_ids": ids}, headers=auth_header(token))
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    assert data["superior_balance"] == 40.0
+    assert data["recipient_balances"] == {str(jesters[0].id): 40.0, str(jesters[1].id): 20.0}
+    assert len(data["transaction_ids"]) == 3
+    assert db_session.execute(select(func.count(models.PackageTransaction.id))).scalar() == packages_before + 3
+    # the approvals reach the analytics rollups through the outbox
+    while outbox.process_all(engine):
+        pass
+    db_session.expire_all()
+    assert db_session.execute(select(func.sum(models.AnalyticsDaily.package_count))).scalar() == rolled_before + 3
+    assert wallets.balances(db_session, [manager.id, jesters[0].id]) == {manager.id: 40, jesters[0].id: 40}
+
+    assert client.get("/api/management/credit-requests", headers=auth_header(token)).json()["data"] == []
+    resp = client.get("/api/management/credit-requests", params={"status": "approved"}, headers=auth_header(token))
+    assert len(resp.json()["data"]) == 3
+
+
+def test_bulk_action_is_all_or_nothing(client, db_session, create_user, get_token):
+    manager, jesters, token, jester_tokens = _setup(db_session, create_user, get_token, "b", 25)
+    ids = [_request(client, jester_tokens[0], 10), _request(client, jester_tokens[1], 20)]
+
+    # the total is more than the manager has
+    resp = client.post("/api/management/credit-requests/bulk-action",
+                       json={"action": "APPROVE", "request_ids": ids}, headers=auth_header(token))
+    assert resp.status_code == 402
+    assert wallets.balance(db_session, manager.id) == 25
+
+    resp = client.post("/api/management/credit-requests/bulk-action",
+                       json={"action": "REJECT", "request_ids": ids[:1]}, headers=auth_header(token))
+    assert resp.status_code == 200
+    resp = client.post("/api/management/credit-requests/bulk-action",
+                       json={"action": "APPROVE", "request_ids": ids + [999999]}, headers=auth_header(token))
+    assert resp.status_code == 400
+    assert [e["request_id"] for e in resp.json()["detail"]["errors"]] == [ids[0], 999999]
+    pending = client.get("/api/management/credit-requests", headers=auth_header(token)).json()["data"]
+    assert [r["id"] for r in pending] == ids[1:]
+
+    # only the addressee may act
+    resp = client.post("/api/management/credit-requests/bulk-action",
+                       json={"action": "REJECT", "request_ids": ids[1:]}, headers=auth_header(jester_tokens[0]))
+    assert resp.status_code == 400
+
+
+def test_inbox_lists_legacy_open_requests_as_pending(client, db_session, create_user, get_token):
+    manager, jesters, token, jester_tokens = _setup(db_session, create_user, get_token, "c", 50)
+    ids = [_request(client, jester_tokens[0], 10), _request(client, jester_tokens[1], 5)]
+    legacy = db_session.get(models.CreditRequest, ids[0])
+    legacy.status = "REQUESTED"
+    db_session.commit()
+
+    pending = client.get("/api/management/credit-requests", headers=auth_header(token)).json()["data"]
+    assert [(r["id"], r["status"]) for r in pending] == [(ids[1], "PENDING"), (ids[0], "REQUESTED")]
+    resp = client.post("/api/management/credit-requests/bulk-action",
+                       json={"action": "APPROVE", "request_ids": ids[:1]}, headers=auth_header(token))
+    assert resp.status_code == 200
+    pending = client.get("/api/management/credit-requests", headers=auth_header(token)).json()["data"]
+    assert [r["id"] for r in pending] == ids[1:]
+
+
+def test_single_approval_claims_the_request_before_paying(client, db_session, create_user, get_token, monkeypatch):
+    from app.router import management
+
+    manager, jesters, token, jester_tokens = _setup(db_session, create_user, get_token, "d", 50)
+    request_id = _request(client, jester_tokens[0], 10)
+    resp = client.put(f"/api/management/credit-requests/{request_id}/action", json={"action": "APPROVE"},
+                      headers=auth_header(token))
+    assert resp.status_code == 200
+
+    # a second approval that read the request before the first committed
+    monkeypatch.setattr(management, "OPEN_CREDIT_STATUSES", ("PENDING", "REQUESTED", None, "APPROVED"))
+    resp = client.put(f"/api/management/credit-requests/{request_id}/action", json={"action": "APPROVE"},
+                      headers=auth_header(token))
+    assert resp.status_code == 400
+    assert wallets.balances(db_session, [manager.id, jesters[0].id]) == {manager.id: 40, jesters[0].id: 10}
+
+
+def test_single_and_bulk_approval_pay_out_once(client, db_session, create_user, get_token, monkeypatch):
+    from app.router import management
+
+    manager, jesters, token, jester_tokens = _setup(db_session, create_user, get_token, "e", 50)
+    ids = [_request(client, jester_tokens[0], 10), _request(client, jester_tokens[1], 5)]
+
+    resp = client.put(f"/api/management/credit-requests/{ids[0]}/action", json={"action": "APPROVE"},
+                      headers=auth_header(token))
+    assert resp.status_code == 200
+    resp = client.post("/api/management/credit-requests/bulk-action",
+                       json={"action": "APPROVE", "request_ids": ids[:1]}, headers=auth_header(token))
+    assert resp.status_code == 400
+
+    # the bulk path read both as open, but the single path got one of them first
+    monkeypatch.setattr(management, "OPEN_CREDIT_STATUSES", ("PENDING", "REQUESTED", None, "APPROVED"))
+    resp = client.post("/api/management/credit-requests/bulk-action",
+                       json={"action": "APPROVE", "request_ids": ids}, headers=auth_header(token))
+    assert resp.status_code == 409
+    assert wallets.balances(db_session, [manager.id, jesters[0].id, jesters[1].id]) == {
+        manager.id: 40, jesters[0].id: 10, jesters[1].id: 0}
+
+    # and the other way round
+    monkeypatch.undo()
+    resp = client.post("/api/management/credit-requests/bulk-action",
+                       json={"action": "APPROVE", "request_ids": ids[1:]}, headers=auth_header(token))
+    assert resp.status_code == 200
+    resp = client.put(f"/api/management/credit-requests/{ids[1]}/action", json={"action": "APPROVE"},
+                      headers=auth_header(token))
+    assert resp.status_code == 400
+    assert wallets.balances(db_session, [manager.id, jesters[1].id]) == {manager.id: 35, jesters[1].id: 5}
+    assert db_session.execute(
+        select(func.count(models.PackageTransaction.id)).where(models.PackageTransaction.sender_id == manager.id)
+    ).scalar() == 2
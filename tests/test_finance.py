@@ -45,8 +45,8 @@ def test_revoke_fails_when_receiver_spent(client, db_session, create_user, get_t
     assert tx is not None
 
     # simulate receiver spending the money (make balance < tx amount)
-    recv = db_session.query(models.User).filter(models.User.id == receiver.id).one()
-    recv.wallet_balance = 10.0
+    recv = db_session.query(models.Wallet).filter(models.Wallet.user_id == receiver.id).one()
+    recv.balance = 10.0
     db_session.add(recv)
     db_session.commit()
 
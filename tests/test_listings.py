@@ -0,0 +1,62 @@
+import pytest
+from app import models
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_users_list_includes_latest_package_names(client, db_session, create_user, get_token):
+    manager = create_user(phone="list_mgr", password="lm", role=models.Role.MANAGER, remaining_balance=500.0, name="Lister")
+    child = create_user(phone="list_child", password="lc", role=models.Role.JESTER, name="Kid")
+    child.superior_id = manager.id
+    db_session.add(child)
+    db_session.add_all([
+        models.PackageTransaction(sender_id=manager.id, receiver_id=child.id, sender_name="Lister", receiver_name="old", package_amount=5),
+        models.PackageTransaction(sender_id=manager.id, receiver_id=child.id, sender_name="Lister", receiver_name="Kid", package_amount=10),
+    ])
+    db_session.commit()
+
+    token = get_token(manager.phone, "lm")
+    resp = client.get("/api/management/users", headers=auth_header(token))
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    assert [u["id"] for u in data] == [child.id]
+    row = data[0]
+    assert row["name"] == "Kid"
+    assert row["role"] == "Jester"
+    assert row["balance"] == 0.0
+    assert row["extra"] == {"sender_name": "Lister", "receiver_name": "Kid"}
+    assert "password" not in row
+
+
+def test_list_transactions_scoped_and_coalesced(client, db_session, create_user, get_token):
+    jester = create_user(phone="list_jester", password="lj", role=models.Role.JESTER, remaining_balance=100.0)
+    db_session.add(models.GameTransaction(jester_id=jester.id, jester_name="J", bet_amount=None, total_pot=50.0, winner_payout=None))
+    db_session.add(models.PackageTransaction(sender_id=jester.id, receiver_id=jester.id, package_amount=None))
+    db_session.commit()
+
+    token = get_token(jester.phone, "lj")
+    resp = client.get("/transactions", headers=auth_header(token))
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    kinds = sorted(t["transaction_type"] for t in data)
+    assert kinds == ["GAME", "PACKAGE"]
+    game = next(t for t in data if t["transaction_type"] == "GAME")
+    assert game["bet_amount"] == 0.0 and game["winner_payout"] == 0.0 and game["number_of_cards"] == 0
+    pkg = next(t for t in data if t["transaction_type"] == "PACKAGE")
+    assert pkg["amount"] == 0.0 and pkg["status"] == "COMPLETED"
+
+
+def test_my_game_transactions_derives_card_count(client, db_session, create_user, get_token):
+    jester = create_user(phone="mytx_jester", password="mj", role=models.Role.JESTER)
+    db_session.add(models.GameTransaction(jester_id=jester.id, bet_amount=10.0, total_pot=40.0, cut_amount=8.0, winner_payout=32.0, tx_date="2025-01-01"))
+    db_session.commit()
+
+    token = get_token(jester.phone, "mj")
+    resp = client.get("/api/game/my-transactions", headers=auth_header(token))
+    assert resp.status_code == 200
+    (row,) = resp.json()["data"]
+    assert row["number_of_cards"] == 4
+    assert row["cut"] == pytest.approx(8.0)
+    assert row["date"] == "2025-01-01"
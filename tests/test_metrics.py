@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import exc, text
+
+from app.core import database as core_db
+from app.core import metrics
+
+
+def test_pool_metrics_track_checkout_and_exhaustion(tmp_path):
+    eng = core_db.make_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        name="test_pool",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    wait = metrics.histogram("db_pool_checkout_wait_seconds", "")
+    in_use = metrics.gauge("db_pool_checked_out", "")
+    exhausted = metrics.counter("db_pool_exhausted_total", "")
+    timeouts = metrics.counter("db_pool_timeouts_total", "")
+
+    conn = eng.connect()
+    conn.execute(text("SELECT 1"))
+    assert in_use.value(pool="test_pool") == 1
+    assert wait.count(pool="test_pool") == 1
+
+    with pytest.raises(exc.TimeoutError):
+        eng.connect()
+    assert exhausted.value(pool="test_pool") == 1
+    assert timeouts.value(pool="test_pool") == 1
+
+    conn.close()
+    assert in_use.value(pool="test_pool") == 0
+
+    rendered = metrics.render()
+    assert 'db_pool_timeouts_total{pool="test_pool"} 1' in rendered
+    assert 'db_pool_size{pool="test_pool"} 1' in rendered
+    eng.dispose()
+
+
+def test_pgbouncer_mode_uses_null_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(core_db.settings, "DB_POOL_MODE", "pgbouncer")
+    eng = core_db.make_engine(f"sqlite:///{tmp_path / 'nopool.db'}", name="test_bouncer")
+    assert isinstance(eng.pool, core_db.InstrumentedNullPool)
+    with eng.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    eng.dispose()
+
+
+def test_metrics_endpoint(client):
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "# TYPE db_pool_checkout_wait_seconds histogram" in resp.text
@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+from app.core import money
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_amounts_round_half_up_to_the_cent():
+    assert money.to_decimal(0.1) == Decimal("0.10")
+    assert money.to_decimal("2.675") == Decimal("2.68")
+    assert money.to_decimal(1.005) == Decimal("1.01")
+    assert money.to_minor(12.345) == 1235
+    assert money.from_minor(1235) == Decimal("12.35")
+    # SUM over BIGINT comes back as NUMERIC on PostgreSQL
+    assert money.from_minor(Decimal("1235")) == Decimal("12.35")
+    for bad in ("abc", float("nan"), True, None):
+        with pytest.raises(ValueError):
+            money.to_decimal(bad)
+
+
+def test_balances_stay_exact_in_cents(client, db_session, create_user, get_token):
+    sender = create_user(phone="money_sender", password="ms", role=models.Role.MANAGER, remaining_balance=1.0)
+    receiver = create_user(phone="money_receiver", password="mr", role=models.Role.JESTER)
+    token = get_token(sender.phone, "ms")
+
+    # ten float sends of 0.1 used to leave 1.0 - 10 * 0.1 == 1.3877787807814457e-16
+    for _ in range(10):
+        resp = client.post("/transactions/send-package", json={"receiver_id": receiver.id, "amount": 0.1},
+                           headers=auth_header(token))
+        assert resp.status_code == 200
+    assert resp.json()["data"]["sender_new_balance"] == 0.0
+    assert resp.json()["data"]["receiver_new_balance"] == 1.0
+
+    db_session.expire_all()
+    assert db_session.get(models.Wallet, sender.id).balance == Decimal("0.00")
+    assert db_session.get(models.Wallet, receiver.id).balance == Decimal("1.00")
+    total = db_session.execute(
+        select(func.sum(models.PackageTransaction.package_amount)).where(models.PackageTransaction.sender_id == sender.id)
+    ).scalar()
+    # summed as BIGINT cents, converted back once
+    assert total == Decimal("1.00")
+
+    resp = client.post("/transactions/send-package", json={"receiver_id": receiver.id, "amount": 0.01},
+                       headers=auth_header(token))
+    assert resp.status_code == 400
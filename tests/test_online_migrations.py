@@ -0,0 +1,100 @@
+import os
+
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.exc import OperationalError
+
+from app.core import online_migrations as online
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _alembic_config(url):
+    cfg = Config(os.path.join(ROOT, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    cfg.set_main_option("sqlalchemy.url", url)
+    return cfg
+
+
+def test_migrations_build_the_model_schema(tmp_path):
+    cfg = _alembic_config(f"sqlite:///{tmp_path / 'migrated.db'}")
+    command.upgrade(cfg, "head")
+    # raises if the models and the migrated schema differ
+    command.check(cfg)
+    command.downgrade(cfg, "base")
+
+
+@pytest.fixture
+def conn(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'online.db'}")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(sa.text("CREATE TABLE items (id INTEGER PRIMARY KEY, amount FLOAT)"))
+        conn.execute(sa.text("INSERT INTO items (id, amount) VALUES " + ", ".join(f"({i}, {i}.5)" for i in range(1, 26))))
+        yield conn
+
+
+def test_add_column_and_index_are_idempotent(conn):
+    assert online.add_column(conn, "items", sa.Column("amount_minor", sa.BigInteger, nullable=True))
+    assert not online.add_column(conn, "items", sa.Column("amount_minor", sa.BigInteger, nullable=True))
+    with pytest.raises(ValueError):
+        online.add_column(conn, "items", sa.Column("strict", sa.Integer, nullable=False))
+
+    assert online.create_index(conn, "ix_items_amount_minor", "items", ["amount_minor"])
+    assert not online.create_index(conn, "ix_items_amount_minor", "items", ["amount_minor"])
+    online.drop_index(conn, "ix_items_amount_minor")
+    assert not online.index_exists(conn, "items", "ix_items_amount_minor")
+
+
+def test_backfill_runs_in_batches_and_resumes(conn):
+    online.add_column(conn, "items", sa.Column("amount_minor", sa.BigInteger, nullable=True))
+    values = {"amount_minor": sa.cast(sa.column("amount") * 100, sa.BigInteger)}
+    pending = sa.column("amount_minor").is_(None)
+
+    # interrupted after two batches of 10
+    assert online.backfill(conn, "items_minor", "items", values, where=pending, batch_size=10, sleep=0, max_batches=2) == 20
+    assert conn.execute(sa.text("SELECT count(*) FROM items WHERE amount_minor IS NULL")).scalar() == 5
+
+    # the next run picks up at id 20 and finishes
+    assert online.backfill(conn, "items_minor", "items", values, where=pending, batch_size=10, sleep=0) == 5
+    assert conn.execute(sa.text("SELECT amount_minor FROM items WHERE id = 25")).scalar() == 2550
+    assert online.backfill(conn, "items_minor", "items", values, where=pending, batch_size=10, sleep=0) == 0
+
+    progress = conn.execute(sa.text("SELECT last_pk, rows FROM migration_progress WHERE name = 'items_minor'")).one()
+    assert tuple(progress) == (25, 25)
+
+
+class _LockNotAvailable(Exception):
+    pgcode = online.LOCK_NOT_AVAILABLE
+
+
+class _FlakyConnection:
+    """Raises lock_timeout on the first `failures` statements."""
+
+    class dialect:
+        name = "postgresql"
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+        if str(statement).startswith("SET lock_timeout"):
+            return None
+        if self.failures:
+            self.failures -= 1
+            raise OperationalError(str(statement), {}, _LockNotAvailable())
+        return "done"
+
+
+def test_ddl_retries_lock_timeouts(monkeypatch):
+    monkeypatch.setattr(online.time, "sleep", lambda _: None)
+    conn = _FlakyConnection(failures=2)
+    assert online.execute(conn, "ALTER TABLE items ADD COLUMN x INT", retries=3) == "done"
+    assert conn.statements[0].startswith("SET lock_timeout")
+    assert conn.statements.count("ALTER TABLE items ADD COLUMN x INT") == 3
+
+    with pytest.raises(OperationalError):
+        online.execute(_FlakyConnection(failures=5), "ALTER TABLE items ADD COLUMN x INT", retries=2)
@@ -0,0 +1,75 @@
+import time
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from app import models
+from app.core import outbox
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _stats(client, token, user_id):
+    resp = client.get(f"/api/management/users/{user_id}/stats", headers=auth_header(token))
+    assert resp.status_code == 200
+    return resp.json()["data"]
+
+
+def test_money_writes_append_events_and_project_user_stats(client, engine, db_session, create_user, get_token):
+    manager = create_user(phone="ob_mgr", password="om", role=models.Role.MANAGER, remaining_balance=100)
+    jester = create_user(phone="ob_jester", password="oj", role=models.Role.JESTER, remaining_balance=50)
+    jester.superior_id = manager.id
+    db_session.commit()
+    manager_token, jester_token = get_token(manager.phone, "om"), get_token(jester.phone, "oj")
+    last_id = db_session.execute(select(models.OutboxEvent.id).order_by(models.OutboxEvent.id.desc())).scalar() or 0
+
+    sent = [client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": amount},
+                        headers=auth_header(manager_token)).json()["data"]["transaction_id_num"] for amount in (30, 5)]
+    client.post("/transactions/revert", json={"transaction_id": sent[1]}, headers=auth_header(manager_token))
+    client.post("/game/end", json={
+        "total_pot": 40, "cut": 8, "winning_pattern": "row", "win_amount": 12.5,
+        "bet_amount": 10, "date": "2025-01-01", "time": "10:00", "jester_name": "oj",
+    }, headers=auth_header(jester_token))
+    # rolled back: no event
+    resp = client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": 1000},
+                       headers=auth_header(manager_token))
+    assert resp.status_code == 400
+
+    events = db_session.execute(
+        select(models.OutboxEvent.topic, models.OutboxEvent.payload).where(models.OutboxEvent.id > last_id)
+        .order_by(models.OutboxEvent.id)
+    ).all()
+    assert [e.topic for e in events] == ["package.sent", "package.sent", "package.reverted", "game.ended"]
+    assert events[0].payload == {"transaction_id": sent[0], "sender_id": manager.id, "receiver_id": jester.id, "amount": 3000}
+
+    while outbox.process_all(engine):
+        pass
+    data = _stats(client, jester_token, jester.id)
+    assert (data["packages_received"], data["received_total"]) == (1, 30.0)
+    assert (data["games_played"], data["payout_total"]) == (1, 12.5)
+    data = _stats(client, manager_token, manager.id)
+    assert (data["packages_sent"], data["sent_total"]) == (1, 30.0)
+
+    # the lifespan task keeps up on its own
+    client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": 10}, headers=auth_header(manager_token))
+    deadline = time.monotonic() + 2
+    while _stats(client, jester_token, jester.id)["packages_received"] != 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_consumer_waits_at_gaps_until_timeout(monkeypatch):
+    Event = namedtuple("Event", "id")
+    events = [Event(5), Event(6), Event(8)]
+    monkeypatch.setattr(outbox, "_gaps", {})
+    monkeypatch.setattr(outbox.settings, "OUTBOX_GAP_TIMEOUT", 60)
+
+    # 7 may still be in flight
+    assert [e.id for e in outbox._contiguous("t", 4, events)] == [5, 6]
+    assert outbox._contiguous("t", 3, events) == []
+
+    monkeypatch.setattr(outbox.settings, "OUTBOX_GAP_TIMEOUT", 0)
+    assert [e.id for e in outbox._contiguous("t", 4, events)] == [5, 6, 8]
+    assert outbox._gaps == {}
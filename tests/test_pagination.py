@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    stamp = datetime(2025, 3, 1, 12, 30)
+    assert decode_cursor(encode_cursor([stamp, 42]), (datetime, int)) == [stamp, 42]
+    for bad in ("not-base64!", encode_cursor([1]), encode_cursor(["x", "y"])):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(bad, (datetime, int))
+        assert exc.value.status_code == 400
+
+
+def test_my_transactions_keyset_pages(client, db_session, create_user, get_token):
+    jester = create_user(phone="page_jester", password="pj", role=models.Role.JESTER)
+    # inside GAME_TX_QUERY_WINDOW_DAYS
+    start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
+    # two rows share a timestamp so the id tie-breaker matters
+    stamps = [start, start + timedelta(minutes=1), start + timedelta(minutes=1), start + timedelta(minutes=2), start + timedelta(minutes=3)]
+    for stamp in stamps:
+        db_session.add(models.GameTransaction(jester_id=jester.id, bet_amount=1.0, total_pot=1.0, created_at=stamp))
+    db_session.commit()
+    expected = [
+        t.id for t in db_session.query(models.GameTransaction)
+        .filter(models.GameTransaction.jester_id == jester.id)
+        .order_by(models.GameTransaction.created_at.desc(), models.GameTransaction.id.desc())
+    ]
+    token = get_token(jester.phone, "pj")
+
+    seen = []
+    url = "/api/game/my-transactions?limit=2"
+    pages = 0
+    while url:
+        resp = client.get(url, headers=auth_header(token))
+        assert resp.status_code == 200
+        body = resp.json()
+        seen += [row["id"] for row in body["data"]]
+        pages += 1
+        if body["next_cursor"]:
+            assert 'rel="next"' in resp.headers["link"]
+            url = f"/api/game/my-transactions?limit=2&cursor={body['next_cursor']}"
+        else:
+            assert "link" not in resp.headers
+            url = None
+    assert pages == 3
+    assert seen == expected
+
+    resp = client.get("/api/game/my-transactions?cursor=bogus", headers=auth_header(token))
+    assert resp.status_code == 400
+
+
+def test_cards_are_scoped_and_paginated_within_rows(client, db_session, create_user, get_token):
+    manager = create_user(phone="page_mgr", password="pm", role=models.Role.MANAGER)
+    jester = create_user(phone="page_cj", password="pc", role=models.Role.JESTER)
+    other = create_user(phone="page_other", password="po", role=models.Role.JESTER)
+    jester.superior_id = manager.id
+    db_session.commit()
+
+    def card(n):
+        return {"B": [n], "I": [], "N": [], "G": [], "O": [], "cardNumber": [n]}
+
+    db_session.add_all([
+        models.BingoCard(id="pgc001", owner_id=manager.id, card_data={"cards": [card(1), card(2), card(3)]}),
+        models.BingoCard(id="pgc002", owner_id=jester.id, card_data={"cards": [card(4), card(5)]}),
+        models.BingoCard(id="pgc003", owner_id=other.id, card_data={"cards": [card(99)]}),
+    ])
+    db_session.commit()
+
+    token = get_token(manager.phone, "pm")
+    numbers = []
+    cursor = None
+    while True:
+        url = "/api/game/cards?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(url, headers=auth_header(token)).json()
+        numbers += [c["cardNumber"][0] for c in body["cards"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert numbers == [1, 2, 3, 4, 5]
+
+    jester_token = get_token(jester.phone, "pc")
+    body = client.get("/api/game/cards", headers=auth_header(jester_token)).json()
+    assert [c["cardNumber"][0] for c in body["cards"]] == [4, 5]
+
+    assert client.get("/api/game/cards").status_code in (401, 403)
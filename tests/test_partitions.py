@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+
+from app import models
+from app.core import partitions
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_month_arithmetic_and_names():
+    dec = datetime(2025, 12, 17, 8, 30, tzinfo=timezone.utc)
+    assert partitions.month_start(dec) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert partitions.add_months(partitions.month_start(dec), 1) == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert partitions.add_months(datetime(2025, 1, 1), -1) == datetime(2024, 12, 1)
+    assert partitions.partition_name(datetime(2025, 3, 1)) == "game_transactions_y2025m03"
+
+
+def test_partition_ddl_bounds():
+    sql = partitions.create_partition_sql(datetime(2025, 12, 1), parent="game_transactions_part")
+    assert sql == (
+        "CREATE TABLE IF NOT EXISTS game_transactions_y2025m12 PARTITION OF game_transactions_part "
+        "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+    )
+
+
+def test_window_start_uses_setting(monkeypatch):
+    monkeypatch.setattr(partitions.settings, "GAME_TX_QUERY_WINDOW_DAYS", 30)
+    now = datetime(2025, 3, 31, tzinfo=timezone.utc)
+    assert partitions.game_tx_window_start(now) == datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+
+def test_helpers_are_noops_off_postgres(engine):
+    assert partitions.ensure_partitions(engine) == []
+    assert partitions.detach_partitions_before(engine, datetime(2025, 1, 1)) == []
+
+
+def test_window_bounds_list_paths_but_not_dashboard(client, db_session, create_user, get_token, monkeypatch):
+    monkeypatch.setattr(partitions.settings, "GAME_TX_QUERY_WINDOW_DAYS", 30)
+    manager = create_user(phone="window_mgr", password="wm", role=models.Role.MANAGER)
+    jester = create_user(phone="window_jester", password="wj", role=models.Role.JESTER)
+    jester.created_by = manager.id
+    old = datetime.now(timezone.utc) - timedelta(days=90)
+    db_session.add(models.GameTransaction(jester_id=jester.id, jester_name="old", bet_amount=1.0, winner_payout=2.0,
+                                          created_at=old))
+    db_session.commit()
+
+    resp = client.get("/api/game/my-transactions", headers=auth_header(get_token(jester.phone, "wj")))
+    assert resp.json()["data"] == []
+
+    # all-time, like the wallet and package figures next to it
+    stats = client.get("/api/management/dashboard", headers=auth_header(get_token(manager.phone, "wm"))).json()
+    assert stats["network_stats"]["total_transactions"] == 1
+    assert stats["network_stats"]["total_wins_count"] == 1
+
+
+def test_explicit_from_reaches_past_the_window(client, db_session, create_user, get_token, monkeypatch):
+    monkeypatch.setattr(partitions.settings, "GAME_TX_QUERY_WINDOW_DAYS", 30)
+    jester = create_user(phone="window_from_jester", password="wf", role=models.Role.JESTER)
+    old = datetime.now(timezone.utc) - timedelta(days=90)
+    game = models.GameTransaction(jester_id=jester.id, jester_name="old", bet_amount=1.0, played_at=old, created_at=old)
+    db_session.add(game)
+    db_session.commit()
+    headers = auth_header(get_token(jester.phone, "wf"))
+    since = {"from": (old - timedelta(days=1)).isoformat()}
+
+    # no lower bound: the window applies
+    assert client.get("/transactions", params={"type": "game"}, headers=headers).json()["data"] == []
+    assert client.get("/api/game/my-transactions", headers=headers).json()["data"] == []
+    # an explicit one is honoured
+    resp = client.get("/transactions", params={"type": "game", **since}, headers=headers)
+    assert [r["id"] for r in resp.json()["data"]] == [game.id]
+    resp = client.get("/api/game/my-transactions", params=since, headers=headers)
+    assert [r["id"] for r in resp.json()["data"]] == [game.id]
+
+
+def test_partitioned_parent_gets_every_model_index_and_the_foreign_key():
+    from scripts import partition_game_transactions as script
+
+    created = script.index_statements()
+    assert len(created) == len(models.GameTransaction.__table__.indexes)
+    assert ("CREATE INDEX IF NOT EXISTS ix_game_transactions_part_jester_played "
+            "ON game_transactions_part (jester_id, played_at)") in created
+    [fk] = script.foreign_key_statements()
+    assert "FOREIGN KEY (jester_id) REFERENCES users(id) ON DELETE CASCADE" in fk
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import helper, models
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize("tx_date,tx_time,expected", [
+    ("2025-03-01", "18:30", datetime(2025, 3, 1, 18, 30)),
+    ("01/03/2025", "6:30 PM", datetime(2025, 3, 1, 18, 30)),
+    ("2025/03/01", "18:30:15", datetime(2025, 3, 1, 18, 30, 15)),
+    ("2025-03-01", "", datetime(2025, 3, 1)),
+    ("2025-03-01T18:30:00+03:00", None, datetime(2025, 3, 1, 15, 30)),
+])
+def test_parse_played_at_formats(tx_date, tx_time, expected):
+    assert helper.parse_played_at(tx_date, tx_time, "UTC") == expected.replace(tzinfo=timezone.utc)
+
+
+def test_parse_played_at_local_zone_and_garbage():
+    assert helper.parse_played_at("2025-03-01", "18:30", "Africa/Addis_Ababa") == datetime(2025, 3, 1, 15, 30, tzinfo=timezone.utc)
+    assert helper.parse_played_at("yesterday", "18:30") is None
+    assert helper.parse_played_at("2025-03-01", "evening") is None
+    assert helper.parse_played_at(None, None) is None
+
+
+def test_end_game_records_played_at_and_ranges_filter_on_it(client, db_session, create_user, get_token):
+    jester = create_user(phone="played_jester", password="pj", role=models.Role.JESTER, remaining_balance=500.0)
+    token = get_token(jester.phone, "pj")
+    today = datetime.now(timezone.utc).date()
+    for day_offset, clock in ((2, "18:00"), (1, "21:15"), (0, "09:00")):
+        day = today - timedelta(days=day_offset)
+        resp = client.post("/game/end", json={
+            "total_pot": 40, "cut": 8, "winning_pattern": "row", "win_amount": 0,
+            "bet_amount": 10, "date": day.isoformat(), "time": clock, "jester_name": "pj",
+        }, headers=auth_header(token))
+        assert resp.status_code == 200
+
+    stored = db_session.query(models.GameTransaction).filter(models.GameTransaction.jester_id == jester.id).all()
+    assert len(stored) == 3 and all(t.played_at is not None for t in stored)
+
+    yesterday = today - timedelta(days=1)
+    window = f"from={yesterday}T20:00:00&to={yesterday}T22:00:00"
+    resp = client.get(f"/api/game/my-transactions?{window}", headers=auth_header(token))
+    assert resp.status_code == 200
+    assert [r["time"] for r in resp.json()["data"]] == ["21:15"]
+
+    resp = client.get(f"/transactions?type=game&from={today - timedelta(days=2)}T17:00:00&to={yesterday}T23:59:59", headers=auth_header(token))
+    assert resp.status_code == 200
+    assert len(resp.json()["data"]) == 2
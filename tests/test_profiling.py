@@ -0,0 +1,75 @@
+import asyncio
+import os
+import pstats
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app import models
+from app.core import profiling
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_owner_can_profile_a_request(client, create_user, get_token, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "_SamplingProfiler", None)  # exercise the cProfile fallback
+    owner = create_user(phone="prof_owner", password="po", role=models.Role.OWNER)
+    token = get_token(owner.phone, "po")
+
+    resp = client.get("/transactions?profile=1", headers=auth_header(token))
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "success"
+
+    file_id = resp.headers["X-Profile-Id"]
+    assert file_id.endswith(".prof")
+    stats = pstats.Stats(os.path.join(str(tmp_path), file_id))
+    assert any(fn[2] == "list_transactions" for fn in stats.stats)
+
+    timing = resp.headers["Server-Timing"]
+    for part in ("total;dur=", "python;dur=", "sql;dur=", "serialize;dur="):
+        assert part in timing
+
+
+def test_profiling_is_owner_only(client, create_user, get_token, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.settings, "PROFILE_DIR", str(tmp_path))
+    jester = create_user(phone="prof_jester", password="pj", role=models.Role.JESTER)
+    token = get_token(jester.phone, "pj")
+
+    # the flag is ignored, not refused
+    resp = client.get("/transactions", headers={**auth_header(token), "X-Profile": "1"})
+    assert resp.status_code == 200
+    assert "X-Profile-Id" not in resp.headers
+    resp = client.get("/?profile=1")
+    assert resp.status_code == 200
+    assert "Server-Timing" not in resp.headers
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_profiled_response_keeps_repeated_headers(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "_is_owner", lambda authorization: True)
+
+    async def call_next(request):
+        response = StreamingResponse(iter([b"ok"]), media_type="text/plain")
+        response.raw_headers += [(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2")]
+        return response
+
+    request = Request({"type": "http", "method": "GET", "path": "/", "query_string": b"profile=1", "headers": []})
+    response = asyncio.run(profiling.profile_middleware(request, call_next))
+    assert response.body == b"ok"
+    assert [v for k, v in response.raw_headers if k == b"set-cookie"] == [b"a=1", b"b=2"]
+    assert dict(response.raw_headers)[b"content-length"] == b"2"
+    assert b"server-timing" in dict(response.raw_headers)
+
+
+def test_unflagged_requests_are_not_profiled(client, create_user, get_token):
+    owner = create_user(phone="prof_owner2", password="po2", role=models.Role.OWNER)
+    token = get_token(owner.phone, "po2")
+
+    resp = client.get("/transactions", headers=auth_header(token))
+    assert resp.status_code == 200
+    assert "X-Profile-Id" not in resp.headers
+    assert profiling.current_profile() is None
@@ -0,0 +1,158 @@
+import asyncio
+
+import orjson
+
+from app import models
+from app.core import push
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_notify_publishes_only_after_commit(SessionLocal, create_user):
+    user = create_user(phone="push_unit", password="pu", role=models.Role.JESTER)
+
+    def write(commit):
+        db = SessionLocal()
+        try:
+            push.notify(db, user.id, "balance_changed", balance=1)
+            db.commit() if commit else db.rollback()
+        finally:
+            db.close()
+
+    async def scenario():
+        sub = push.hub.subscribe(user.id)
+        try:
+            await asyncio.to_thread(write, False)
+            await asyncio.to_thread(write, True)
+            message = await asyncio.wait_for(sub.queue.get(), 2)
+            assert message == {"user_id": user.id, "type": "balance_changed", "balance": 1}
+            assert sub.queue.empty()
+        finally:
+            push.hub.unsubscribe(sub)
+
+    asyncio.run(scenario())
+
+
+def _events(chunks):
+    out = []
+    for chunk in chunks:
+        for frame in chunk.decode().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in frame.splitlines() if line and not line.startswith(":"))
+            if "data" in lines:
+                out.append(orjson.loads(lines["data"]))
+    return out
+
+
+def test_events_stream_delivers_committed_changes(client, db_session, create_user, get_token):
+    from app.main import app
+
+    manager = create_user(phone="push_mgr", password="pm", role=models.Role.MANAGER, remaining_balance=100)
+    jester = create_user(phone="push_jester", password="pj", role=models.Role.JESTER, remaining_balance=5)
+    jester.superior_id = manager.id
+    db_session.commit()
+    manager_token, jester_token = get_token(manager.phone, "pm"), get_token(jester.phone, "pj")
+
+    async def scenario():
+        chunks, got = [], asyncio.Event()
+        started = False
+
+        async def receive():
+            nonlocal started
+            if not started:
+                started = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # the client stays connected until the stream ends
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                assert message["status"] == 200
+            elif message.get("body"):
+                chunks.append(message["body"])
+                got.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/events", "raw_path": b"/events", "root_path": "",
+            "query_string": f"access_token={jester_token}".encode(),
+            "headers": [(b"host", b"test")], "client": ("test", 1), "server": ("test", 80),
+        }
+        task = asyncio.create_task(app(scope, receive, send))
+
+        async def wait_for(n):
+            while len(_events(chunks)) < n:
+                got.clear()
+                await asyncio.wait_for(got.wait(), 5)
+
+        await wait_for(1)
+        resp = await asyncio.to_thread(client.post, "/transactions/send-package",
+                                       json={"receiver_id": jester.id, "amount": 20}, headers=auth_header(manager_token))
+        assert resp.status_code == 200
+        await wait_for(3)
+        # end the stream the way an overflow would
+        push.hub.deliver([{**push.RESYNC, "user_id": jester.id}])
+        await asyncio.wait_for(task, 5)
+        return _events(chunks)
+
+    events = asyncio.run(scenario())
+    assert [(e["type"], e.get("balance")) for e in events] == [
+        ("balance_changed", 5.0), ("package_received", None), ("balance_changed", 25.0), ("resync", None),
+    ]
+    assert events[1]["amount"] == 20.0 and events[1]["sender_id"] == manager.id
+
+    # the manager's app hears about a new credit request
+    async def inbox():
+        sub = push.hub.subscribe(manager.id)
+        try:
+            resp = await asyncio.to_thread(client.post, "/transactions/request-package", json={"amount": 7},
+                                           headers=auth_header(jester_token))
+            message = await asyncio.wait_for(sub.queue.get(), 2)
+            assert message == {"user_id": manager.id, "type": "credit_request_created",
+                               "request_id": resp.json()["data"]["request_id"], "requester_id": jester.id, "amount": 7.0}
+        finally:
+            push.hub.unsubscribe(sub)
+
+    asyncio.run(inbox())
+
+
+def test_events_subscribes_before_reading_the_balance(client, create_user, get_token, monkeypatch):
+    from app.main import app
+    from app.router import events
+
+    jester = create_user(phone="push_order", password="po", role=models.Role.JESTER)
+    token = get_token(jester.phone, "po")
+    subscribed_at_load = []
+    load = events._load
+
+    def checked_load(user_id):
+        # a package committed from here on must reach the stream
+        subscribed_at_load.append(user_id in push.hub._subs)
+        return load(user_id)
+
+    monkeypatch.setattr(events, "_load", checked_load)
+
+    async def scenario():
+        first = asyncio.Event()
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message.get("body"):
+                first.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/events", "raw_path": b"/events", "root_path": "",
+            "query_string": f"access_token={token}".encode(),
+            "headers": [(b"host", b"test")], "client": ("test", 1), "server": ("test", 80),
+        }
+        task = asyncio.create_task(app(scope, receive, send))
+        await asyncio.wait_for(first.wait(), 5)
+        push.hub.deliver([{**push.RESYNC, "user_id": jester.id}])
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+    assert subscribed_at_load == [True]
@@ -0,0 +1,220 @@
+"""Query-plan regression snapshots for the hot scoped queries.
+
+Seeds a sizeable dataset, captures the plan of every query in CATALOGUE,
+normalizes it and compares it with `tests/plan_snapshots/<dialect>/<name>.txt`.
+A test fails when a table is read with a full scan (of the table, or of a
+whole index) that the snapshot does not have, or (PostgreSQL) when the
+estimated total cost grows past PLAN_COST_THRESHOLD times the snapshot.
+Committed snapshots themselves must not contain full scans.
+
+SQLite (`EXPLAIN QUERY PLAN`) always runs; PostgreSQL runs when
+PLAN_DATABASE_URL points at a scratch database (its tables are recreated).
+A missing snapshot fails the test. Set UPDATE_PLAN_SNAPSHOTS=1 to write
+snapshots for a new query or after an intended change.
+"""
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import models
+from app.database import Base
+from app.router.game import my_game_transactions_query
+from app.router.management import dashboard_queries
+from app.router.transactions import game_transactions_query, package_transactions_query
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "plan_snapshots")
+COST_THRESHOLD = float(os.getenv("PLAN_COST_THRESHOLD", "2.0"))
+UPDATE = os.getenv("UPDATE_PLAN_SNAPSHOTS") == "1"
+
+MANAGERS = 20
+JESTERS_PER_MANAGER = 25
+GAMES = 60000
+PACKAGES = 20000
+
+# ids below are fixed by the seeding order
+MANAGER_ID = 2
+MANAGER_JESTERS = list(range(MANAGERS + 2, MANAGERS + 2 + JESTERS_PER_MANAGER))
+JESTER_ID = MANAGER_JESTERS[0]
+
+# list endpoints bound game_transactions reads by the query window; a fixed bound
+# inside the seeded range keeps the plans reproducible
+SINCE = datetime(2024, 1, 15, tzinfo=timezone.utc)
+
+CATALOGUE = {
+    "my_game_transactions": lambda: my_game_transactions_query(JESTER_ID, SINCE),
+    "my_game_transactions_played_range": lambda: my_game_transactions_query(
+        JESTER_ID, SINCE, datetime(2024, 1, 20, 18, tzinfo=timezone.utc), datetime(2024, 1, 20, 22, tzinfo=timezone.utc)
+    ),
+    "list_transactions_game_scoped": lambda: game_transactions_query(MANAGER_JESTERS, SINCE),
+    "list_transactions_package_scoped": lambda: package_transactions_query(MANAGER_JESTERS),
+    **{
+        f"dashboard_manager_{name}": (lambda name=name: dashboard_queries(MANAGER_ID)[name])
+        for name in ("wallet_summary", "game_count", "package_count", "wins")
+    },
+}
+
+
+def _seed(engine):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    users = [{"id": 1, "phone": "owner", "password": "x", "role": "OWNER", "created_at": start}]
+    for m in range(MANAGERS):
+        users.append({"id": 2 + m, "phone": f"m{m}", "password": "x", "role": "MANAGER",
+                      "superior_id": 1, "created_by": 1, "created_at": start})
+    jester_ids = []
+    for m in range(MANAGERS):
+        for j in range(JESTERS_PER_MANAGER):
+            uid = MANAGERS + 2 + m * JESTERS_PER_MANAGER + j
+            jester_ids.append(uid)
+            users.append({"id": uid, "phone": f"j{uid}", "password": "x", "role": "JESTER",
+                          "superior_id": 2 + m, "created_by": 2 + m, "created_at": start})
+    games = [{"jester_id": jester_ids[i % len(jester_ids)], "jester_name": "j", "bet_amount": 10.0, "total_pot": 40.0,
+              "winner_payout": float(i % 3) * 10, "created_at": start + timedelta(minutes=i),
+              "played_at": start + timedelta(minutes=i)} for i in range(GAMES)]
+    packages = [{"sender_id": 2 + i % MANAGERS, "receiver_id": jester_ids[i % len(jester_ids)], "package_amount": 50.0,
+                 "created_at": start + timedelta(minutes=3 * i)} for i in range(PACKAGES)]
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), users)
+        conn.execute(models.Wallet.__table__.insert(), [
+            {"user_id": u["id"], "balance": 100.0 if u["role"] == "JESTER" else 0.0, "version": 1} for u in users
+        ])
+        conn.execute(models.GameTransaction.__table__.insert(), games)
+        conn.execute(models.PackageTransaction.__table__.insert(), packages)
+        conn.execute(text("ANALYZE"))
+
+
+# --- plan capture / normalization ---------------------------------------------------
+
+def _sqlite_plan(conn, sql):
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        detail = re.sub(r"\b(SCAN|SEARCH) TABLE ", r"\1 ", detail)
+        lines.append("  " * depth[node_id] + detail)
+    return {"cost": None, "lines": lines}
+
+
+def _pg_plan(conn, sql):
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]["Plan"]
+    lines = []
+
+    def walk(node, depth):
+        line = node["Node Type"]
+        if node.get("Relation Name"):
+            line += f" on {node['Relation Name']}"
+        if node.get("Index Name"):
+            line += f" using {node['Index Name']}"
+            if node["Node Type"] in ("Index Scan", "Index Only Scan") and not node.get("Index Cond"):
+                line += " (full)"
+        lines.append("  " * depth + line)
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return {"cost": root["Total Cost"], "lines": lines}
+
+
+_SQLITE_ACCESS = re.compile(r"^\s*(SCAN|SEARCH) (\w+)(.*)$")
+_PG_ACCESS = re.compile(r"^\s*(Seq Scan|Index Scan|Index Only Scan|Bitmap Heap Scan) on (\w+)")
+
+
+def full_scans(lines):
+    """Tables read in full, directly or through a whole index, in the given plan lines."""
+    out = set()
+    for line in lines:
+        m = _SQLITE_ACCESS.match(line)
+        if m:
+            kind, table, _ = m.groups()
+            # SCAN ... USING [COVERING] INDEX still visits every index entry
+            if kind == "SCAN" and table in Base.metadata.tables:
+                out.add(table)
+            continue
+        m = _PG_ACCESS.match(line)
+        if m and (m.group(1) == "Seq Scan" or line.endswith("(full)")):
+            out.add(m.group(2))
+    return out
+
+
+def _read_snapshot(path):
+    cost = None
+    lines = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for raw in fh.read().splitlines():
+            if raw.startswith("# cost:"):
+                cost = float(raw.split(":", 1)[1])
+            elif raw.strip():
+                lines.append(raw)
+    return {"cost": cost, "lines": lines}
+
+
+def _write_snapshot(path, plan):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        if plan["cost"] is not None:
+            fh.write(f"# cost: {plan['cost']}\n")
+        fh.write("\n".join(plan["lines"]) + "\n")
+
+
+# --- fixtures -------------------------------------------------------------------------
+
+def _backends():
+    params = ["sqlite"]
+    params.append(pytest.param("postgresql", marks=pytest.mark.skipif(
+        not os.getenv("PLAN_DATABASE_URL"), reason="PLAN_DATABASE_URL not set")))
+    return params
+
+
+@pytest.fixture(scope="module", params=_backends())
+def plan_engine(request, tmp_path_factory):
+    if request.param == "sqlite":
+        engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    else:
+        engine = create_engine(os.environ["PLAN_DATABASE_URL"])
+    _seed(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", sorted(CATALOGUE))
+def test_query_plan_matches_snapshot(plan_engine, name):
+    dialect = plan_engine.dialect.name
+    sql = str(CATALOGUE[name]().compile(dialect=plan_engine.dialect, compile_kwargs={"literal_binds": True}))
+    with plan_engine.connect() as conn:
+        plan = _sqlite_plan(conn, sql) if dialect == "sqlite" else _pg_plan(conn, sql)
+
+    path = os.path.join(SNAPSHOT_DIR, dialect, f"{name}.txt")
+    if UPDATE:
+        _write_snapshot(path, plan)
+        return
+    assert os.path.exists(path), f"{name}: no plan snapshot at {path}; run with UPDATE_PLAN_SNAPSHOTS=1 to create it"
+
+    snapshot = _read_snapshot(path)
+    assert not full_scans(snapshot["lines"]), f"{name}: snapshot {path} accepts full scans on {sorted(full_scans(snapshot['lines']))}"
+    new_scans = full_scans(plan["lines"]) - full_scans(snapshot["lines"])
+    assert not new_scans, (
+        f"{name}: index access replaced by full scan on {sorted(new_scans)}\n"
+        "snapshot:\n" + "\n".join(snapshot["lines"]) + "\ncurrent:\n" + "\n".join(plan["lines"])
+    )
+    if snapshot["cost"] is not None and plan["cost"] is not None:
+        assert plan["cost"] <= snapshot["cost"] * COST_THRESHOLD, (
+            f"{name}: estimated cost {plan['cost']} exceeds {COST_THRESHOLD}x snapshot {snapshot['cost']}"
+        )
+
+
+def test_full_scan_detection():
+    assert full_scans(["SCAN game_transactions", "SEARCH users USING INTEGER PRIMARY KEY (rowid=?)"]) == {"game_transactions"}
+    assert full_scans(["SCAN users USING COVERING INDEX ix_users_created_by"]) == {"users"}
+    assert full_scans(["SEARCH users USING COVERING INDEX ix_users_created_by (created_by=?)", "SCAN anon_1"]) == set()
+    assert full_scans(["Sort", "  Seq Scan on game_transactions"]) == {"game_transactions"}
+    assert full_scans(["Index Scan on game_transactions using ix"]) == set()
+    assert full_scans(["Index Only Scan on users using ix_users_created_by (full)"]) == {"users"}
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.core.database as core_db
+from app import models
+from app.database import Base
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch, setup_database):
+    """Second SQLite file standing in for a read replica."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _register_now(dbapi_conn, _record):
+        dbapi_conn.create_function("now", 0, lambda: datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f"))
+
+    Base.metadata.create_all(bind=engine)
+    ReplicaSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(core_db, "ReadSessionLocal", ReplicaSession)
+    yield ReplicaSession
+    engine.dispose()
+
+
+def test_reads_go_to_replica_until_user_writes(client, create_user, get_token, replica, monkeypatch):
+    jester = create_user(phone="replica_jester", password="rj", role=models.Role.JESTER, remaining_balance=100.0)
+    token = get_token(jester.phone, "rj")
+
+    # a row that only exists on the "replica"
+    with replica() as rdb:
+        rdb.add(models.GameTransaction(jester_id=jester.id, jester_name="from-replica", bet_amount=1.0))
+        rdb.commit()
+
+    resp = client.get("/api/game/my-transactions", headers=auth_header(token))
+    assert [t["jester_name"] for t in resp.json()["data"]] == ["from-replica"]
+
+    end_payload = {
+        "total_pot": 40, "cut": 8, "winning_pattern": "row", "win_amount": 32,
+        "bet_amount": 10, "date": "2025-01-01", "time": "18:00", "jester_name": "from-primary",
+    }
+    resp = client.post("/game/end", json=end_payload, headers=auth_header(token))
+    assert resp.status_code == 200
+    pin = resp.headers[core_db.READ_PIN_HEADER]
+    assert core_db.read_pin_user(pin) == jester.id
+
+    # the cookie brings the client back to the primary
+    resp = client.get("/api/game/my-transactions", headers=auth_header(token))
+    assert [t["jester_name"] for t in resp.json()["data"]] == ["from-primary"]
+
+    # so does the header, on a connection without the cookie (any worker)
+    client.cookies.clear()
+    resp = client.get("/api/game/my-transactions", headers={**auth_header(token), core_db.READ_PIN_HEADER: pin})
+    assert [t["jester_name"] for t in resp.json()["data"]] == ["from-primary"]
+
+    # a pin issued to someone else, or expired, is ignored
+    for other in (core_db.issue_read_pin(jester.id + 1), core_db.issue_read_pin(jester.id, seconds=-1)):
+        resp = client.get("/api/game/my-transactions", headers={**auth_header(token), core_db.READ_PIN_HEADER: other})
+        assert [t["jester_name"] for t in resp.json()["data"]] == ["from-replica"]
+
+    # reads never hand out a pin
+    assert core_db.READ_PIN_HEADER not in resp.headers
+
+
+def test_reads_without_replica_use_primary(client, create_user, get_token, monkeypatch):
+    monkeypatch.setattr(core_db, "ReadSessionLocal", None)
+    jester = create_user(phone="noreplica_jester", password="nj", role=models.Role.JESTER)
+    token = get_token(jester.phone, "nj")
+
+    resp = client.get("/api/game/my-transactions", headers=auth_header(token))
+    assert resp.status_code == 200
+    assert resp.json()["data"] == []
+    assert core_db.READ_PIN_HEADER not in resp.headers
+
+
+def test_reads_resolve_the_caller_on_the_replica(client, create_user, get_token, replica, engine):
+    jester = create_user(phone="replica_auth_jester", password="ra", role=models.Role.JESTER, remaining_balance=100.0)
+    token = get_token(jester.phone, "ra")
+    with replica() as rdb:
+        rdb.merge(models.User(id=jester.id, phone=jester.phone, password=jester.password, role=jester.role))
+        rdb.commit()
+
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        resp = client.get("/api/game/my-transactions", headers=auth_header(token))
+        assert resp.status_code == 200
+        # neither the caller nor the page touched the primary
+        assert statements == []
+
+        end_payload = {
+            "total_pot": 40, "cut": 8, "winning_pattern": "row", "win_amount": 32,
+            "bet_amount": 10, "date": "2025-01-01", "time": "18:00", "jester_name": "primary",
+        }
+        resp = client.post("/game/end", json=end_payload, headers=auth_header(token))
+        assert resp.status_code == 200
+        assert core_db.read_pin_user(resp.headers[core_db.READ_PIN_HEADER]) == jester.id
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
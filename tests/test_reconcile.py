@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core import archive, reconcile
+from app.database import Base
+
+NOW = datetime(2025, 3, 1, tzinfo=timezone.utc)
+OLD = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def ledger_engine(tmp_path, monkeypatch):
+    # spawned workers read settings from the environment
+    monkeypatch.setenv("ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(archive.settings, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    engine = create_engine(f"sqlite:///{tmp_path / 'ledger.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _seed(engine):
+    with Session(engine) as db:
+        def user(uid, role, superior=None):
+            db.add(models.User(id=uid, phone=f"r{uid}", password="x", role=role, superior_id=superior, created_at=NOW))
+
+        def package(tx_id, sender, receiver, amount, status=None, refund_to=None):
+            db.add(models.PackageTransaction(id=tx_id, sender_id=sender, receiver_id=receiver, package_amount=amount,
+                                             status=status, refund_to=refund_to, created_at=NOW))
+
+        user(1, models.Role.OWNER)
+        user(2, models.Role.MANAGER, 1)
+        user(3, models.Role.JESTER, 2)
+        user(4, models.Role.JESTER, 2)
+        user(5, models.Role.MANAGER, 1)
+        user(6, models.Role.JESTER, 5)
+        db.flush()
+        package(1, 1, 2, 100)
+        package(2, 2, 3, 30)
+        # reverted by the previous release: refund_to unset, back to the sender
+        package(3, 2, 4, 20, "REVERTED")
+        package(4, 1, 5, 50)
+        package(5, 5, 6, 10, "REVERTED", refund_to=1)
+        db.add_all([
+            models.GameTransaction(id=1, jester_id=3, dedacted_amount=5, created_at=OLD),
+            models.GameTransaction(id=2, jester_id=3, dedacted_amount=Decimal("-12.50"), created_at=NOW),
+        ])
+        # ledger: 2 -> 70, 3 -> 37.50, 4 -> 0, 5 -> 40 (owner took the revert), 6 -> 0
+        db.add_all([
+            models.Wallet(user_id=2, balance=70), models.Wallet(user_id=3, balance=Decimal("40.50")),
+            models.Wallet(user_id=5, balance=40), models.Wallet(user_id=6, balance=5),
+            models.Wallet(user_id=1, balance=999),
+        ])
+        db.commit()
+    archive.archive_table(engine, "game_transactions", datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_reconcile_reports_drift_per_subtree(ledger_engine, workers):
+    _seed(ledger_engine)
+
+    report = reconcile.reconcile(ledger_engine, workers=workers, unit_rows=2)
+
+    assert report.users_checked == 5
+    # one archived game, one hot game, five packages
+    assert report.rows == 7
+    assert [(d["subtree_id"], d["user_id"], d["expected"], d["difference"]) for d in report.discrepancies] == [
+        (2, 3, Decimal("37.50"), Decimal("3.00")),
+        (5, 6, Decimal("0.00"), Decimal("5.00")),
+    ]
+
+
+def test_owner_revert_is_reconciled_without_the_audit_log(client, engine, db_session, create_user, get_token, monkeypatch):
+    monkeypatch.setattr(archive.settings, "AUDIT_SINK", "off")
+    owner = create_user(phone="rc_owner", password="ro", role=models.Role.OWNER)
+    manager = create_user(phone="rc_mgr", password="rm", role=models.Role.MANAGER)
+    jester = create_user(phone="rc_jester", password="rj", role=models.Role.JESTER)
+    owner_token, manager_token = get_token(owner.phone, "ro"), get_token(manager.phone, "rm")
+    client.post("/transactions/send-package", json={"receiver_id": manager.id, "amount": 100},
+                headers=auth_header(owner_token))
+    tx_id = client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": 30},
+                        headers=auth_header(manager_token)).json()["data"]["transaction_id_num"]
+    resp = client.post("/transactions/revert", json={"transaction_id": tx_id}, headers=auth_header(owner_token))
+    assert resp.status_code == 200
+
+    tx = db_session.get(models.PackageTransaction, tx_id)
+    assert (tx.status, tx.refund_to) == ("REVERTED", owner.id) and tx.reverted_at is not None
+    report = reconcile.reconcile(engine, workers=0)
+    assert not [d for d in report.discrepancies if d["user_id"] in (manager.id, jester.id)]
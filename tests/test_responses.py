@@ -0,0 +1,53 @@
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import models
+from app.core.responses import StreamingJSONResponse
+
+
+def _collect(response):
+    async def run():
+        return [chunk async for chunk in response.body_iterator]
+
+    return asyncio.run(run())
+
+
+def test_streaming_json_response_chunks_and_envelope():
+    rows = [{"id": i, "at": datetime(2025, 1, 1, 12, 0, i % 60)} for i in range(500)]
+    chunks = _collect(StreamingJSONResponse(iter(rows), envelope={"status": "success"}, chunk_bytes=256))
+
+    assert len(chunks) > 1
+    body = json.loads(b"".join(chunks))
+    assert body["status"] == "success"
+    assert [r["id"] for r in body["data"]] == list(range(500))
+    assert body["data"][1]["at"] == "2025-01-01T12:00:01"
+
+
+def test_streaming_json_response_served_as_json():
+    app = FastAPI()
+
+    @app.get("/empty")
+    def empty_endpoint():
+        return StreamingJSONResponse(iter(()), key="cards")
+
+    with TestClient(app) as c:
+        resp = c.get("/empty")
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json() == {"cards": []}
+
+
+def test_game_cards_are_flattened(client, db_session, create_user, get_token):
+    owner = create_user(phone="cards_owner", password="co", role=models.Role.OWNER)
+    card = {"B": [1], "I": [16], "N": [31], "G": [46], "O": [61], "cardNumber": [7]}
+    db_session.add(models.BingoCard(id="crd001", owner_id=owner.id, card_data={"cards": [card, card]}))
+    db_session.commit()
+
+    token = get_token(owner.phone, "co")
+    resp = client.get("/api/game/cards", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    cards = resp.json()["cards"]
+    assert cards.count(card) >= 2
@@ -0,0 +1,61 @@
+import pytest
+
+from app import models
+from app.core import slow_queries
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(slow_queries.settings, "SLOW_QUERY_LOG_DIR", str(tmp_path))
+    slow_queries.reset_logger()
+    yield tmp_path
+    slow_queries.reset_logger()
+
+
+def test_fingerprint_ignores_literals_and_in_list_length():
+    a = slow_queries.fingerprint("SELECT * FROM users WHERE id IN (?, ?, ?) AND phone = 'x'")
+    b = slow_queries.fingerprint("SELECT *  FROM users WHERE id IN (?, ?) AND phone = 'other'")
+    assert a == b
+    assert slow_queries.param_shape({"phone": "secret", "id": 3}) == {"phone": "str", "id": "int"}
+
+
+def test_only_read_only_selects_are_explained_with_analyze():
+    assert slow_queries.explain_mode("SELECT id FROM users WHERE phone = %(p)s") == "analyze"
+    assert slow_queries.explain_mode("SELECT updated_at FROM wallets") == "analyze"
+    # locking reads would take row locks on live wallets if executed
+    assert slow_queries.explain_mode("SELECT balance FROM wallets WHERE user_id = 1 FOR UPDATE") == "plain"
+    assert slow_queries.explain_mode("select * from credit_requests for no key update skip locked") == "plain"
+    assert slow_queries.explain_mode("SELECT nextval('outbox_events_id_seq')") is None
+    assert slow_queries.explain_mode("UPDATE wallets SET balance = 0") is None
+    assert slow_queries.explain_mode("SELECT 'for update' AS note") == "analyze"
+
+
+def test_slow_statements_logged_and_summarized(client, create_user, get_token, slow_log, monkeypatch):
+    owner = create_user(phone="slowq_owner", password="so", role=models.Role.OWNER)
+    token = get_token(owner.phone, "so")
+
+    monkeypatch.setattr(slow_queries.settings, "SLOW_QUERY_MS", 0.000001)
+    assert client.get("/transactions", headers=auth_header(token)).status_code == 200
+    monkeypatch.setattr(slow_queries.settings, "SLOW_QUERY_MS", 200)
+
+    log_text = "".join(p.read_text() for p in slow_log.iterdir())
+    assert "slowq_owner" not in log_text  # parameter values never reach the log
+
+    resp = client.get("/debug/slow-queries", headers=auth_header(token))
+    assert resp.status_code == 200
+    groups = resp.json()["data"]
+    assert groups
+    endpoints = {e for g in groups for e in g["endpoints"]}
+    assert "GET /transactions" in endpoints
+    tx_group = next(g for g in groups if "package_transactions" in g["statement"])
+    assert tx_group["count"] >= 1 and tx_group["max_ms"] >= 0
+
+
+def test_slow_query_summary_is_owner_only(client, create_user, get_token):
+    jester = create_user(phone="slowq_jester", password="sj", role=models.Role.JESTER)
+    token = get_token(jester.phone, "sj")
+    assert client.get("/debug/slow-queries", headers=auth_header(token)).status_code == 403
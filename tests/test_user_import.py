@@ -0,0 +1,65 @@
+from app import models, utils
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_csv(rows):
+    lines = ["first_name,last_name,phone_number,city,region,password,role"]
+    lines += [",".join(r) for r in rows]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def upload(client, token, body):
+    return client.post(
+        "/api/management/users/import",
+        files={"file": ("users.csv", body, "text/csv")},
+        headers=auth_header(token),
+    )
+
+
+def test_import_creates_users_under_importer(client, db_session, create_user, get_token):
+    manager = create_user(phone="imp_mgr", password="mp", role=models.Role.MANAGER)
+    token = get_token(manager.phone, "mp")
+
+    # enough rows to go through the process pool
+    rows = [(f"J{i}", "Imported", f"imp-{i:03d}", "Addis", "AA", f"pw{i}", "jester") for i in range(20)]
+    rows.append(("S", "Imported", "imp-sa", "", "", "pwsa", "SUPERAGENT"))
+    resp = upload(client, token, make_csv(rows))
+    assert resp.status_code == 201, resp.text
+    assert resp.json()["data"]["created"] == 21
+
+    created = db_session.query(models.User).filter(models.User.phone.like("imp-%")).all()
+    assert len(created) == 21
+    assert {u.superior_id for u in created} == {manager.id}
+    jester = next(u for u in created if u.phone == "imp-007")
+    assert jester.role == models.Role.JESTER and jester.phone_number == "imp-007"
+    assert utils.verify_password("pw7", jester.password)
+
+
+def test_import_rejects_whole_file_on_any_bad_row(client, db_session, create_user, get_token):
+    manager = create_user(phone="imp_mgr2", password="mp", role=models.Role.MANAGER)
+    create_user(phone="imp-taken", password="x", role=models.Role.JESTER)
+    token = get_token(manager.phone, "mp")
+
+    body = make_csv([
+        ("Ok", "Row", "imp2-ok", "", "", "pw", "JESTER"),
+        ("Dup", "Row", "imp2-ok", "", "", "pw", "JESTER"),
+        ("Taken", "Row", "imp-taken", "", "", "pw", "JESTER"),
+        ("Boss", "Row", "imp2-mgr", "", "", "pw", "MANAGER"),
+        ("No", "Password", "imp2-nopw", "", "", "", "JESTER"),
+    ])
+    resp = upload(client, token, body)
+    assert resp.status_code == 400
+    errors = resp.json()["detail"]["errors"]
+    assert [e["row"] for e in errors] == [3, 4, 5, 6]
+
+    assert db_session.query(models.User).filter(models.User.phone.like("imp2-%")).count() == 0
+
+
+def test_import_requires_creator_role(client, create_user, get_token):
+    jester = create_user(phone="imp_jester", password="jp", role=models.Role.JESTER)
+    token = get_token(jester.phone, "jp")
+    resp = upload(client, token, make_csv([("A", "B", "imp3-a", "", "", "pw", "JESTER")]))
+    assert resp.status_code == 403
@@ -0,0 +1,66 @@
+from sqlalchemy import select
+
+from app import models
+from app.core import user_search
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _search(client, token, q, **params):
+    resp = client.get("/api/management/users/search", params={"q": q, **params}, headers=auth_header(token))
+    assert resp.status_code == 200
+    return [(r["id"], r["name"]) for r in resp.json()["data"]]
+
+
+def test_search_ranks_phone_name_and_word_prefixes(client, db_session, create_user, get_token):
+    owner = create_user(phone="srch_owner", password="so", role=models.Role.OWNER)
+    token = get_token(owner.phone, "so")
+    mgr = create_user(phone="0911770001", password="x", role=models.Role.MANAGER, name="Zorba")
+    exact = create_user(phone="0911770002", password="x", role=models.Role.JESTER, name="Zorbel")
+    first = create_user(phone="0922770003", password="x", role=models.Role.JESTER, name="Zorbelina")
+    last = create_user(phone="0933770004", password="x", role=models.Role.JESTER, name="Abel")
+    last.last_name = "Zorbelstein"
+    db_session.commit()
+
+    assert _search(client, token, "zorbel") == [
+        (exact.id, "Zorbel"), (first.id, "Zorbelina"), (last.id, "Abel Zorbelstein"),
+    ]
+    assert _search(client, token, "091177") == [(mgr.id, "Zorba"), (exact.id, "Zorbel")]
+    assert _search(client, token, "091-177-0002") == [(exact.id, "Zorbel")]
+    assert _search(client, token, "abel zorb") == [(last.id, "Abel Zorbelstein")]
+    assert _search(client, token, "zorb", limit=2) == [(mgr.id, "Zorba"), (exact.id, "Zorbel")]
+    assert _search(client, token, "zorb%") == []
+
+    # renames through the bulk profile update reach the in-process index
+    client.put("/api/management/users/profile", json={"first_name": "Zorbelix"},
+               headers=auth_header(get_token("0933770004", "x")))
+    assert _search(client, token, "zorbeli") == [(first.id, "Zorbelina"), (last.id, "Zorbelix Zorbelstein")]
+
+
+def test_search_scope(client, db_session, create_user, get_token):
+    mgr = create_user(phone="srch_mgr", password="sm", role=models.Role.MANAGER)
+    mine = create_user(phone="srch_mine", password="x", role=models.Role.JESTER, name="Quillon")
+    create_user(phone="srch_theirs", password="x", role=models.Role.JESTER, name="Quillan")
+    mine.superior_id = mgr.id
+    db_session.commit()
+
+    assert _search(client, get_token(mgr.phone, "sm"), "quill") == [(mine.id, "Quillon")]
+    resp = client.get("/api/management/users/search", params={"q": "quill"},
+                      headers=auth_header(get_token("srch_mine", "x")))
+    assert resp.status_code == 403
+
+
+def test_prefix_index_matches_sql(db_session, create_user):
+    for i, (first, last) in enumerate([("Parity", "One"), ("Parit", None), ("Ann", "Parity"), ("Par", "Ity X")]):
+        user = create_user(phone=f"0955{i:06d}", password="x", role=models.Role.JESTER, name=first)
+        user.last_name = last
+    db_session.commit()
+
+    u = models.User
+    index = user_search.PrefixIndex(db_session.execute(
+        select(u.id, u.first_name, u.last_name, u.phone, u.role, u.superior_id)
+    ))
+    for q in ("par", "parity", "ity", "ity x", "0955", "0955000002", "par ity"):
+        assert index.search(q, 50) == user_search.search_sql(db_session, q, 50), q
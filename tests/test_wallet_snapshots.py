@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+from app import models
+from app.core import archive, snapshots
+from app.core import database as core_db
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _balance(client, token, user_id, as_of):
+    resp = client.get(f"/api/management/users/{user_id}/balance", params={"as_of": as_of.isoformat()},
+                      headers=auth_header(token))
+    assert resp.status_code == 200
+    return resp.json()["data"]
+
+
+def test_balance_as_of_uses_nearest_snapshot(client, engine, db_session, create_user, get_token):
+    manager = create_user(phone="snap_mgr", password="sm", role=models.Role.MANAGER, remaining_balance=500.0)
+    jester = create_user(phone="snap_jester", password="sj", role=models.Role.JESTER, remaining_balance=100.0)
+    jester.superior_id = manager.id
+    db_session.commit()
+    manager_token, jester_token = get_token(manager.phone, "sm"), get_token(jester.phone, "sj")
+    today = datetime.now(timezone.utc).date()
+
+    # nothing moved the jester's wallet in the last hour, so an hour-old label is accurate
+    before_game = datetime.now(timezone.utc)
+    assert snapshots.take(engine, today - timedelta(days=1), before_game - timedelta(hours=1)) >= 2
+    resp = client.post("/game/end", json={
+        "total_pot": 40, "cut": 8, "winning_pattern": "row", "win_amount": 30,
+        "bet_amount": 10, "date": str(today), "time": "10:00", "jester_name": "sj",
+    }, headers=auth_header(jester_token))
+    assert resp.json()["new_balance"] == 70.0
+    after_game = datetime.now(timezone.utc)
+    resp = client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": 50},
+                       headers=auth_header(manager_token))
+    assert resp.json()["data"]["receiver_new_balance"] == 120.0
+
+    # the live wallet is closer than the hour-old snapshot: walk back from it
+    data = _balance(client, manager_token, jester.id, after_game)
+    assert (data["balance"], data["source"]) == (70.0, "live")
+    data = _balance(client, manager_token, jester.id, before_game - timedelta(minutes=50))
+    assert (data["balance"], data["source"]) == (100.0, "snapshot")
+
+    # a fresh snapshot is closer still
+    snapshots.take(engine, today)
+    data = _balance(client, jester_token, jester.id, after_game)
+    assert (data["balance"], data["source"], data["snapshot_day"]) == (70.0, "snapshot", str(today))
+    assert _balance(client, jester_token, jester.id, before_game)["balance"] == 100.0
+
+
+def test_revert_counts_at_its_own_time(client, db_session, create_user, get_token):
+    owner = create_user(phone="snap_rv_owner", password="so", role=models.Role.OWNER)
+    manager = create_user(phone="snap_rv_mgr", password="sm", role=models.Role.MANAGER, remaining_balance=100.0)
+    jester = create_user(phone="snap_rv_jester", password="sj", role=models.Role.JESTER)
+    owner_token, manager_token = get_token(owner.phone, "so"), get_token(manager.phone, "sm")
+
+    tx_id = client.post("/transactions/send-package", json={"receiver_id": jester.id, "amount": 30},
+                        headers=auth_header(manager_token)).json()["data"]["transaction_id_num"]
+    between = datetime.now(timezone.utc)
+    assert client.post("/transactions/revert", json={"transaction_id": tx_id}, headers=auth_header(owner_token)).status_code == 200
+    after = datetime.now(timezone.utc)
+
+    assert _balance(client, owner_token, jester.id, between)["balance"] == 30.0
+    assert _balance(client, owner_token, jester.id, after)["balance"] == 0.0
+    # the owner took the refund, so the manager stays debited
+    assert _balance(client, owner_token, manager.id, between)["balance"] == 70.0
+    assert _balance(client, owner_token, manager.id, after)["balance"] == 70.0
+
+
+def test_archived_revert_counts_at_its_own_time(db_session, create_user, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive.settings, "ARCHIVE_DIR", str(tmp_path))
+    owner = create_user(phone="snap_ar_owner", password="so", role=models.Role.OWNER)
+    manager = create_user(phone="snap_ar_mgr", password="sm", role=models.Role.MANAGER)
+    jester = create_user(phone="snap_ar_jester", password="sj", role=models.Role.JESTER)
+    sent, reverted = datetime(2021, 1, 1, 10, tzinfo=timezone.utc), datetime(2021, 1, 3, 12, tzinfo=timezone.utc)
+    db_session.add(models.PackageTransaction(
+        sender_id=manager.id, receiver_id=jester.id, package_amount=40, status="REVERTED",
+        refund_to=owner.id, reverted_at=reverted, created_at=sent,
+    ))
+    db_session.commit()
+    archive.archive_table(core_db.engine, "package_transactions", datetime(2021, 1, 2, tzinfo=timezone.utc))
+    assert archive.archived_through("package_transactions") < reverted
+
+    def delta(user, start, end):
+        return snapshots.ledger_delta(db_session, user.id, start, end)
+
+    assert delta(jester, sent - timedelta(hours=1), sent + timedelta(hours=1)) == 40
+    # the revert lies past the archive boundary but its row is archived
+    assert delta(jester, reverted - timedelta(hours=1), reverted + timedelta(hours=1)) == -40
+    assert delta(jester, sent - timedelta(hours=1), reverted + timedelta(hours=1)) == 0
+    assert delta(manager, sent - timedelta(hours=1), reverted + timedelta(hours=1)) == -40
+
+
+def test_balance_as_of_access(client, create_user, get_token):
+    manager = create_user(phone="snap_mgr2", password="sm", role=models.Role.MANAGER)
+    other = create_user(phone="snap_other", password="so", role=models.Role.JESTER)
+    token = get_token(manager.phone, "sm")
+
+    assert client.get(f"/api/management/users/{other.id}/balance", headers=auth_header(token)).status_code == 403
+    assert client.get(f"/api/management/users/{manager.id}/balance", headers=auth_header(token)).status_code == 200
+    future = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    resp = client.get(f"/api/management/users/{manager.id}/balance", params={"as_of": future}, headers=auth_header(token))
+    assert resp.status_code == 400
+    assert client.get("/api/management/users/999999/balance", headers=auth_header(token)).status_code == 404
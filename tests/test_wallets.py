@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from app import models
+from app.core import wallets
+
+
+def auth_header(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_debit_only_applies_when_covered(db_session, create_user):
+    user = create_user(phone="wallet_debit", password="wd", role=models.Role.JESTER, remaining_balance=5.0)
+
+    assert wallets.debit(db_session, user.id, Decimal("3.50")) == Decimal("1.50")
+    assert wallets.debit(db_session, user.id, Decimal("2.00")) is None
+    db_session.commit()
+    assert wallets.balance(db_session, user.id) == Decimal("1.50")
+    # one bump per applied change
+    assert db_session.get(models.Wallet, user.id).version == 2
+
+
+def test_credit_opens_missing_wallet(db_session):
+    # users inserted with Core have no wallet row yet
+    user = models.User(phone="wallet_missing", password="x", role=models.Role.JESTER)
+    db_session.add(user)
+    db_session.commit()
+
+    assert wallets.balance(db_session, user.id) == Decimal("0.00")
+    assert wallets.debit(db_session, user.id, Decimal("1")) is None
+    assert wallets.credit(db_session, user.id, Decimal("2.25")) == Decimal("2.25")
+    assert wallets.credit(db_session, user.id, 1) == Decimal("3.25")
+    db_session.commit()
+    assert wallets.balances(db_session, [user.id, -1]) == {user.id: Decimal("3.25"), -1: Decimal("0.00")}
+
+
+def test_signin_and_game_end_use_the_wallet(client, create_user, get_token):
+    jester = create_user(phone="wallet_jester", password="wj", role=models.Role.JESTER, remaining_balance=40.0)
+    resp = client.post("/auth/signin", json={"phone_number": jester.phone, "password": "wj"})
+    assert resp.json()["data"]["user"]["balance"] == 40.0
+
+    token = get_token(jester.phone, "wj")
+    resp = client.post("/game/end", json={
+        "total_pot": 40, "cut": 8, "winning_pattern": "row", "win_amount": 32,
+        "bet_amount": 10, "date": "2025-01-01", "time": "10:00", "jester_name": "wj",
+    }, headers=auth_header(token))
+    assert resp.json()["new_balance"] == 8.0
+    assert client.get("/users/me", headers=auth_header(token)).json()["wallet_balance"] == 8.0